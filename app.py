@@ -1,11 +1,11 @@
-from flask import Flask, request, render_template, jsonify, send_file
+from flask import Flask, Response, request, render_template, jsonify
 import os
 import nltk
-import json
+import logging
 import csv
 import io
-import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import re
 
@@ -18,6 +18,14 @@ from modules.crm_integration import CRMIntegrationManager
 from modules.email_manager import EmailManager  
 from modules.financial_api_integration import FinancialAPIIntegration
 from modules.investment_criteria import InvestmentCriteriaValidator
+from modules.lead_store import get_lead_store, project_lead, lead_domain, SORT_FIELDS, REANALYSIS_KEEP_FIELDS
+from modules.lead_export import (select_export_leads, is_single_lead, compile_field_selection, dumps,
+                                 iter_csv, iter_json, iter_ndjson, compress_chunks, COMPRESSION_SUFFIXES,
+                                 iter_xlsx, iter_pdf, OPENPYXL_AVAILABLE, REPORTLAB_AVAILABLE,
+                                 EMAIL_CSV_HEADERS, email_csv_row)
+from modules.job_queue import JobQueue, QueueFullError
+from modules.lead_parquet import PYARROW_AVAILABLE, iter_parquet, iter_arrow, iter_imported_leads
+from utils.helpers import generate_lead_id
 
 # Initialize these components with your other initializations
 
@@ -43,9 +51,35 @@ crm_manager = CRMIntegrationManager()
 email_manager = EmailManager()  # New component for email functionality
 financial_api = FinancialAPIIntegration()
 investment_validator = InvestmentCriteriaValidator()
-# In-memory data store for leads (in a production app, this would be a database)
-# For demo purposes, we'll use a simple dictionary to store leads
-leads_store = {}
+
+# Load trained model artifacts produced by the offline training pipeline (modules/model_training.py)
+if investment_validator.load_models() | financial_api.load_models():
+    logger.info("Trained model artifacts loaded")
+else:
+    logger.info("No trained model artifacts found, using rule-based scoring")
+# Durable lead store shared by all routes (SQLite by default, see modules/lead_store.py)
+lead_store = get_lead_store()
+
+# Job broker and worker pool for queued /analyze requests; job state is shared
+# by all worker processes through the JOB_DB_PATH database
+analysis_jobs = JobQueue(
+    max_workers=int(os.environ.get('ANALYSIS_WORKERS', 4)),
+    max_pending=int(os.environ.get('ANALYSIS_QUEUE_SIZE', 100)),
+    name='analysis-job'
+)
+
+# Worker pool shared by all /analyze-batch requests, so the limit on concurrent analyses is global
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BATCH_ANALYSIS_WORKERS', 8)),
+    thread_name_prefix='batch-analysis'
+)
+MAX_BATCH_URLS = int(os.environ.get('MAX_BATCH_URLS', 1000))
+
+# Worker pool for financial enrichment that runs after /analyze has returned
+enrichment_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('ENRICHMENT_WORKERS', 4)),
+    thread_name_prefix='lead-enrichment'
+)
 
 
 @app.route('/')
@@ -55,213 +89,259 @@ def home():
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    """Analyze a company website for AI readiness and lead potential"""
+    """
+    Analyze a company website for AI readiness and lead potential
+    
+    With async_job set, the analysis is queued and a job id is returned at
+    once; progress is available from /analyze-jobs/<job_id> and its events stream.
+    """
     url = request.form.get('url')
     if not url:
         return jsonify({"error": "URL is required"})
     
-    logger.info(f"Starting analysis for URL: {url}")
-    
     # Validate URL format
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
     
+    # Financials and investment match either run now or in the background
+    background_financials = request.form.get('async_financials', '').lower() in ('1', 'true', 'on')
+    
+    if request.form.get('async_job', '').lower() in ('1', 'true', 'on'):
+        try:
+            job_id = analysis_jobs.submit('analyze', run_analysis_job, url,
+                                          background_financials=background_financials)
+        except QueueFullError:
+            return jsonify({"error": "Too many analyses in progress, please retry shortly"}), 503
+        logger.info(f"Queued analysis job {job_id} for URL: {url}")
+        return jsonify({
+            'status': 'queued',
+            'job_id': job_id,
+            'status_url': f'/analyze-jobs/{job_id}',
+            'events_url': f'/analyze-jobs/{job_id}/events'
+        }), 202
+    
     try:
-        # Step 1: Scrape website
-        logger.info("Scraping website content")
-        base_url, pages_content = scraper.scrape_website(url)
-        
-        if not pages_content:
-            logger.warning(f"No content found for URL: {url}")
-            return jsonify({"error": "Could not access website or no content found"})
+        final_results, analysis_results = run_analysis(url)
         
-        # Step 2: Analyze content
-        logger.info("Analyzing website content")
-        analysis_results = analyzer.analyze_content(pages_content, base_url)
+        if background_financials:
+            final_results['financials_status'] = 'pending'
+        else:
+            final_results.update(enrich_lead_financials(final_results, analysis_results))
         
-        # Step 3: Calculate AI readiness score
-        logger.info("Calculating AI readiness score")
-        ai_results = ai_scorer.calculate_score(analysis_results)
+        # Persist the lead (re-analysis of a known domain updates it in place)
+        final_results = save_analyzed_lead(final_results)
         
-        # Step 4: Calculate lead score and sales insights
-        logger.info("Generating lead qualification insights")
-        sales_insights = lead_scorer.calculate_lead_score(
-            analysis_results, 
-            ai_results['ai_readiness_score']
-        )
+        # Serialize before the worker starts patching the stored lead
+        response = jsonify(final_results)
+        if background_financials:
+            enrichment_executor.submit(run_background_enrichment, final_results['id'], analysis_results)
         
-        # Combine results
-        final_results = {**ai_results}
-        final_results['sales_insights'] = sales_insights
+        logger.info(f"Analysis completed successfully for URL: {url}")
+        return response
+    
+    except AnalysisError as e:
+        return jsonify({"error": str(e)})
+    except Exception as e:
+        logger.error(f"Analysis failed for URL {url}: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Analysis failed: {str(e)}"})
+
+@app.route('/analyze-jobs/<job_id>', methods=['GET'])
+def analyze_job_status(job_id):
+    """Poll an analysis job: status, current stage, progress and, once complete, the lead"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(job)
+
+@app.route('/analyze-jobs/<job_id>/events', methods=['GET'])
+def analyze_job_events(job_id):
+    """Stream analysis job progress as Server-Sent Events until the job finishes"""
+    if analysis_jobs.get(job_id) is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    
+    # Reconnecting EventSource clients resume after the last event they saw
+    after = request.headers.get('Last-Event-ID', request.args.get('last_event_id', 0), type=int) or 0
+    
+    def stream():
+        last_seen = after
+        while True:
+            polled = analysis_jobs.events(job_id, last_seen, timeout=15)
+            if polled is None:
+                yield 'event: failed\ndata: {"error": "Job expired"}\n\n'
+                return
+            events, finished = polled
+            if not events and not finished:
+                yield ': keep-alive\n\n'
+                continue
+            for event_id, name, data in events:
+                yield f"id: {event_id}\nevent: {name}\ndata: {dumps(data).decode('utf-8')}\n\n"
+                last_seen = event_id
+            if finished:
+                return
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/analyze-batch', methods=['POST'])
+def analyze_batch():
+    """
+    Analyze many websites in one request
+    
+    Accepts {'urls': [...]} as JSON or an uploaded CSV file ('file', with a
+    'url' column or URLs in the first column). URLs are deduplicated by domain
+    and analyzed on the shared batch worker pool. Results are streamed as
+    NDJSON in completion order: a 'batch' line, one 'result' line per URL and
+    a closing 'summary' line.
+    """
+    try:
+        urls = parse_batch_urls(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not urls:
+        return jsonify({"error": "No URLs provided"}), 400
+    if len(urls) > MAX_BATCH_URLS:
+        return jsonify({"error": f"At most {MAX_BATCH_URLS} URLs per batch"}), 400
+    
+    # One analysis per domain
+    targets = []
+    skipped = []
+    seen_domains = set()
+    for url in urls:
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        domain = lead_domain(url)
+        if not domain:
+            skipped.append({'url': url, 'reason': 'invalid URL'})
+        elif domain in seen_domains:
+            skipped.append({'url': url, 'reason': 'duplicate domain'})
+        else:
+            seen_domains.add(domain)
+            targets.append(url)
+    
+    logger.info(f"Starting batch analysis of {len(targets)} URLs ({len(skipped)} skipped)")
+    futures = {batch_executor.submit(run_batch_item, url): url for url in targets}
+    
+    def stream():
+        completed = failed = 0
+        try:
+            yield dumps({'type': 'batch', 'urls': len(targets), 'skipped': skipped}) + b'\n'
+            for future in as_completed(futures):
+                item = future.result()
+                if item['status'] == 'complete':
+                    completed += 1
+                else:
+                    failed += 1
+                yield dumps(dict(item, type='result')) + b'\n'
+            yield dumps({'type': 'summary', 'completed': completed, 'failed': failed}) + b'\n'
+            logger.info(f"Batch analysis finished: {completed} complete, {failed} failed")
+        finally:
+            # Client went away: drop the analyses that have not started yet
+            for future in futures:
+                future.cancel()
+    
+    return Response(stream(), mimetype='application/x-ndjson')
+
+@app.route('/lead-status/<lead_id>', methods=['GET'])
+def lead_status(lead_id):
+    """Report the background financial enrichment state of a lead"""
+    lead = lead_store.get(lead_id)
+    if lead is None:
+        return jsonify({"error": f"Lead with ID {lead_id} not found"}), 404
+    
+    return jsonify({
+        'id': lead_id,
+        'financials_status': lead.get('financials_status', 'complete'),
+        'financials': lead.get('financials'),
+        'investment_match': lead.get('investment_match')
+    })
+
+@app.route('/validate-leads', methods=['POST'])
+def validate_leads():
+    """Rank stored leads against an investment criteria profile"""
+    try:
+        data = request.json or {}
+        lead_ids = data.get('lead_ids')
+        filters = data.get('filters', {})
         
-        # Add pages analyzed to results
-        final_results['pages_analyzed'] = list(pages_content.keys())
+        # min_match is an overall match percentage; limit is clamped like /get-leads page sizes
+        try:
+            min_match = float(data['min_match']) if data.get('min_match') is not None else None
+            limit = min(max(int(data.get('limit', 100)), 1), 500)
+        except (TypeError, ValueError):
+            return jsonify({"error": "min_match and limit must be numbers"}), 400
+        if min_match is not None and not 0 <= min_match <= 100:
+            return jsonify({"error": "min_match must be between 0 and 100"}), 400
         
-        # Extract company name from URL
-        company_name = extract_company_name(url)
-        final_results['company_name'] = company_name
+        # Stream the validation records of the selected leads (all stored leads unless ids are given)
+        evaluated = 0
         
-        # Add URL to results
-        final_results['url'] = url
+        def records():
+            nonlocal evaluated
+            for record in lead_store.iter_validation_records(filters, lead_ids=lead_ids or None):
+                evaluated += 1
+                yield record
         
-        # Generate a unique ID for this analysis
-        analysis_id = f"lead_{int(datetime.now().timestamp())}"
-        final_results['id'] = analysis_id
+        logger.info(f"Validating leads against criteria profile {data.get('profile', 'default')}")
+        matches = investment_validator.validate_batch(
+            records(),
+            profile=data.get('profile'),
+            min_match=min_match,
+            limit=limit
+        )
+        logger.info(f"Validated {evaluated} leads, {len(matches)} matches returned")
         
-        # Add verification status (initially pending)
-        final_results['verification'] = {
-            'status': 'Pending',
-            'date': datetime.now().isoformat(),
-            'notes': '',
-            'verified_by': 'System'
-        }
+        return jsonify({
+            'status': 'success',
+            'evaluated': evaluated,
+            'matches': matches
+        })
         
-        # Add CRM status (initially not synced)
-        final_results['crm'] = {
-            'status': 'Not Synced',
-            'date': None,
-            'crm_id': None
-        }
-                # Add financial analysis if company name is available
-        if 'company_name' in final_results:
-            try:
-                logger.debug(f"Getting financial data for {final_results['company_name']}")
-                company_financials = financial_api.get_company_financials(final_results['company_name'])
-                if company_financials:
-                    logger.debug(f"Financial data found: {company_financials}")
-                    # Add financial data to results
-                    final_results['financials'] = company_financials
-                    
-                    # Estimate recurring revenue
-                    recurring_revenue = financial_api.estimate_recurring_revenue(
-                        final_results, company_financials
-                    )
-                    if recurring_revenue:
-                        logger.debug(f"Estimated recurring revenue: {recurring_revenue}%")
-                        final_results['financials']['recurring_revenue_percentage'] = recurring_revenue
-                    
-                    logger.info(f"Financial data added for {final_results['company_name']}")
-                else:
-                    logger.warning(f"No financial data found for {final_results['company_name']}")
-            except Exception as e:
-                logger.error(f"Error adding financial data: {str(e)}", exc_info=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Batch validation failed: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Batch validation failed: {str(e)}"}), 500
 
-        # Add investment criteria match
-        try:
-            logger.debug("Calculating investment criteria match")
-            investment_match = investment_validator.validate(
-                analysis_results, 
-                final_results.get('sales_insights', {}),
-                final_results.get('financials', {}),
-                final_results.get('business_details', {}),
-                final_results.get('industry_details', {})
-            )
-            logger.debug(f"Investment match results: {investment_match}")
-            final_results['investment_match'] = investment_match
-            logger.info("Investment criteria match added to results")
-        except Exception as e:
-            logger.error(f"Error adding investment match: {str(e)}", exc_info=True)
+@app.route('/bulk-financials', methods=['POST'])
+def bulk_financials():
+    """Fetch financial data for a list of tickers in one batched job"""
+    try:
+        data = request.json or {}
+        tickers = data.get('tickers')
         
-        # Store lead in memory
-        leads_store[analysis_id] = final_results
+        if not tickers or not isinstance(tickers, list):
+            return jsonify({"error": "A list of tickers is required"}), 400
+        
+        financials = financial_api.get_bulk_financials(tickers)
+        
+        return jsonify({
+            'status': 'success',
+            'requested': len(tickers),
+            'found': sum(1 for f in financials.values() if f),
+            'financials': financials
+        })
         
-        logger.info(f"Analysis completed successfully for URL: {url}")
-        return jsonify(final_results)
-    
     except Exception as e:
-        logger.error(f"Analysis failed for URL {url}: {str(e)}", exc_info=True)
-        return jsonify({"error": f"Analysis failed: {str(e)}"})
+        logger.error(f"Bulk financials failed: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Bulk financials failed: {str(e)}"}), 500
 
 @app.route('/export-csv', methods=['POST'])
 def export_csv():
-    """Export analysis results as a CSV file for CRM import"""
+    """
+    Export leads as a CSV file for CRM import
+    
+    The body is either lead data (one lead or a list) or {'lead_ids': [...]}
+    and/or {'filters': {...}} to export stored leads. The file is streamed.
+    """
     try:
         data = request.json
         if not data:
             return jsonify({"error": "No data provided for export"})
         
         logger.info("Exporting data as CSV")
+        leads = select_export_leads(lead_store, data)
         
-        # Check if this is a single lead or multiple leads
-        leads_data = []
-        if isinstance(data, list):
-            leads_data = data
-        else:
-            leads_data = [data]
-            
-        # Create a string buffer to write CSV data
-        csv_buffer = io.StringIO()
-        writer = csv.writer(csv_buffer)
-        
-        # Write headers
-        writer.writerow([
-            'Company Name', 
-            'Website', 
-            'Lead Score', 
-            'Lead Tier',
-            'AI Readiness Score',
-            'Company Size',
-            'Outreach Timing',
-            'Contact Name',
-            'Contact Title',
-            'Contact Email',
-            'Contact Phone',
-            'Recommended Approach',
-            'Conversation Starters',
-            'Pain Points',
-            'Verification Status',
-            'Verification Date',
-            'CRM Status'
-        ])
-        
-        # Write data rows
-        for lead in leads_data:
-            # Extract data for CSV
-            crm_data = lead.get('sales_insights', {}).get('crm_ready', {})
-            outreach = lead.get('sales_insights', {}).get('outreach_recommendation', {})
-            pain_points = lead.get('sales_insights', {}).get('pain_points', [])
-            verification = lead.get('verification', {})
-            crm_status = lead.get('crm', {})
-            
-            company = crm_data.get('company', {})
-            contact = crm_data.get('contact', {})
-            approach = outreach.get('approach', {})
-            
-            # Format conversation starters
-            conversation_starters = '; '.join(approach.get('conversation_starters', []))
-            
-            # Format pain points
-            pain_points_text = '; '.join(pain_points[:3])  # Include up to 3 pain points
-            
-            # Write data row
-            writer.writerow([
-                lead.get('company_name', company.get('name', '')),
-                lead.get('url', company.get('website', '')),
-                lead.get('sales_insights', {}).get('lead_score', company.get('lead_score', '')),
-                lead.get('sales_insights', {}).get('lead_tier', company.get('lead_tier', '')),
-                lead.get('ai_readiness_score', company.get('ai_readiness_score', '')),
-                lead.get('company_size_indicator', company.get('size', '')),
-                outreach.get('timing', company.get('outreach_timing', '')),
-                (contact.get('name', '')),
-                (contact.get('title', '')),
-                (contact.get('email', '')),
-                (contact.get('phone', '')),
-                approach.get('focus', ''),
-                conversation_starters,
-                pain_points_text,
-                verification.get('status', 'Pending'),
-                verification.get('date', ''),
-                crm_status.get('status', 'Not Synced')
-            ])
-        
-        # Create response
-        csv_buffer.seek(0)
-        return send_file(
-            io.BytesIO(csv_buffer.getvalue().encode()),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name='lead_data.csv'
-        )
+        return export_response(iter_csv(leads), 'lead_data.csv', 'text/csv', data.get('compression'))
         
     except Exception as e:
         logger.error(f"CSV export failed: {str(e)}", exc_info=True)
@@ -269,7 +349,13 @@ def export_csv():
 
 @app.route('/export-json', methods=['POST'])
 def export_json():
-    """Export analysis results as a JSON file for system integration"""
+    """
+    Export leads as a JSON file for system integration
+    
+    Accepts the same lead selection as /export-csv, plus 'field_selection',
+    'format' ('json' for an array, 'ndjson' for one lead per line) and
+    'compression' ('gzip' or 'zstd').
+    """
     try:
         data = request.json
         if not data:
@@ -277,32 +363,85 @@ def export_json():
             
         logger.info("Exporting data as JSON")
         
-        # Check field selection if provided
-        field_selection = data.get('field_selection', None)
-        export_data = data.get('leads', data)
+        # Resolve the field selection once for the whole export
+        project = compile_field_selection(data.get('field_selection', None))
+        export_format = data.get('format', 'json')
         
-        # If field selection is provided, filter the data
-        if field_selection:
-            if isinstance(export_data, list):
-                export_data = [filter_lead_data(lead, field_selection) for lead in export_data]
-            else:
-                export_data = filter_lead_data(export_data, field_selection)
-            
-        # Create a formatted JSON string
-        json_data = json.dumps(export_data, indent=2)
-        
-        # Create response
-        return send_file(
-            io.BytesIO(json_data.encode()),
-            mimetype='application/json',
-            as_attachment=True,
-            download_name='lead_analysis.json'
-        )
+        if is_single_lead(data):
+            chunks = [dumps(project(data.get('leads', data)))]
+        elif export_format == 'ndjson':
+            chunks = iter_ndjson(select_export_leads(lead_store, data), project)
+        else:
+            chunks = iter_json(select_export_leads(lead_store, data), project)
+        
+        if export_format == 'ndjson':
+            return export_response(chunks, 'lead_analysis.ndjson', 'application/x-ndjson', data.get('compression'))
+        return export_response(chunks, 'lead_analysis.json', 'application/json', data.get('compression'))
         
     except Exception as e:
         logger.error(f"JSON export failed: {str(e)}", exc_info=True)
         return jsonify({"error": f"Export failed: {str(e)}"})
 
+@app.route('/export-parquet', methods=['POST'])
+def export_parquet():
+    """
+    Export leads as a Parquet file (or an Arrow IPC file with format='arrow') for analytics
+    
+    Accepts the same lead selection as /export-csv. Nested score components,
+    technology indicators, financials and investment match are kept as typed columns.
+    """
+    if not PYARROW_AVAILABLE:
+        return jsonify({"error": "Parquet export requires pyarrow"}), 501
+    try:
+        data = request.json
+        if not data:
+            return jsonify({"error": "No data provided for export"}), 400
+        
+        leads = select_export_leads(lead_store, data)
+        if data.get('format') == 'arrow':
+            logger.info("Exporting data as Arrow")
+            return export_response(iter_arrow(leads), 'lead_data.arrow', 'application/vnd.apache.arrow.file')
+        
+        logger.info("Exporting data as Parquet")
+        return export_response(iter_parquet(leads), 'lead_data.parquet', 'application/vnd.apache.parquet')
+        
+    except Exception as e:
+        logger.error(f"Parquet export failed: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Export failed: {str(e)}"}), 500
+
+@app.route('/import-leads', methods=['POST'])
+def import_leads():
+    """Bulk import leads from an uploaded Parquet or Arrow file produced by /export-parquet"""
+    if not PYARROW_AVAILABLE:
+        return jsonify({"error": "Lead import requires pyarrow"}), 501
+    try:
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({"error": "No file uploaded"}), 400
+        
+        fmt = request.form.get('format') or ('arrow' if upload.filename.endswith(('.arrow', '.feather')) else 'parquet')
+        logger.info(f"Importing leads from {upload.filename} ({fmt})")
+        
+        imported = 0
+        batch = []
+        for lead in iter_imported_leads(upload.stream, fmt):
+            batch.append(lead)
+            if len(batch) >= 1000:
+                imported += lead_store.put_many(batch)
+                batch = []
+        if batch:
+            imported += lead_store.put_many(batch)
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'Imported {imported} leads',
+            'imported': imported
+        })
+        
+    except Exception as e:
+        logger.error(f"Lead import failed: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Import failed: {str(e)}"}), 500
+
 @app.route('/verify-lead', methods=['POST'])
 def verify_lead():
     """Verify a lead and update its verification status"""
@@ -315,10 +454,6 @@ def verify_lead():
         
         lead_id = data['id']
         
-        # Check if lead exists in store
-        if lead_id not in leads_store:
-            return jsonify({"error": f"Lead with ID {lead_id} not found"}), 404
-        
         # Extract verification details
         verification = {
             'status': data.get('status', 'Verified'),
@@ -328,7 +463,13 @@ def verify_lead():
         }
         
         # Update lead verification status
-        leads_store[lead_id]['verification'] = verification
+        lead = lead_store.update(lead_id, {'verification': verification})
+        if lead is None:
+            return jsonify({"error": f"Lead with ID {lead_id} not found"}), 404
+        
+        # Analysts can confirm a company is private (or public) to steer future financial lookups
+        if 'is_private' in data:
+            financial_api.mark_company_ownership(lead.get('company_name'), bool(data['is_private']))
         
         return jsonify({
             'status': 'success',
@@ -353,10 +494,7 @@ def crm_sync():
             return jsonify({"error": "No leads provided for sync"}), 400
             
         # Retrieve leads from store
-        leads_to_sync = []
-        for lead_id in lead_ids:
-            if lead_id in leads_store:
-                leads_to_sync.append(leads_store[lead_id])
+        leads_to_sync = lead_store.get_many(lead_ids)
         
         if not leads_to_sync:
             return jsonify({"error": "None of the provided lead IDs were found"}), 404
@@ -374,11 +512,11 @@ def crm_sync():
                 
                 # Update lead CRM status
                 lead_id = lead['id']
-                leads_store[lead_id]['crm'] = {
+                lead_store.update(lead_id, {'crm': {
                     'status': 'Synced',
                     'date': datetime.now().isoformat(),
                     'crm_id': export_result.get('crm_id', None)
-                }
+                }})
                 
                 sync_results.append({
                     'id': lead_id,
@@ -439,22 +577,17 @@ def test_crm_connection():
 
 @app.route('/export-pdf', methods=['POST'])
 def export_pdf():
-    """Export analysis results as a PDF file"""
+    """Export leads as a PDF report (same lead selection as /export-csv)"""
+    if not REPORTLAB_AVAILABLE:
+        return jsonify({"error": "PDF export requires reportlab"}), 501
     try:
         data = request.json
         if not data:
             return jsonify({"error": "No data provided for export"}), 400
             
         logger.info("Exporting data as PDF")
-        
-        # NOTE: For a complete implementation, you would use a PDF generation library
-        # like reportlab, WeasyPrint, or pdfkit. This is a simplified version.
-            
-        # For this demo, we'll return a placeholder response
-        return jsonify({
-            "status": "error",
-            "message": "PDF export is not fully implemented in this demo version"
-        }), 501
+        leads = select_export_leads(lead_store, data)
+        return export_response(iter_pdf(leads), 'lead_report.pdf', 'application/pdf')
         
     except Exception as e:
         logger.error(f"PDF export failed: {str(e)}", exc_info=True)
@@ -462,22 +595,20 @@ def export_pdf():
 
 @app.route('/export-xlsx', methods=['POST'])
 def export_xlsx():
-    """Export analysis results as an Excel file"""
+    """Export leads as an Excel file (same lead selection as /export-csv)"""
+    if not OPENPYXL_AVAILABLE:
+        return jsonify({"error": "Excel export requires openpyxl"}), 501
     try:
         data = request.json
         if not data:
             return jsonify({"error": "No data provided for export"}), 400
             
         logger.info("Exporting data as Excel")
-        
-        # NOTE: For a complete implementation, you would use an Excel library
-        # like openpyxl or xlsxwriter. This is a simplified version.
-            
-        # For this demo, we'll return a placeholder response
-        return jsonify({
-            "status": "error",
-            "message": "Excel export is not fully implemented in this demo version"
-        }), 501
+        leads = select_export_leads(lead_store, data)
+        return export_response(
+            iter_xlsx(leads), 'lead_data.xlsx',
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
         
     except Exception as e:
         logger.error(f"Excel export failed: {str(e)}", exc_info=True)
@@ -496,7 +627,11 @@ def email_export():
         subject = data.get('subject')
         message = data.get('message')
         format = data.get('format', 'csv')
-        leads = data.get('leads', [])
+        # Stored leads can be selected by id or filter instead of being posted
+        if 'lead_ids' in data or 'filters' in data:
+            leads = list(select_export_leads(lead_store, data))
+        else:
+            leads = data.get('leads', [])
         
         if not recipient:
             return jsonify({"error": "Recipient email is required"}), 400
@@ -511,11 +646,13 @@ def email_export():
         elif format == 'json':
             export_file = generate_json_export(leads)
         elif format == 'pdf':
-            # Would implement PDF generation here
-            return jsonify({"error": "PDF export not fully implemented"}), 501
+            if not REPORTLAB_AVAILABLE:
+                return jsonify({"error": "PDF export requires reportlab"}), 501
+            export_file = b''.join(iter_pdf(leads))
         elif format == 'xlsx':
-            # Would implement Excel generation here
-            return jsonify({"error": "Excel export not fully implemented"}), 501
+            if not OPENPYXL_AVAILABLE:
+                return jsonify({"error": "Excel export requires openpyxl"}), 501
+            export_file = b''.join(iter_xlsx(leads))
         else:
             return jsonify({"error": f"Unsupported export format: {format}"}), 400
             
@@ -546,14 +683,48 @@ def email_export():
 
 @app.route('/get-leads', methods=['GET'])
 def get_leads():
-    """Get all stored leads"""
+    """
+    Get stored leads, one page at a time
+    
+    Query parameters:
+        lead_tier, min_lead_score, max_lead_score, min_ai_score, verification_status,
+        crm_status, added_after, added_before: filters
+        sort: a sortable field, prefixed with '-' for descending order (default -created_at)
+        limit: page size (default 100, at most 500)
+        cursor: next_cursor from the previous page
+        fields: 'summary' for indexed summary columns, or a comma-separated list of (dotted) lead fields
+        include_total: 'true' to also count all matching leads (a full scan of the matches)
+    """
     try:
-        # In a real implementation, you would filter by user
-        # and implement pagination
-        return jsonify({
+        filters = parse_lead_filters(request.args)
+        sort = request.args.get('sort', '-created_at')
+        descending = sort.startswith('-')
+        sort = sort.lstrip('-')
+        if sort not in SORT_FIELDS:
+            return jsonify({"error": f"Cannot sort by {sort}; use one of {', '.join(SORT_FIELDS)}"}), 400
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+        fields = request.args.get('fields')
+        
+        try:
+            leads, next_cursor = lead_store.page(
+                filters, sort=sort, descending=descending, limit=limit,
+                cursor=request.args.get('cursor'), summary=fields == 'summary'
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        if fields and fields != 'summary':
+            selected = ['id'] + [field.strip() for field in fields.split(',') if field.strip()]
+            leads = [project_lead(lead, selected) for lead in leads]
+        
+        response = {
             'status': 'success',
-            'leads': list(leads_store.values())
-        })
+            'leads': leads,
+            'next_cursor': next_cursor
+        }
+        if request.args.get('include_total', '').lower() in ('1', 'true', 'on'):
+            response['total'] = lead_store.count(filters)
+        return jsonify(response)
     except Exception as e:
         logger.error(f"Get leads failed: {str(e)}", exc_info=True)
         return jsonify({"error": f"Failed to retrieve leads: {str(e)}"}), 500
@@ -568,11 +739,9 @@ def delete_lead():
             
         lead_id = data['id']
         
-        if lead_id not in leads_store:
-            return jsonify({"error": f"Lead with ID {lead_id} not found"}), 404
-            
         # Remove lead from store
-        leads_store.pop(lead_id)
+        if not lead_store.delete(lead_id):
+            return jsonify({"error": f"Lead with ID {lead_id} not found"}), 404
         
         return jsonify({
             'status': 'success',
@@ -592,17 +761,15 @@ def save_lead():
             
         # Generate ID if not present
         if 'id' not in lead_data:
-            lead_data['id'] = f"lead_{int(datetime.now().timestamp())}"
+            lead_data['id'] = generate_lead_id()
             
-        lead_id = lead_data['id']
-        
-        # Add to lead store
-        leads_store[lead_id] = lead_data
+        # A lead for an already stored domain updates that lead in place
+        saved = save_analyzed_lead(lead_data)
         
         return jsonify({
             'status': 'success',
             'message': f'Lead saved successfully',
-            'id': lead_id
+            'id': saved['id']
         })
     except Exception as e:
         logger.error(f"Save lead failed: {str(e)}", exc_info=True)
@@ -620,6 +787,210 @@ def server_error(e):
     return jsonify({"error": "Internal server error"}), 500
 
 # Helper functions
+class AnalysisError(Exception):
+    """Analysis could not produce a lead (e.g. the website could not be read)"""
+
+def run_analysis(url, progress=None):
+    """
+    Scrape, analyze and score a website
+    
+    Args:
+        url (str): Website URL including scheme
+        progress (callable): Optional progress(stage, percent) callback
+    
+    Returns:
+        tuple: (lead without financials, raw content analysis results)
+    """
+    report = progress or (lambda stage, percent: None)
+    logger.info(f"Starting analysis for URL: {url}")
+    
+    # Step 1: Scrape website
+    logger.info("Scraping website content")
+    report('scraping', 10)
+    base_url, pages_content = scraper.scrape_website(url)
+    
+    if not pages_content:
+        logger.warning(f"No content found for URL: {url}")
+        raise AnalysisError("Could not access website or no content found")
+    
+    # Step 2: Analyze content
+    logger.info("Analyzing website content")
+    report('analyzing', 35)
+    analysis_results = analyzer.analyze_content(pages_content, base_url)
+    
+    # Step 3: Calculate AI readiness score
+    logger.info("Calculating AI readiness score")
+    report('scoring', 55)
+    ai_results = ai_scorer.calculate_score(analysis_results)
+    
+    # Step 4: Calculate lead score and sales insights
+    logger.info("Generating lead qualification insights")
+    report('lead_scoring', 65)
+    sales_insights = lead_scorer.calculate_lead_score(
+        analysis_results, 
+        ai_results['ai_readiness_score']
+    )
+    
+    # Combine results
+    final_results = {**ai_results}
+    final_results['sales_insights'] = sales_insights
+    
+    # Add pages analyzed to results
+    final_results['pages_analyzed'] = list(pages_content.keys())
+    
+    # Keep subscription-term counts for recurring revenue estimation
+    final_results['subscription_indicators'] = analysis_results.get('subscription_indicators', {})
+    
+    # Extract company name from URL
+    final_results['company_name'] = extract_company_name(url)
+    
+    # Add URL to results
+    final_results['url'] = url
+    
+    # Generate a unique ID for this analysis
+    final_results['id'] = generate_lead_id()
+    
+    # Add verification status (initially pending)
+    final_results['verification'] = {
+        'status': 'Pending',
+        'date': datetime.now().isoformat(),
+        'notes': '',
+        'verified_by': 'System'
+    }
+    
+    # Add CRM status (initially not synced)
+    final_results['crm'] = {
+        'status': 'Not Synced',
+        'date': None,
+        'crm_id': None
+    }
+    return final_results, analysis_results
+
+def parse_batch_urls(req):
+    """URLs of an /analyze-batch request, from a JSON body or an uploaded CSV file"""
+    upload = req.files.get('file')
+    if upload is not None:
+        text = upload.stream.read().decode('utf-8-sig', errors='replace')
+        rows = [row for row in csv.reader(io.StringIO(text)) if row and row[0].strip()]
+        if not rows:
+            return []
+        header = [cell.strip().lower() for cell in rows[0]]
+        if 'url' in header or 'website' in header:
+            column = header.index('url') if 'url' in header else header.index('website')
+            rows = rows[1:]
+        else:
+            column = 0
+        return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+    
+    data = req.get_json(silent=True) or {}
+    urls = data.get('urls', [])
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        raise ValueError("'urls' must be a list of strings")
+    return [url.strip() for url in urls if url.strip()]
+
+def run_batch_item(url):
+    """Analyze one batch URL, including financials; errors are reported, not raised"""
+    try:
+        final_results, analysis_results = run_analysis(url)
+        final_results.update(enrich_lead_financials(final_results, analysis_results))
+        return {'url': url, 'status': 'complete', 'lead': save_analyzed_lead(final_results)}
+    except AnalysisError as e:
+        return {'url': url, 'status': 'failed', 'error': str(e)}
+    except Exception as e:
+        logger.error(f"Batch analysis failed for URL {url}: {str(e)}", exc_info=True)
+        return {'url': url, 'status': 'failed', 'error': f"Analysis failed: {str(e)}"}
+
+def save_analyzed_lead(lead):
+    """Store an analyzed lead; an existing lead for the same domain is updated in place"""
+    return lead_store.upsert_by_domain(lead, keep_fields=REANALYSIS_KEEP_FIELDS)
+
+def run_analysis_job(url, progress, background_financials=False):
+    """Analysis run by the analysis job queue; financials run in the job unless backgrounded"""
+    final_results, analysis_results = run_analysis(url, progress)
+    
+    if background_financials:
+        final_results['financials_status'] = 'pending'
+    else:
+        progress('financials', 75)
+        final_results.update(enrich_lead_financials(final_results, analysis_results))
+    
+    progress('saving', 95)
+    final_results = save_analyzed_lead(final_results)
+    if background_financials:
+        # The job result is a copy so the enrichment worker never races its serialization
+        result = dict(final_results)
+        enrichment_executor.submit(run_background_enrichment, final_results['id'], analysis_results)
+    else:
+        result = final_results
+    logger.info(f"Analysis job completed for URL: {url}")
+    return result
+
+def enrich_lead_financials(lead, analysis_results):
+    """
+    Fetch financials, estimate recurring revenue and validate investment criteria for a lead
+    Returns the fields to merge into the lead
+    """
+    updates = {'financials_status': 'complete'}
+    
+    # Add financial analysis if company name is available
+    if lead.get('company_name'):
+        try:
+            logger.debug(f"Getting financial data for {lead['company_name']}")
+            company_financials = financial_api.get_company_financials(lead['company_name'])
+            if company_financials:
+                logger.debug(f"Financial data found: {company_financials}")
+                
+                # Estimate recurring revenue
+                recurring_revenue = financial_api.estimate_recurring_revenue(lead, company_financials)
+                if recurring_revenue:
+                    logger.debug(f"Estimated recurring revenue: {recurring_revenue}%")
+                    company_financials['recurring_revenue_percentage'] = recurring_revenue
+                
+                updates['financials'] = company_financials
+                
+                # Financial-model fit score (memoized, so re-analyses of a company hit the cache)
+                updates['investment_fit'] = financial_api.analyze_investment_fit(lead, company_financials)
+                if company_financials.get('timed_out_sources'):
+                    # Some sources ran out of time: keep what arrived and flag the lead as partial
+                    updates['financials_status'] = 'partial'
+                logger.info(f"Financial data added for {lead['company_name']}")
+            else:
+                logger.warning(f"No financial data found for {lead['company_name']}")
+        except Exception as e:
+            logger.error(f"Error adding financial data: {str(e)}", exc_info=True)
+    
+    # Add investment criteria match
+    try:
+        logger.debug("Calculating investment criteria match")
+        investment_match = investment_validator.validate(
+            analysis_results, 
+            lead.get('sales_insights', {}),
+            updates.get('financials', lead.get('financials', {})),
+            lead.get('business_details', {}),
+            lead.get('industry_details', {})
+        )
+        logger.debug(f"Investment match results: {investment_match}")
+        updates['investment_match'] = investment_match
+        logger.info("Investment criteria match added to results")
+    except Exception as e:
+        logger.error(f"Error adding investment match: {str(e)}", exc_info=True)
+    
+    return updates
+
+def run_background_enrichment(lead_id, analysis_results):
+    """Enrich a stored lead in the worker pool and patch it in place"""
+    lead = lead_store.get(lead_id)
+    if lead is None:
+        return
+    try:
+        updates = enrich_lead_financials(lead, analysis_results)
+    except Exception as e:
+        logger.error(f"Background enrichment failed for {lead_id}: {str(e)}", exc_info=True)
+        updates = {'financials_status': 'failed'}
+    # A single update keeps readers from seeing a half-patched lead
+    lead_store.update(lead_id, updates)
+    logger.info(f"Background enrichment finished for {lead_id}")
+
 def extract_company_name(url):
     """Extract company name from URL"""
     # Remove protocol and www
@@ -632,97 +1003,40 @@ def extract_company_name(url):
         return parts[-2].capitalize()
     return domain.capitalize()
 
-def filter_lead_data(lead, field_selection):
-    """Filter lead data based on field selection"""
-    filtered_lead = {}
-    
-    # Company information
-    if any(field_selection.get('company', {}).values()):
-        filtered_lead['company'] = {}
-        if field_selection.get('company', {}).get('name'):
-            filtered_lead['company']['name'] = lead.get('company_name', '')
-        if field_selection.get('company', {}).get('website'):
-            filtered_lead['company']['website'] = lead.get('url', '')
-        if field_selection.get('company', {}).get('size'):
-            filtered_lead['company']['size'] = lead.get('company_size_indicator', '')
-    
-    # Contact information
-    if any(field_selection.get('contact', {}).values()) and lead.get('sales_insights', {}).get('primary_contact'):
-        filtered_lead['contact'] = {}
-        contact = lead.get('sales_insights', {}).get('primary_contact', {})
-        if field_selection.get('contact', {}).get('name'):
-            filtered_lead['contact']['name'] = contact.get('name', '')
-        if field_selection.get('contact', {}).get('title'):
-            filtered_lead['contact']['title'] = contact.get('title', '')
-        if field_selection.get('contact', {}).get('email'):
-            filtered_lead['contact']['email'] = contact.get('email', '')
-        if field_selection.get('contact', {}).get('phone'):
-            filtered_lead['contact']['phone'] = contact.get('phone', '')
-    
-    # Assessment data
-    if any(field_selection.get('assessment', {}).values()):
-        filtered_lead['assessment'] = {}
-        if field_selection.get('assessment', {}).get('aiScore'):
-            filtered_lead['assessment']['aiReadinessScore'] = lead.get('ai_readiness_score', 0)
-        if field_selection.get('assessment', {}).get('leadScore'):
-            filtered_lead['assessment']['leadScore'] = lead.get('sales_insights', {}).get('lead_score', 0)
-        if field_selection.get('assessment', {}).get('leadTier'):
-            filtered_lead['assessment']['leadTier'] = lead.get('sales_insights', {}).get('lead_tier', '')
-        if field_selection.get('assessment', {}).get('painPoints'):
-            filtered_lead['assessment']['painPoints'] = lead.get('sales_insights', {}).get('pain_points', [])
-    
-    # Verification data
-    if any(field_selection.get('verification', {}).values()) and lead.get('verification'):
-        filtered_lead['verification'] = {}
-        verification = lead.get('verification', {})
-        if field_selection.get('verification', {}).get('status'):
-            filtered_lead['verification']['status'] = verification.get('status', '')
-        if field_selection.get('verification', {}).get('date'):
-            filtered_lead['verification']['date'] = verification.get('date', '')
-        if field_selection.get('verification', {}).get('notes'):
-            filtered_lead['verification']['notes'] = verification.get('notes', '')
-    
-    return filtered_lead
+def parse_lead_filters(args):
+    """Build lead store filters from request query parameters"""
+    filters = {}
+    for key in ['lead_tier', 'verification_status', 'crm_status', 'added_after', 'added_before']:
+        if args.get(key):
+            filters[key] = args[key]
+    for key in ['min_lead_score', 'max_lead_score', 'min_ai_score']:
+        value = args.get(key, type=float)
+        if value is not None:
+            filters[key] = value
+    return filters
+
+def export_response(chunks, filename, mimetype, compression=None):
+    """Stream export chunks as a file download, optionally gzip or zstd compressed"""
+    if compression:
+        if compression not in COMPRESSION_SUFFIXES:
+            return jsonify({"error": f"Unsupported compression: {compression}"}), 400
+        try:
+            chunks = compress_chunks(chunks, compression)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        filename += COMPRESSION_SUFFIXES[compression]
+        mimetype = 'application/gzip' if compression == 'gzip' else 'application/zstd'
+    
+    return Response(chunks, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
 
 def generate_csv_export(leads):
     """Generate CSV export for email attachment"""
-    # Create a string buffer to write CSV data
-    csv_buffer = io.StringIO()
-    writer = csv.writer(csv_buffer)
-    
-    # Write headers
-    writer.writerow([
-        'Company Name', 
-        'Website', 
-        'Lead Score', 
-        'Lead Tier',
-        'AI Readiness Score',
-        'Company Size',
-        'Contact Name',
-        'Contact Title',
-        'Verification Status'
-    ])
-    
-    # Write data rows
-    for lead in leads:
-        writer.writerow([
-            lead.get('company_name', ''),
-            lead.get('url', ''),
-            lead.get('sales_insights', {}).get('lead_score', ''),
-            lead.get('sales_insights', {}).get('lead_tier', ''),
-            lead.get('ai_readiness_score', ''),
-            lead.get('company_size_indicator', ''),
-            lead.get('sales_insights', {}).get('primary_contact', {}).get('name', ''),
-            lead.get('sales_insights', {}).get('primary_contact', {}).get('title', ''),
-            lead.get('verification', {}).get('status', 'Pending')
-        ])
-    
-    csv_buffer.seek(0)
-    return csv_buffer.getvalue()
+    return ''.join(iter_csv(leads, EMAIL_CSV_HEADERS, email_csv_row))
 
 def generate_json_export(leads):
     """Generate JSON export for email attachment"""
-    return json.dumps(leads, indent=2)
+    return b''.join(iter_json(leads)).decode('utf-8')
 
 # Mock email manager class - would be in separate module
 # Configure email manager with SMTP settings from environment variables
@@ -2,6 +2,7 @@ from bs4 import BeautifulSoup
 import re
 from nltk.tokenize import word_tokenize
 from utils.helpers import clean_text
+from .revenue_estimator import SUBSCRIPTION_TERMS
 
 class ContentAnalyzer:
     def __init__(self):
@@ -131,6 +132,7 @@ class ContentAnalyzer:
             'contact_info': {},
             'growth_indicators': [],
             'company_size_indicator': 'Unknown',
+            'subscription_indicators': {},
             'base_url': base_url
         }
         
@@ -162,6 +164,12 @@ class ContentAnalyzer:
             if phrase in combined_text:
                 results['growth_indicators'].append(phrase)
         
+        # Count subscription business model terms (used for recurring revenue estimates)
+        for term in SUBSCRIPTION_TERMS:
+            count = combined_text.count(term)
+            if count > 0:
+                results['subscription_indicators'][term] = count
+        
         # Estimate company size
         if any(term in combined_text for term in ['fortune 500', 'enterprise', 'global company']):
             results['company_size_indicator'] = 'Large Enterprise'
@@ -0,0 +1,341 @@
+"""
+Compiled investment criteria engine.
+
+Caprae Capital's financial thresholds ($5-50M revenue, $1-5M cash flow, 15%
+EBITDA margin, 50% recurring revenue, 3+ profitable years, low CapEx) are
+declared once as a rule set and evaluated by a single engine shared by
+InvestmentCriteriaValidator, YahooFinanceHandler and FinancialAnalyzer.
+Rules are compiled against a criteria profile into column-wise numpy
+operations, so one company and a whole lead book run through the same code.
+"""
+
+import json
+import logging
+import threading
+import numpy as np
+
+from utils.storage import default_path
+
+logger = logging.getLogger(__name__)
+
+# Resolved from the repository root so loading does not depend on the working directory
+DEFAULT_PROFILES_PATH = default_path('CRITERIA_PROFILES_PATH', 'config', 'criteria_profiles.json')
+
+# Default investment criteria thresholds
+DEFAULT_CRITERIA = {
+    'revenue': {
+        'min': 5000000,  # $5 million
+        'max': 50000000  # $50 million
+    },
+    'cash_flow': {
+        'min': 1000000,  # $1 million
+        'max': 5000000   # $5 million
+    },
+    'ebitda_margin': {
+        'min': 15        # 15%
+    },
+    'recurring_revenue': {
+        'min': 50        # 50%
+    },
+    'profitability_years': {
+        'min': 3         # 3+ years
+    },
+    'market_size': {
+        'min': 1000000000  # $1 billion
+    }
+}
+
+# Declarative financial rule set (100 points in total)
+#   band:     full points inside [min, max], half points scaled by distance outside
+#   minimum:  full points at or above min, scaled linearly below
+#   category: points per level; met levels may use their own label
+FINANCIAL_RULES = [
+    {
+        'field': 'revenue',
+        'type': 'band',
+        'criterion': 'revenue',
+        'points': 20,
+        'label': "Revenue in target range ({range})",
+        'data_label': "Annual revenue data"
+    },
+    {
+        'field': 'cash_flow',
+        'type': 'band',
+        'criterion': 'cash_flow',
+        'points': 20,
+        'label': "Cash flow in target range ({range})",
+        'data_label': "Free cash flow data"
+    },
+    {
+        'field': 'profit_years',
+        'type': 'minimum',
+        'criterion': 'profitability_years',
+        'points': 15,
+        'label': "{min:g}+ years of profitability",
+        'data_label': "Profitability history"
+    },
+    {
+        'field': 'ebitda_margin',
+        'type': 'minimum',
+        'criterion': 'ebitda_margin',
+        'points': 20,
+        'label': "EBITDA margin >{min:g}%",
+        'data_label': "EBITDA margin data"
+    },
+    {
+        'field': 'capex',
+        'type': 'category',
+        'levels': {'low': 15, 'moderate': 8},
+        'points': 15,
+        'label': "Low capital expenditure requirements",
+        'level_labels': {'moderate': "Moderate capital expenditure requirements"},
+        'data_label': "Capital expenditure data"
+    },
+    {
+        'field': 'recurring_revenue_pct',
+        'type': 'minimum',
+        'criterion': 'recurring_revenue',
+        'points': 10,
+        'label': "Strong recurring revenue component (>{min:g}%)",
+        'data_label': "Recurring revenue percentage"
+    }
+]
+
+
+def match_tier(score):
+    """Maps an overall match score to a match tier"""
+    if score >= 80:
+        return "Strong Match"
+    elif score >= 60:
+        return "Potential Match"
+    elif score >= 40:
+        return "Partial Match"
+    return "Weak Match"
+
+
+def merge_criteria(base, overrides):
+    """Returns a copy of base criteria with per-criterion overrides applied"""
+    merged = {name: dict(bounds) for name, bounds in base.items()}
+    for name, bounds in overrides.items():
+        merged.setdefault(name, {}).update(bounds)
+    return merged
+
+
+def load_criteria_profiles(path=DEFAULT_PROFILES_PATH):
+    """
+    Loads named criteria profiles (e.g. per-fund revenue or EBITDA bands).
+    Each profile is merged over the defaults; 'default' is always present.
+    """
+    profiles = {'default': DEFAULT_CRITERIA}
+    try:
+        with open(path, 'r') as profiles_file:
+            loaded = json.load(profiles_file)
+        for name, overrides in loaded.items():
+            profiles[name] = merge_criteria(DEFAULT_CRITERIA, overrides)
+    except FileNotFoundError:
+        logger.warning(f"Criteria profiles file not found at {path}, using defaults")
+    except (json.JSONDecodeError, AttributeError) as e:
+        logger.error(f"Invalid criteria profiles file {path}: {str(e)}")
+    return profiles
+
+
+def record_from_financials(financials):
+    """
+    Maps a financials/metrics dict (Yahoo handler or yfinance analyzer shape)
+    onto the engine's input fields
+    """
+    capex = financials.get('capex_requirements')
+    capex_ratio = financials.get('capex_to_revenue')
+    if capex is None and capex_ratio is not None:
+        if capex_ratio < 5:
+            capex = 'low'
+        elif capex_ratio < 15:
+            capex = 'moderate'
+        else:
+            capex = 'high'
+
+    return {
+        'revenue': financials.get('annual_revenue', financials.get('estimated_revenue')),
+        'cash_flow': financials.get('free_cash_flow', financials.get('estimated_annual_cash_flow')),
+        'profit_years': financials.get('profitability_years'),
+        'ebitda_margin': financials.get('ebitda_margin'),
+        'capex': capex,
+        'recurring_revenue_pct': financials.get('recurring_revenue_percentage')
+    }
+
+
+def format_amount(amount):
+    """Formats a dollar amount for criteria labels (e.g. $1B, $5M)"""
+    if amount >= 1e9:
+        return f"${amount / 1e9:g}B"
+    if amount >= 1e6:
+        return f"${amount / 1e6:g}M"
+    return f"${amount:,.0f}"
+
+
+def format_range(bounds):
+    """Formats a min/max dollar band for criteria labels (e.g. $5-50M)"""
+    if 1e6 <= bounds['max'] < 1e9:
+        return f"${bounds['min'] / 1e6:g}-{bounds['max'] / 1e6:g}M"
+    return f"{format_amount(bounds['min'])}-{format_amount(bounds['max'])}"
+
+
+class CriteriaEngine:
+    """Evaluates a declarative financial rule set compiled against a criteria profile"""
+
+    def __init__(self, criteria=None, rules=FINANCIAL_RULES):
+        """
+        Compile the rule set
+
+        Args:
+            criteria (dict): Criteria profile providing the thresholds
+            rules (list): Declarative rule definitions
+        """
+        self.criteria = criteria or DEFAULT_CRITERIA
+        self.rules = [self._compile_rule(rule) for rule in rules]
+        self.max_score = sum(rule['points'] for rule in self.rules)
+
+    def _compile_rule(self, rule):
+        """Resolves thresholds and label text for one rule"""
+        compiled = dict(rule)
+        bounds = self.criteria.get(rule.get('criterion'), {})
+        compiled['min'] = bounds.get('min')
+        compiled['max'] = bounds.get('max')
+
+        if rule['type'] == 'band':
+            compiled['label'] = rule['label'].format(range=format_range(bounds))
+        elif rule['type'] == 'minimum':
+            compiled['label'] = rule['label'].format(min=bounds['min'])
+        compiled['level_labels'] = {
+            level: rule.get('level_labels', {}).get(level, compiled['label'])
+            for level in rule.get('levels', {})
+        }
+        return compiled
+
+    def _column(self, records, rule):
+        """Extracts one input column; numeric zeros and missing values become NaN"""
+        field = rule['field']
+        raw = [record.get(field) if isinstance(record, dict) else getattr(record, field, None)
+               for record in records]
+
+        if rule['type'] == 'category':
+            return np.array(raw, dtype=object)
+
+        values = np.empty(len(raw), dtype=float)
+        for i, value in enumerate(raw):
+            try:
+                values[i] = float(value) if value else np.nan
+            except (TypeError, ValueError):
+                values[i] = np.nan
+        return values
+
+    def evaluate_many(self, records):
+        """
+        Evaluates the rule set over many companies at once
+
+        Args:
+            records (list): Dicts or named tuples with the rule input fields
+
+        Returns:
+            dict: 'score' (0-100) and 'points' arrays, plus per-rule 'rule_points',
+                  'met' and 'present' arrays keyed by input field
+        """
+        count = len(records)
+        total = np.zeros(count, dtype=float)
+        rule_points = {}
+        met = {}
+        present = {}
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for rule in self.rules:
+                values = self._column(records, rule)
+
+                if rule['type'] == 'category':
+                    points = np.array([rule['levels'].get(v, 0) for v in values], dtype=float)
+                    rule_met = np.array([v in rule['levels'] for v in values], dtype=bool)
+                    rule_present = np.array([v is not None for v in values], dtype=bool)
+                else:
+                    rule_present = ~np.isnan(values)
+                    full = rule['points']
+                    if rule['type'] == 'band':
+                        lo, hi = rule['min'], rule['max']
+                        rule_met = (values >= lo) & (values <= hi)
+                        scaled = np.where(values < lo, (full / 2) * values / lo, (full / 2) * hi / values)
+                    else:
+                        rule_met = values >= rule['min']
+                        scaled = full * values / rule['min']
+                    points = np.where(rule_present, np.where(rule_met, full, scaled), 0)
+
+                total += points
+                rule_points[rule['field']] = points
+                met[rule['field']] = rule_met
+                present[rule['field']] = rule_present
+
+        return {
+            'points': total,
+            'score': total / self.max_score * 100 if self.max_score else np.zeros(count),
+            'rule_points': rule_points,
+            'met': met,
+            'present': present
+        }
+
+    def evaluate(self, record):
+        """
+        Evaluates the rule set for one company
+
+        Returns:
+            dict: score, points, max_score, criteria_met, criteria_missed,
+                  missing_data (labels of absent inputs) and input details
+        """
+        evaluation = self.evaluate_many([record])
+        criteria_met = []
+        criteria_missed = []
+        missing_data = []
+        details = {}
+
+        for rule in self.rules:
+            field = rule['field']
+            value = record.get(field) if isinstance(record, dict) else getattr(record, field, None)
+            details[field] = value
+
+            if evaluation['met'][field][0]:
+                criteria_met.append(rule['level_labels'].get(value, rule['label']))
+            else:
+                criteria_missed.append(rule['label'])
+            if not evaluation['present'][field][0]:
+                missing_data.append(rule['data_label'])
+
+        return {
+            'score': float(evaluation['score'][0]),
+            'points': float(evaluation['points'][0]),
+            'max_score': self.max_score,
+            'criteria_met': criteria_met,
+            'criteria_missed': criteria_missed,
+            'missing_data': missing_data,
+            'details': details
+        }
+
+
+_engine_cache = {}
+_engine_lock = threading.Lock()
+_default_profiles = None
+
+
+def get_criteria_engine(criteria=None):
+    """
+    Returns a compiled engine for a criteria profile, compiling each distinct
+    profile only once. Defaults to the 'default' profile from the config file.
+    """
+    global _default_profiles
+    with _engine_lock:
+        if criteria is None:
+            if _default_profiles is None:
+                _default_profiles = load_criteria_profiles()
+            criteria = _default_profiles['default']
+
+        key = json.dumps(criteria, sort_keys=True)
+        engine = _engine_cache.get(key)
+        if engine is None:
+            engine = CriteriaEngine(criteria)
+            _engine_cache[key] = engine
+        return engine
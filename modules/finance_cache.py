@@ -0,0 +1,227 @@
+"""
+Persistent TTL cache for finance lookups.
+
+Ticker resolution, financial statements, quotes and company profiles are
+stored in a small SQLite database so repeat analyses of a known company make
+no finance calls. Each namespace has its own time-to-live and LRU size bound;
+lookups that found nothing (e.g. "no ticker for this name") are cached as
+negative entries with a shorter TTL.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from utils.storage import default_path, json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = default_path('FINANCE_CACHE_PATH', 'data', 'finance_cache.sqlite3')
+
+# Time-to-live per namespace, in seconds
+DEFAULT_TTLS = {
+    'ticker': 30 * 24 * 3600,      # name -> ticker mappings rarely change
+    'statements': 7 * 24 * 3600,   # statements change quarterly
+    'quotes': 15 * 60,             # prices and market cap
+    'profiles': 7 * 24 * 3600      # sector, industry, employees
+}
+NEGATIVE_TTL = 6 * 3600
+
+# Maximum entries kept per namespace before least recently used entries are evicted
+DEFAULT_MAX_ENTRIES = 10000
+
+# Buffered LRU access times are written once this many are pending (or on eviction)
+ACCESS_FLUSH_SIZE = 500
+
+# Sentinel distinguishing "cached as not found" from a cache miss
+MISSING = object()
+
+
+class FinanceCache:
+    """SQLite-backed key/value cache with per-namespace TTLs and LRU bounds"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 negative_ttl=NEGATIVE_TTL):
+        """
+        Initialize the cache
+
+        Args:
+            path (str): SQLite database file, ':memory:' for a process-local cache
+            ttls (dict): Namespace -> TTL in seconds, merged over DEFAULT_TTLS
+            max_entries (int): LRU bound per namespace
+            negative_ttl (int): TTL in seconds for "not found" entries
+        """
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._shared_conn = None
+        # (namespace, key) -> last access time, not yet written to accessed_at
+        self._accessed = {}
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_db()
+
+    def _connect(self):
+        """Returns this thread's connection (a single shared one for in-memory caches)"""
+        if self.path == ':memory:':
+            if self._shared_conn is None:
+                self._shared_conn = sqlite3.connect(':memory:', check_same_thread=False)
+            return self._shared_conn
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT,
+                    negative INTEGER NOT NULL DEFAULT 0,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at)')
+            conn.commit()
+
+    def get(self, namespace, key):
+        """
+        Look up a cached value
+
+        Hits only record their access time in memory; the LRU column is
+        updated in batches, so reads never write to the database.
+
+        Returns:
+            The cached value, MISSING for a cached "not found" entry, or None on a miss
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    'SELECT value, negative, expires_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                    (namespace, key)
+                ).fetchone()
+                if row is None or row[2] <= now:
+                    self.misses += 1
+                    return None
+                self._accessed[(namespace, key)] = now
+                if len(self._accessed) >= ACCESS_FLUSH_SIZE:
+                    self._flush_accessed(conn)
+                    conn.commit()
+                self.hits += 1
+            return MISSING if row[1] else json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Finance cache read failed for {namespace}/{key}: {str(e)}")
+            return None
+
+    def set(self, namespace, key, value, ttl=None):
+        """Store a value; None is stored as a negative ("not found") entry"""
+        negative = value is None
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.ttls.get(namespace, DEFAULT_TTLS['statements'])
+        now = time.time()
+        try:
+            payload = None if negative else json.dumps(value, default=json_default)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)',
+                    (namespace, key, payload, int(negative), now + ttl, now)
+                )
+                self._accessed.pop((namespace, key), None)
+                self._writes += 1
+                # Enforce the LRU bound periodically rather than on every write
+                if self._writes % 100 == 0:
+                    self._evict(conn, namespace)
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Finance cache write failed for {namespace}/{key}: {str(e)}")
+
+    def _flush_accessed(self, conn):
+        """Write buffered access times to the LRU column; caller holds the lock and commits"""
+        if not self._accessed:
+            return
+        pending, self._accessed = self._accessed, {}
+        conn.executemany(
+            'UPDATE cache_entries SET accessed_at = MAX(accessed_at, ?) WHERE namespace = ? AND key = ?',
+            [(accessed_at, namespace, key) for (namespace, key), accessed_at in pending.items()]
+        )
+
+    def _evict(self, conn, namespace):
+        """Drop expired entries and the least recently used entries beyond the bound"""
+        self._flush_accessed(conn)
+        conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+        conn.execute('''
+            DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries WHERE namespace = ?
+                ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (namespace, namespace, self.max_entries))
+
+    def get_or_fetch(self, namespace, key, fetch, *args, cache_empty=False):
+        """
+        Return a cached value or call fetch(*args) and cache its result
+
+        Empty results ({} or None) are only cached, as negative entries, when
+        cache_empty is set, so transient fetch failures are retried next time.
+        """
+        cached = self.get(namespace, key)
+        if cached is MISSING:
+            return None
+        if cached is not None:
+            return cached
+
+        value = fetch(*args)
+        if value:
+            self.set(namespace, key, value)
+        elif cache_empty:
+            self.set(namespace, key, None)
+        return value
+
+    def invalidate(self, namespace, key=None):
+        """Remove one entry, or a whole namespace when key is None"""
+        with self._lock:
+            conn = self._connect()
+            if key is None:
+                conn.execute('DELETE FROM cache_entries WHERE namespace = ?', (namespace,))
+            else:
+                conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (namespace, key))
+            conn.commit()
+
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_finance_cache():
+    """Returns the process-wide finance cache shared by the finance backends"""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = FinanceCache()
+        return _cache_instance
+
+
+def normalize_company_key(company_name):
+    """Cache key for a company name (case and whitespace insensitive)"""
+    return ' '.join(str(company_name).lower().split())
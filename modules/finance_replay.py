@@ -0,0 +1,300 @@
+"""
+Record/replay of finance HTTP traffic and a local mock finance server.
+
+Benchmarking the financial pipeline against live Yahoo endpoints is slow,
+rate-limited and non-deterministic. This module provides:
+
+  * RecordingSession - a requests.Session that saves every response as a
+    JSON fixture file
+  * ReplaySession    - serves fixtures without touching the network
+  * MockServerSession - rewrites Yahoo hosts to a local mock server
+  * MockFinanceServer - an HTTP server that serves the recorded fixtures
+    with configurable latency, jitter and error injection
+
+YahooFinanceHandler and FinancialAnalyzer obtain their session from
+create_finance_session(), which honours FINANCE_HTTP_MODE (live, record,
+replay or mock), FINANCE_FIXTURE_DIR and FINANCE_MOCK_URL.
+
+All sessions are requests.Session subclasses. The pinned yfinance 0.2.x uses
+any requests session; newer yfinance releases reject session objects other
+than requests.Session or curl_cffi sessions, which these still satisfy.
+
+Usage:
+    FINANCE_HTTP_MODE=record FINANCE_FIXTURE_DIR=fixtures/finance python app.py
+    python -m modules.finance_replay --fixtures fixtures/finance --port 8765 --latency 0.2 --error-rate 0.05
+    FINANCE_HTTP_MODE=mock FINANCE_MOCK_URL=http://127.0.0.1:8765 python app.py
+"""
+
+import os
+import json
+import time
+import base64
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from utils.storage import default_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURE_DIR = default_path('FINANCE_FIXTURE_DIR', 'fixtures', 'finance')
+
+# Query parameters that change on every call (time windows, session tokens)
+# and are therefore left out of fixture keys
+VOLATILE_PARAMS = {'period1', 'period2', 'crumb', '_'}
+
+
+def fixture_key(method, url, params=None):
+    """Host-independent fixture key for a request"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    if params:
+        items = params.items() if isinstance(params, dict) else params
+        query.extend((str(k), str(v)) for k, v in items if v is not None)
+    query = sorted((k, v) for k, v in query if k not in VOLATILE_PARAMS)
+    canonical = f"{method.upper()} {parts.path}?{urlencode(query)}"
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest(), canonical
+
+
+class FixtureStore:
+    """Directory of recorded responses, one JSON file per request key"""
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR):
+        self.fixture_dir = fixture_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.fixture_dir, f'{key}.json')
+
+    def load(self, key):
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key, canonical, response):
+        """Save a requests.Response under key"""
+        try:
+            body = response.content.decode('utf-8')
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            body = base64.b64encode(response.content).decode('ascii')
+            encoding = 'base64'
+
+        fixture = {
+            'request': canonical,
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', ''),
+            'encoding': encoding,
+            'body': body
+        }
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(fixture, f)
+        os.replace(tmp_path, self._path(key))
+
+    @staticmethod
+    def body_bytes(fixture):
+        if fixture.get('encoding') == 'base64':
+            return base64.b64decode(fixture['body'])
+        return fixture['body'].encode('utf-8')
+
+
+class RecordingSession(requests.Session):
+    """Session that performs real requests and records every response as a fixture"""
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR):
+        super().__init__()
+        self.fixtures = FixtureStore(fixture_dir)
+
+    def request(self, method, url, params=None, **kwargs):
+        response = super().request(method, url, params=params, **kwargs)
+        key, canonical = fixture_key(method, url, params)
+        try:
+            self.fixtures.save(key, canonical, response)
+        except OSError as e:
+            logger.warning(f"Failed to record fixture for {canonical}: {str(e)}")
+        return response
+
+
+class ReplaySession(requests.Session):
+    """Session that answers requests from recorded fixtures and never uses the network"""
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR):
+        super().__init__()
+        self.fixtures = FixtureStore(fixture_dir)
+
+    def request(self, method, url, params=None, **kwargs):
+        key, canonical = fixture_key(method, url, params)
+        fixture = self.fixtures.load(key)
+        if fixture is None:
+            raise requests.ConnectionError(f"No recorded fixture for {canonical}")
+
+        prepared = requests.Request(method, url, params=params).prepare()
+        response = requests.Response()
+        response.status_code = fixture['status']
+        response._content = FixtureStore.body_bytes(fixture)
+        response.headers = CaseInsensitiveDict({'Content-Type': fixture.get('content_type', '')})
+        response.encoding = 'utf-8'
+        response.url = prepared.url
+        response.request = prepared
+        return response
+
+
+class MockServerSession(requests.Session):
+    """Session that sends every request to a local mock server, keeping path and query"""
+
+    def __init__(self, mock_url):
+        super().__init__()
+        self.mock_url = mock_url.rstrip('/')
+
+    def request(self, method, url, **kwargs):
+        parts = urlsplit(url)
+        local_url = f"{self.mock_url}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+        return super().request(method, local_url, **kwargs)
+
+
+def create_finance_session(pool_size=10):
+    """
+    Build the HTTP session used by the finance backends
+
+    FINANCE_HTTP_MODE selects live (default), record, replay or mock traffic.
+    """
+    mode = os.environ.get('FINANCE_HTTP_MODE', 'live').lower()
+    if mode == 'record':
+        session = RecordingSession(DEFAULT_FIXTURE_DIR)
+    elif mode == 'replay':
+        session = ReplaySession(DEFAULT_FIXTURE_DIR)
+    elif mode == 'mock':
+        session = MockServerSession(os.environ.get('FINANCE_MOCK_URL', 'http://127.0.0.1:8765'))
+    else:
+        session = requests.Session()
+
+    if mode != 'live':
+        logger.info(f"Finance HTTP traffic in {mode} mode")
+
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class MockFinanceServer:
+    """Serves recorded fixtures over HTTP with injected latency and errors"""
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR, host='127.0.0.1', port=8765,
+                 latency=0.0, jitter=0.0, error_rate=0.0, seed=42):
+        """
+        Initialize the server
+
+        Args:
+            fixture_dir (str): Directory of recorded fixtures
+            latency (float): Base delay per response in seconds
+            jitter (float): Maximum extra random delay in seconds
+            error_rate (float): Fraction of requests answered with a 500 or 429
+            seed (int): Seed for the latency and error draws, for repeatable runs
+        """
+        self.fixtures = FixtureStore(fixture_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests_served = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self):
+        """Returns (delay, error status or None) for one request"""
+        with self._rng_lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            error = None
+            if self._rng.random() < self.error_rate:
+                error = self._rng.choice([500, 429])
+            self.requests_served += 1
+        return delay, error
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                delay, error = server._draw()
+                if delay:
+                    time.sleep(delay)
+
+                if error:
+                    self._send(error, b'{"error": "injected failure"}', 'application/json')
+                    return
+
+                key, canonical = fixture_key('GET', self.path)
+                fixture = server.fixtures.load(key)
+                if fixture is None:
+                    logger.debug(f"Mock finance server has no fixture for {canonical}")
+                    self._send(404, b'{"error": "no fixture"}', 'application/json')
+                    return
+                self._send(fixture['status'], FixtureStore.body_bytes(fixture),
+                           fixture.get('content_type') or 'text/plain')
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self):
+        """Serve in a background thread (for tests and benchmarks)"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded finance fixtures")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURE_DIR, help="Directory of recorded fixtures")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Base delay per response in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Maximum extra random delay in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    server = MockFinanceServer(args.fixtures, args.host, args.port, args.latency,
+                               args.jitter, args.error_rate, args.seed)
+    logger.info(f"Mock finance server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,46 +4,146 @@ import numpy as np
 from datetime import datetime, timedelta
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
+import os
 import logging
+import threading
+from collections import OrderedDict
+from .price_store import get_price_store
+from .finance_replay import create_finance_session
+from .revenue_estimator import (build_feature_table, estimate_recurring_revenue_batch,
+                                count_subscription_hits, company_keyword_text)
+from .model_store import DEFAULT_MODEL_DIR, load_model_artifacts
+from .criteria_engine import get_criteria_engine, record_from_financials, match_tier
+from .financial_provider import TickerLookupError, company_names_match
 
 logger = logging.getLogger(__name__)
 
 class FinancialAnalyzer:
     """Analyzes financial data for companies using Yahoo Finance API and ML models"""
     
-    def __init__(self):
+    # Financial inputs used by the investment fit models
+    FIT_FEATURES = ['annual_revenue', 'free_cash_flow', 'ebitda_margin', 'capex_to_revenue',
+                    'recurring_revenue_percentage', 'revenue_growth', 'volatility']
+    # Criteria inputs perturbed for the fit uncertainty estimate
+    UNCERTAIN_FIELDS = ['revenue', 'cash_flow', 'ebitda_margin', 'recurring_revenue_pct']
+    
+    def __init__(self, session=None):
         """Initialize the financial analyzer with ML models"""
         self.rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.gb_model = GradientBoostingRegressor(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
         self.trained = False
+        self.model_version = None
+        
+        # Memoized investment fit results keyed on the financial feature vector
+        self.fit_cache_size = 4096
+        self.fit_cache_hits = 0
+        self._fit_cache = OrderedDict()
+        self._fit_cache_lock = threading.Lock()
+        
+        # HTTP session handed to yfinance; None keeps yfinance's own session unless
+        # finance traffic is being recorded, replayed or sent to a mock server
+        if session is None and os.environ.get('FINANCE_HTTP_MODE', 'live').lower() != 'live':
+            session = create_finance_session()
+        self.session = session
+        
+        # Local daily close series, topped up at most once per refresh interval (seconds)
+        self.price_store = get_price_store()
+        self.price_refresh_interval = 24 * 3600
+        
+        # Seeded perturbation settings for the fit uncertainty estimate
+        self.uncertainty_seed = 42
+        self.uncertainty_samples = 32
+    
+    def load_models(self, model_dir=DEFAULT_MODEL_DIR, version=None):
+        """
+        Loads the trained investment fit regressors from the model store
+        Returns True if the models are available
+        """
+        names = ['fit_rf', 'fit_gb', 'fit_scaler']
+        version, models = load_model_artifacts(names, model_dir, version)
+        if not all(name in models for name in names):
+            self.trained = False
+            return False
         
-    def find_ticker(self, company_name):
+        self.rf_model = models['fit_rf']
+        self.gb_model = models['fit_gb']
+        self.scaler = models['fit_scaler']
+        self.trained = True
+        self.model_version = version
+        self.clear_fit_cache()
+        logger.info(f"Loaded investment fit models version {version}")
+        return True
+    
+    def financial_feature_vector(self, financials):
+        """
+        Builds the numeric feature vector for the investment fit models.
+        Missing values are zero-filled and flagged in indicator columns.
+        """
+        values = []
+        missing = []
+        for name in self.FIT_FEATURES:
+            value = financials.get(name)
+            try:
+                value = float(value)
+                is_missing = np.isnan(value)
+            except (TypeError, ValueError):
+                is_missing = True
+            values.append(0.0 if is_missing else value)
+            missing.append(1.0 if is_missing else 0.0)
+        
+        cash_flow_growth = financials.get('cash_flow_growth')
+        values.append(1.0 if cash_flow_growth else 0.0)
+        missing.append(1.0 if cash_flow_growth is None else 0.0)
+        
+        return values + missing
+    
+    def predict_fit_scores(self, financials_list):
+        """
+        Predicts investment fit scores (0-100) for a batch of financials dicts
+        using the trained RF and GB models. Returns None if not trained.
+        """
+        if not self.trained or not financials_list:
+            return None
+        
+        matrix = self.scaler.transform(
+            np.array([self.financial_feature_vector(f) for f in financials_list], dtype=float)
+        )
+        predictions = (self.rf_model.predict(matrix) + self.gb_model.predict(matrix)) / 2
+        return np.clip(predictions, 0, 100)
+        
+    def find_ticker(self, company_name, raise_errors=False):
         """
         Attempts to find the ticker symbol for a company
-        Returns None if no ticker is found
+        
+        Only an equity search result whose listed name matches company_name is
+        accepted; returns None otherwise, and always when the installed
+        yfinance has no search API. With raise_errors, a lookup that failed
+        (network error, timeout, rate limit) raises TickerLookupError
         """
+        if not hasattr(yf, 'Search'):
+            return None
         try:
-            # First try direct search
-            tickers = yf.Tickers(company_name)
-            if tickers and hasattr(tickers, 'tickers') and len(tickers.tickers) > 0:
-                return list(tickers.tickers.keys())[0]
-            
-            # Try searching by company name
-            search_result = yf.Ticker(company_name)
-            info = search_result.info
-            if 'symbol' in info:
-                return info['symbol']
-            
+            search = yf.Search(company_name, max_results=5, news_count=0, lists_count=0,
+                               session=self.session, raise_errors=True)
+            for quote in search.quotes:
+                if quote.get('quoteType') != 'EQUITY' or not quote.get('symbol'):
+                    continue
+                if any(company_names_match(company_name, quote.get(field))
+                       for field in ('shortname', 'longname')):
+                    return quote['symbol']
             return None
         except Exception as e:
             logger.warning(f"Error finding ticker for {company_name}: {str(e)}")
+            if raise_errors:
+                raise TickerLookupError(f"yfinance ticker lookup failed for {company_name}: {str(e)}") from e
             return None
     
-    def get_company_financials(self, company_name=None, ticker=None):
+    def get_company_financials(self, company_name=None, ticker=None, raise_errors=False):
         """
         Gets financial data for a company from Yahoo Finance
-        Either company_name or ticker must be provided
+        Either company_name or ticker must be provided; with raise_errors,
+        failures propagate instead of returning None
         """
         try:
             if not ticker and not company_name:
@@ -57,280 +157,315 @@ class FinancialAnalyzer:
                 return None
                 
             # Get the ticker data
-            ticker_data = yf.Ticker(ticker)
-            
-            # Get financial statements
-            income_stmt = ticker_data.income_stmt
-            balance_sheet = ticker_data.balance_sheet
-            cash_flow = ticker_data.cashflow
-            
-            # Get financial ratios and other info
-            info = ticker_data.info
-            
-            # Extract key financial metrics
-            financials = {}
+            ticker_data = yf.Ticker(ticker, session=self.session)
             
-            # Revenue and growth
-            if not income_stmt.empty and 'Total Revenue' in income_stmt.index:
-                revenues = income_stmt.loc['Total Revenue']
-                financials['annual_revenue'] = revenues.iloc[0] if not revenues.empty else None
-                
-                if len(revenues) >= 2:
-                    financials['revenue_growth'] = ((revenues.iloc[0] / revenues.iloc[1]) - 1) * 100
-                
-            # Cash flow
-            if not cash_flow.empty and 'Free Cash Flow' in cash_flow.index:
-                fcf = cash_flow.loc['Free Cash Flow']
-                financials['free_cash_flow'] = fcf.iloc[0] if not fcf.empty else None
-                
-                if len(fcf) >= 3:
-                    financials['cash_flow_growth'] = True if all(fcf.iloc[i] > fcf.iloc[i+1] for i in range(min(3, len(fcf)-1))) else False
-            
-            # EBITDA and margins
-            if not income_stmt.empty and 'EBITDA' in income_stmt.index:
-                ebitda = income_stmt.loc['EBITDA']
-                financials['ebitda'] = ebitda.iloc[0] if not ebitda.empty else None
-                
-                if financials.get('annual_revenue') and financials.get('ebitda'):
-                    financials['ebitda_margin'] = (financials['ebitda'] / financials['annual_revenue']) * 100
-            
-            # CapEx requirements
-            if not cash_flow.empty and 'Capital Expenditure' in cash_flow.index:
-                capex = cash_flow.loc['Capital Expenditure'].abs()
-                financials['capex'] = capex.iloc[0] if not capex.empty else None
-                
-                if financials.get('annual_revenue') and financials.get('capex'):
-                    financials['capex_to_revenue'] = (financials['capex'] / financials['annual_revenue']) * 100
-            
-            # Number of employees (proxy for company size)
-            if info and 'fullTimeEmployees' in info:
-                financials['employees'] = info['fullTimeEmployees']
-            
-            # Market cap
-            if info and 'marketCap' in info:
-                financials['market_cap'] = info['marketCap']
-                
-            # Industry and sector
-            if info and 'industry' in info:
-                financials['industry'] = info['industry']
-                
-            if info and 'sector' in info:
-                financials['sector'] = info['sector']
-                
-            # Get stock price history for volatility analysis
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365)
-            stock_history = ticker_data.history(start=start_date, end=end_date)
-            
-            if not stock_history.empty:
-                # Calculate volatility (standard deviation of returns)
+            # Top up the stored daily closes used for volatility analysis
+            if not self.price_store.is_fresh(ticker, '1d', self.price_refresh_interval):
+                stock_history = ticker_data.history(start=self._history_start([ticker]), end=datetime.now())
                 if 'Close' in stock_history.columns:
-                    returns = stock_history['Close'].pct_change().dropna()
-                    financials['volatility'] = returns.std() * (252 ** 0.5)  # Annualized volatility
-                
-            return financials
+                    self._store_closes(ticker, stock_history['Close'])
+                elif stock_history.empty:
+                    # No bars since the last stored one (e.g. a weekend): the series is current
+                    self.price_store.mark_checked(ticker, '1d')
+            
+            return self._assemble_financials(
+                ticker_data.income_stmt,
+                ticker_data.cashflow,
+                ticker_data.info,
+                self._stored_volatility(ticker)
+            )
             
         except Exception as e:
             logger.error(f"Error getting financial data: {str(e)}")
+            if raise_errors:
+                raise
             return None
     
-    def estimate_recurring_revenue(self, company_data, financials):
+    def download_close_prices(self, tickers):
         """
-        Uses ML model to estimate recurring revenue percentage based on 
-        industry, business model, and available financial data
+        Downloads daily closes for the stale tickers of a batch in a single request
+        and appends them to the price store, so per-ticker fetches can skip their
+        own history request
         """
+        stale = [t for t in tickers if not self.price_store.is_fresh(t, '1d', self.price_refresh_interval)]
+        if not stale:
+            return
+        
         try:
-            # Features we'd use in a real model (these would be extracted from the data)
-            features = {
-                'is_saas': 'software' in str(financials.get('industry', '')).lower(),
-                'is_subscription': self._text_contains_subscription_indicators(company_data),
-                'volatility': financials.get('volatility', 0.5),  # Default if not available
-                'ebitda_margin': financials.get('ebitda_margin', 10),  # Default if not available
-            }
-            
-            # In a real implementation, we'd use the trained ML model
-            # For now, we'll use a simple rule-based approach
-            recurring_percentage = 0
+            data = yf.download(stale, start=self._history_start(stale), group_by='ticker',
+                               auto_adjust=False, threads=True, progress=False,
+                               session=self.session)
+        except Exception as e:
+            logger.warning(f"Batched price download failed: {str(e)}")
+            return
+        
+        if data is None or data.empty:
+            return
+        
+        for ticker in stale:
+            try:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if ticker in data.columns.get_level_values(0):
+                        closes = data[ticker]['Close']
+                    else:
+                        closes = data['Close'][ticker]
+                else:
+                    closes = data['Close']
+            except KeyError:
+                continue
+            self._store_closes(ticker, closes)
+    
+    def _history_start(self, tickers):
+        """Earliest date to fetch so every ticker's stored daily series covers the past year"""
+        year_ago = datetime.now() - timedelta(days=365)
+        starts = []
+        for ticker in tickers:
+            last_stored = self.price_store.last_timestamp(ticker, '1d')
+            starts.append(max(datetime.fromtimestamp(last_stored), year_ago) if last_stored else year_ago)
+        return min(starts)
+    
+    def _store_closes(self, ticker, closes):
+        """Appends a pandas close series (DatetimeIndex) to the daily price store"""
+        timestamps = [int(ts.timestamp()) for ts in closes.index]
+        self.price_store.append(ticker, '1d', timestamps, closes.to_numpy(dtype=float))
+    
+    def _stored_volatility(self, ticker):
+        """Annualized volatility over the past year of stored daily closes"""
+        since = int((datetime.now() - timedelta(days=365)).timestamp())
+        return self.price_store.stats(ticker, '1d', since=since).get('volatility')
+    
+    def _assemble_financials(self, income_stmt, cash_flow, info, volatility=None):
+        """Builds the financials dict from yfinance statements, info and price volatility"""
+        # Extract key financial metrics
+        financials = {}
+        
+        # Revenue and growth
+        if income_stmt is not None and not income_stmt.empty and 'Total Revenue' in income_stmt.index:
+            revenues = income_stmt.loc['Total Revenue']
+            financials['annual_revenue'] = revenues.iloc[0] if not revenues.empty else None
             
-            if features['is_saas']:
-                recurring_percentage += 60
+            if len(revenues) >= 2:
+                financials['revenue_growth'] = ((revenues.iloc[0] / revenues.iloc[1]) - 1) * 100
             
-            if features['is_subscription']:
-                recurring_percentage += 25
+        # Cash flow
+        if cash_flow is not None and not cash_flow.empty and 'Free Cash Flow' in cash_flow.index:
+            fcf = cash_flow.loc['Free Cash Flow']
+            financials['free_cash_flow'] = fcf.iloc[0] if not fcf.empty else None
             
-            # Less volatile businesses tend to have more recurring revenue
-            if features['volatility'] < 0.3:
-                recurring_percentage += 15
+            if len(fcf) >= 3:
+                financials['cash_flow_growth'] = True if all(fcf.iloc[i] > fcf.iloc[i+1] for i in range(min(3, len(fcf)-1))) else False
+        
+        # EBITDA and margins
+        if income_stmt is not None and not income_stmt.empty and 'EBITDA' in income_stmt.index:
+            ebitda = income_stmt.loc['EBITDA']
+            financials['ebitda'] = ebitda.iloc[0] if not ebitda.empty else None
             
-            # Higher margins often indicate recurring revenue
-            if features['ebitda_margin'] > 20:
-                recurring_percentage += 10
+            if financials.get('annual_revenue') and financials.get('ebitda'):
+                financials['ebitda_margin'] = (financials['ebitda'] / financials['annual_revenue']) * 100
+        
+        # CapEx requirements
+        if cash_flow is not None and not cash_flow.empty and 'Capital Expenditure' in cash_flow.index:
+            capex = cash_flow.loc['Capital Expenditure'].abs()
+            financials['capex'] = capex.iloc[0] if not capex.empty else None
             
-            # Cap at 95%
-            recurring_percentage = min(95, recurring_percentage)
+            if financials.get('annual_revenue') and financials.get('capex'):
+                financials['capex_to_revenue'] = (financials['capex'] / financials['annual_revenue']) * 100
+        
+        # Number of employees (proxy for company size)
+        if info and 'fullTimeEmployees' in info:
+            financials['employees'] = info['fullTimeEmployees']
+        
+        # Market cap
+        if info and 'marketCap' in info:
+            financials['market_cap'] = info['marketCap']
             
-            return recurring_percentage
+        # Industry and sector
+        if info and 'industry' in info:
+            financials['industry'] = info['industry']
             
+        if info and 'sector' in info:
+            financials['sector'] = info['sector']
+        
+        # Annualized volatility from the stored daily closes
+        if volatility is not None:
+            financials['volatility'] = volatility
+        
+        return financials
+    
+    def estimate_recurring_revenue(self, company_data, financials):
+        """
+        Estimates recurring revenue percentage based on industry,
+        business model, and available financial data
+        """
+        try:
+            return int(self.estimate_recurring_revenue_batch([company_data], [financials])[0])
         except Exception as e:
             logger.error(f"Error estimating recurring revenue: {str(e)}")
             return None
     
+    def estimate_recurring_revenue_batch(self, companies, financials_list):
+        """
+        Estimates recurring revenue percentages for many companies at once
+        
+        Args:
+            companies (list): Lead/company dicts (used for subscription-term hits)
+            financials_list (list): Financials dicts aligned with companies
+            
+        Returns:
+            numpy.ndarray: Recurring revenue percentage per company
+        """
+        records = [
+            {**(financials or {}), 'subscription_hits': self._subscription_hits(company_data)}
+            for company_data, financials in zip(companies, financials_list)
+        ]
+        return estimate_recurring_revenue_batch(build_feature_table(records))
+    
     def predict_investment_fit(self, company_data, financials):
         """
         Uses gradient boosting model to predict how well a company fits the
-        investment criteria based on available data
+        investment criteria based on available data.
+        Scoring is deterministic, so results are memoized on the financial
+        feature vector and repeated checks for the same company hit the cache.
         """
         try:
-            # In a real implementation, we'd extract proper features and use the model
-            # For demo purposes, we'll score against the criteria directly
-            
-            score = 0
-            max_score = 0
-            
-            # Revenue criteria (5-50 million)
-            if financials.get('annual_revenue'):
-                max_score += 20
-                revenue_in_millions = financials['annual_revenue'] / 1000000
-                if 5 <= revenue_in_millions <= 50:
-                    score += 20
-                elif revenue_in_millions < 5:
-                    score += 10 * (revenue_in_millions / 5)
-                else:
-                    score += 20 * (1 - min(1, (revenue_in_millions - 50) / 50))
-            
-            # Cash flow criteria (1-5 million annual)
-            if financials.get('free_cash_flow'):
-                max_score += 20
-                cf_in_millions = financials['free_cash_flow'] / 1000000
-                if 1 <= cf_in_millions <= 5:
-                    score += 20
-                elif cf_in_millions < 1:
-                    score += 10 * cf_in_millions
-                else:
-                    score += 20 * (1 - min(1, (cf_in_millions - 5) / 5))
-            
-            # EBITDA margin (>15%)
-            if financials.get('ebitda_margin'):
-                max_score += 15
-                if financials['ebitda_margin'] >= 15:
-                    score += 15
-                else:
-                    score += 15 * (financials['ebitda_margin'] / 15)
-            
-            # Low CapEx requirements
-            if financials.get('capex_to_revenue'):
-                max_score += 15
-                if financials['capex_to_revenue'] <= 5:
-                    score += 15
-                elif financials['capex_to_revenue'] <= 10:
-                    score += 10
-                elif financials['capex_to_revenue'] <= 15:
-                    score += 5
-            
-            # Recurring revenue component
-            recurring_revenue = financials.get('recurring_revenue_percentage')
-            if recurring_revenue:
-                max_score += 15
-                if recurring_revenue >= 60:
-                    score += 15
-                elif recurring_revenue >= 40:
-                    score += 10
-                elif recurring_revenue >= 20:
-                    score += 5
-            
-            # Cash flow growth
-            if 'cash_flow_growth' in financials:
-                max_score += 15
-                if financials['cash_flow_growth']:
-                    score += 15
-            
-            # Normalize to 100%
-            if max_score > 0:
-                normalized_score = (score / max_score) * 100
-            else:
-                normalized_score = 0
-                
-            # Add some randomness to simulate ML model variance
-            normalized_score = min(100, max(0, normalized_score + np.random.normal(0, 5)))
-                
-            investment_fit = {
-                'score': normalized_score,
-                'financials_match': score / max_score if max_score > 0 else 0,
-                'criteria_met': self._get_criteria_met(financials),
-                'missing_data': self._get_missing_criteria(financials)
-            }
-            
-            return investment_fit
+            # None and NaN both mean "not reported"; dropping them up front makes
+            # sparse records score identically and share one cache key
+            financials = self._reported_financials(financials)
+            cache_key = self._fit_cache_key(financials)
+            with self._fit_cache_lock:
+                cached = self._fit_cache.get(cache_key)
+                if cached is not None:
+                    self._fit_cache.move_to_end(cache_key)
+                    self.fit_cache_hits += 1
+                    return self._copy_fit(cached)
+            
+            investment_fit = self._score_investment_fit(financials)
+            
+            with self._fit_cache_lock:
+                self._fit_cache[cache_key] = investment_fit
+                while len(self._fit_cache) > self.fit_cache_size:
+                    self._fit_cache.popitem(last=False)
+            
+            return self._copy_fit(investment_fit)
             
         except Exception as e:
             logger.error(f"Error predicting investment fit: {str(e)}")
             return {'score': 0, 'financials_match': 0, 'criteria_met': [], 'missing_data': []}
     
-    def _text_contains_subscription_indicators(self, company_data):
-        """Check if company data contains indicators of subscription-based business model"""
-        subscription_terms = ['subscription', 'recurring', 'monthly fee', 'annual fee', 
-                           'saas', 'service fee', 'retainer']
+    def _score_investment_fit(self, financials):
+        """Computes the investment fit and its uncertainty for one financials dict"""
+        # Evaluate against the shared investment criteria rule set
+        engine = get_criteria_engine()
+        record = record_from_financials(financials)
+        evaluation = engine.evaluate(record)
+        normalized_score = evaluation['score']
+        rule_score = normalized_score
         
-        # In reality, we would analyze the full text data from the website
-        # For this demo, we'll just check a sample of the data
-        sample_text = str(company_data).lower()
+        # Blend in the trained model prediction when available
+        model_scores = self.predict_fit_scores([financials])
+        if model_scores is not None:
+            normalized_score = (normalized_score + float(model_scores[0])) / 2
         
-        return any(term in sample_text for term in subscription_terms)
-    
-    def _get_criteria_met(self, financials):
-        """Returns a list of investment criteria that are met"""
-        criteria_met = []
-        
-        # Revenue criteria (5-50 million)
-        if financials.get('annual_revenue'):
-            revenue_in_millions = financials['annual_revenue'] / 1000000
-            if 5 <= revenue_in_millions <= 50:
-                criteria_met.append("Revenue in target range ($5-50M)")
+        uncertainty, score_range = self._estimate_fit_uncertainty(engine, record, normalized_score)
         
-        # Cash flow criteria (1-5 million annual)
-        if financials.get('free_cash_flow'):
-            cf_in_millions = financials['free_cash_flow'] / 1000000
-            if 1 <= cf_in_millions <= 5:
-                criteria_met.append("Cash flow in target range ($1-5M)")
+        investment_fit = {
+            'score': normalized_score,
+            'uncertainty': uncertainty,
+            'score_range': score_range,
+            'match_level': match_tier(normalized_score),
+            'financials_match': evaluation['points'] / evaluation['max_score'],
+            'criteria_met': self._get_criteria_met(financials, evaluation),
+            'criteria_missed': evaluation['criteria_missed'],
+            'missing_data': self._get_missing_criteria(financials, evaluation)
+        }
+        if model_scores is not None:
+            investment_fit['rule_score'] = rule_score
+            investment_fit['model_score'] = float(model_scores[0])
+            investment_fit['model_version'] = self.model_version
         
-        # EBITDA margin (>15%)
-        if financials.get('ebitda_margin') and financials['ebitda_margin'] >= 15:
-            criteria_met.append("EBITDA margin above 15%")
+        return investment_fit
+    
+    def _estimate_fit_uncertainty(self, engine, record, score):
+        """
+        Estimates score uncertainty by re-scoring with the reported financial
+        figures perturbed by +/-10% noise. Uses a fixed seed so the estimate is
+        reproducible. Returns (standard deviation, [5th, 95th percentile]).
+        """
+        rng = np.random.default_rng(self.uncertainty_seed)
+        numeric_keys = [key for key in self.UNCERTAIN_FIELDS
+                        if isinstance(record.get(key), (int, float)) and record.get(key)]
+        if not numeric_keys:
+            return 0.0, [score, score]
         
-        # Low CapEx requirements
-        if financials.get('capex_to_revenue') and financials['capex_to_revenue'] <= 10:
-            criteria_met.append("Low capital expenditure requirements")
+        # Score all perturbed copies in one vectorized engine pass
+        noise = rng.normal(1.0, 0.1, size=(self.uncertainty_samples, len(numeric_keys)))
+        perturbed = []
+        for row in noise:
+            sample = dict(record)
+            for key, factor in zip(numeric_keys, row):
+                sample[key] = record[key] * factor
+            perturbed.append(sample)
+        samples = engine.evaluate_many(perturbed)['score']
         
-        # Recurring revenue component
-        if financials.get('recurring_revenue_percentage') and financials['recurring_revenue_percentage'] >= 40:
-            criteria_met.append("Strong recurring revenue component")
+        # Shift the rule-score spread onto the reported score
+        samples = samples - np.mean(samples) + score
+        low, high = np.clip(np.percentile(samples, [5, 95]), 0, 100)
+        return float(np.std(samples)), [float(low), float(high)]
+    
+    @staticmethod
+    def _reported_financials(financials):
+        """Copy of a financials dict without None or NaN values"""
+        return {key: value for key, value in (financials or {}).items()
+                if value is not None and not (isinstance(value, (float, np.floating)) and np.isnan(value))}
+    
+    def _fit_cache_key(self, financials):
+        """
+        Memoization key for investment fit: the financial feature vector, rule
+        inputs and model version. Expects _reported_financials() output; NaN is
+        also mapped to None here, since nan != nan would make the key never match.
+        """
+        record = record_from_financials(financials)
+        return (tuple(self.financial_feature_vector(financials)),
+                tuple(None if isinstance(value, float) and np.isnan(value) else value
+                      for value in record.values()),
+                'cash_flow_growth' in financials,
+                self.model_version)
+    
+    def _copy_fit(self, investment_fit):
+        """Returns a copy of a cached investment fit so callers can modify it safely"""
+        return {key: list(value) if isinstance(value, list) else value
+                for key, value in investment_fit.items()}
+    
+    def clear_fit_cache(self):
+        """Drops all memoized investment fit results"""
+        with self._fit_cache_lock:
+            self._fit_cache.clear()
+    
+    def _subscription_hits(self, company_data):
+        """
+        Subscription-term hits for a company: the counts ContentAnalyzer recorded
+        for the website, or a scan of its descriptive text fields when they are unavailable
+        """
+        indicators = company_data.get('subscription_indicators')
+        if indicators is not None:
+            return sum(indicators.values())
+        return count_subscription_hits(company_keyword_text(company_data))
+    
+    def _get_criteria_met(self, financials, evaluation):
+        """Returns a list of investment criteria that are met"""
+        criteria_met = list(evaluation['criteria_met'])
         
-        # Cash flow growth
-        if financials.get('cash_flow_growth') and financials['cash_flow_growth']:
+        # Cash flow growth is reported as a trend signal alongside the criteria
+        if financials.get('cash_flow_growth'):
             criteria_met.append("Positive cash flow growth trend")
             
         return criteria_met
     
-    def _get_missing_criteria(self, financials):
+    def _get_missing_criteria(self, financials, evaluation):
         """Returns a list of investment criteria data that is missing"""
-        missing = []
-        
-        if not financials.get('annual_revenue'):
-            missing.append("Annual revenue data")
-        
-        if not financials.get('free_cash_flow'):
-            missing.append("Free cash flow data")
-        
-        if not financials.get('ebitda_margin'):
-            missing.append("EBITDA margin data")
-        
-        if not financials.get('capex_to_revenue'):
-            missing.append("Capital expenditure data")
-        
-        if not financials.get('recurring_revenue_percentage'):
-            missing.append("Recurring revenue percentage")
+        missing = list(evaluation['missing_data'])
         
         if 'cash_flow_growth' not in financials:
             missing.append("Cash flow growth trend")
             
-        return missing
\ No newline at end of file
+        return missing
@@ -1,6 +1,9 @@
 import logging
 from .yahoo_finance_handler import YahooFinanceHandler
 from .financial_analyzer import FinancialAnalyzer
+from .model_store import DEFAULT_MODEL_DIR
+from .private_registry import PrivateCompanyRegistry
+from .financial_provider import FinancialDataProvider, YahooHTTPBackend, YFinanceBackend
 
 logger = logging.getLogger(__name__)
 
@@ -10,24 +13,41 @@ class FinancialAPIIntegration:
     Combines Yahoo Finance API and ML-powered analysis
     """
     
-    def __init__(self):
+    def __init__(self, private_registry=None, session=None):
         """Initialize the financial API integration module"""
-        self.yahoo_handler = YahooFinanceHandler()
-        self.financial_analyzer = FinancialAnalyzer()
+        self.yahoo_handler = YahooFinanceHandler(session=session)
+        self.financial_analyzer = FinancialAnalyzer(session=session)
+        self.private_registry = private_registry or PrivateCompanyRegistry()
+        self.provider = FinancialDataProvider(
+            [YahooHTTPBackend(self.yahoo_handler),
+             YFinanceBackend(self.financial_analyzer, cache=self.yahoo_handler.cache)],
+            cache=self.yahoo_handler.cache,
+            predictor=self.yahoo_handler
+        )
+    
+    def load_models(self, model_dir=DEFAULT_MODEL_DIR):
+        """Load trained model artifacts into both financial backends"""
+        yahoo_loaded = self.yahoo_handler.load_models(model_dir)
+        analyzer_loaded = self.financial_analyzer.load_models(model_dir)
+        return yahoo_loaded or analyzer_loaded
     
     def get_company_financials(self, company_name=None, ticker=None):
         """Get comprehensive financial data for a company"""
         try:
             logger.debug(f"Getting financial data for company: {company_name}, ticker: {ticker}")
-            # First try Yahoo Finance
-            financials = self.yahoo_handler.get_company_financials(company_name, ticker)
+            # Known private companies have no public filings, skip the lookup chain
+            if not ticker and self.private_registry.is_private(company_name):
+                logger.info(f"{company_name} is a known private company, skipping financial lookup")
+                return None
+            
+            # Resolve the ticker once, then let the provider merge the backends
+            resolved, no_match = (ticker, False) if ticker else self.provider.lookup_ticker(company_name)
+            financials = self.provider.get_financials(resolved) if resolved else None
             
-            if not financials or not financials.get('annual_revenue'):
-                # If Yahoo Finance fails, try financial analyzer 
-                # (which may use alternative APIs or ML predictions)
-                financials = self.financial_analyzer.find_ticker(company_name)
-                if financials:
-                    return financials
+            # Every source searched and none knows this name: remember it so the
+            # next lookup is free. Failed or timed-out searches are never recorded.
+            if no_match:
+                self.private_registry.mark_private(company_name, source='lookup_miss')
             
             return financials
             
@@ -35,6 +55,21 @@ class FinancialAPIIntegration:
             logger.error(f"Error getting financial data: {str(e)}")
             return None
     
+    def get_bulk_financials(self, tickers):
+        """Get financial data for a list of tickers through the provider, in batches"""
+        try:
+            return self.provider.get_bulk_financials(tickers)
+        except Exception as e:
+            logger.error(f"Error getting bulk financial data: {str(e)}")
+            return {}
+    
+    def mark_company_ownership(self, company_name, is_private):
+        """Record an analyst's verdict on whether a company is private"""
+        if is_private:
+            self.private_registry.mark_private(company_name, source='manual')
+        else:
+            self.private_registry.unmark(company_name)
+    
     def analyze_investment_fit(self, company_data, financials=None):
         """
         Analyze how well a company fits the investment criteria
@@ -45,45 +80,13 @@ class FinancialAPIIntegration:
             if not financials and company_data.get('company_name'):
                 financials = self.get_company_financials(company_data.get('company_name'))
             
-            # Use the financial analyzer to predict investment fit
-            investment_fit = self.financial_analyzer.predict_investment_fit(
+            # The analyzer evaluates the shared criteria rule set once and blends
+            # in the trained model, so no second pass through the Yahoo handler is needed
+            return self.financial_analyzer.predict_investment_fit(
                 company_data, 
-                financials
+                financials or {}
             )
             
-            # Also get a second analysis from Yahoo Finance for validation
-            if financials:
-                yahoo_analysis = self.yahoo_handler.analyze_for_investment_criteria(financials)
-                
-                # Combine the analyses (weighted average)
-                if yahoo_analysis:
-                    # Calculate weighted score (ML model has higher weight)
-                    combined_score = (
-                        investment_fit.get('score', 0) * 0.7 + 
-                        yahoo_analysis.get('match_score', 0) * 0.3
-                    )
-                    
-                    # Create combined list of criteria met/missed
-                    criteria_met = list(set(
-                        investment_fit.get('criteria_met', []) + 
-                        yahoo_analysis.get('criteria_met', [])
-                    ))
-                    
-                    criteria_missed = list(set(
-                        investment_fit.get('missing_data', []) + 
-                        yahoo_analysis.get('criteria_missed', [])
-                    ))
-                    
-                    # Update the investment fit
-                    investment_fit['score'] = combined_score
-                    investment_fit['criteria_met'] = criteria_met
-                    investment_fit['missing_data'] = criteria_missed
-                    
-                    # Add additional data points
-                    investment_fit['yahoo_analysis'] = yahoo_analysis
-            
-            return investment_fit
-            
         except Exception as e:
             logger.error(f"Error analyzing investment fit: {str(e)}")
             return {
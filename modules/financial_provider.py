@@ -0,0 +1,341 @@
+"""
+Single financial data provider over pluggable backends.
+
+YahooFinanceHandler (raw HTTP) and FinancialAnalyzer (yfinance) fetch
+overlapping data in different shapes. FinancialDataProvider resolves the
+ticker once, then asks backends only for the fields still missing, merges
+their answers field by field and records which backend supplied each value.
+Backends are ordered by their measured latency and hit rate, so the fastest
+source that usually has the data is tried first; a backend that raises is
+charged a failed attempt and drops down the order.
+"""
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .finance_cache import get_finance_cache, normalize_company_key, MISSING
+from .private_registry import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Fields a lookup tries to fill before it stops asking further backends
+REQUIRED_FIELDS = ['annual_revenue', 'free_cash_flow', 'ebitda_margin', 'capex_to_revenue']
+
+# Smoothing factor for the latency and hit rate moving averages
+EWMA_ALPHA = 0.2
+
+# Latency (seconds) charged for a fetch that raised, so a backend failing fast is not ranked as fast
+FAILURE_LATENCY = 10.0
+
+# Bulk lookups: tickers per backend prefetch and concurrent per-ticker merges
+BULK_BATCH_SIZE = 100
+BULK_MAX_WORKERS = 8
+
+# Shape of an exchange symbol; anything else a backend returns is not a resolution
+_SYMBOL_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9.\-^=]{0,11}$')
+
+
+class TickerLookupError(Exception):
+    """Raised when a ticker search could not be completed (request error, timeout, rate limit)"""
+
+
+def company_names_match(company_name, listed_name):
+    """
+    True if a listed company name confirms a search result for company_name
+
+    Both names are normalized (case, punctuation and legal suffixes), and the
+    searched name's words must start the listed name: "Acme Widgets" confirms
+    "Acme Widgets Holdings, Inc." but neither "Acme" nor "Widgets Acme".
+    """
+    if not company_name or not listed_name:
+        return False
+    searched = normalize_name(company_name).split()
+    listed = normalize_name(listed_name).split()
+    return bool(searched) and listed[:len(searched)] == searched
+
+
+class FinancialBackend:
+    """Interface for a source of company financials"""
+
+    name = 'backend'
+
+    def resolve_ticker(self, company_name):
+        """
+        Return the ticker for a company name, or None if the search found no match
+
+        Only a symbol whose listed name matches the company (see
+        company_names_match) may be returned; unconfirmed candidates are None.
+
+        Raises:
+            TickerLookupError: If the search could not be completed
+        """
+        raise NotImplementedError
+
+    def fetch(self, ticker):
+        """Return a flat financials dict for a ticker, or None"""
+        raise NotImplementedError
+
+    def prefetch(self, tickers):
+        """Optionally load data for many tickers in one request before they are fetched one by one"""
+
+
+class YahooHTTPBackend(FinancialBackend):
+    """Yahoo Finance JSON/HTML endpoints via YahooFinanceHandler"""
+
+    name = 'yahoo'
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def resolve_ticker(self, company_name):
+        return self.handler.search_ticker(company_name, raise_errors=True)
+
+    def fetch(self, ticker):
+        return self.handler.get_ticker_metrics(ticker)
+
+
+class YFinanceBackend(FinancialBackend):
+    """
+    yfinance library via FinancialAnalyzer
+
+    Results are kept in the finance cache: price-derived fields under the
+    'quotes' namespace and statement data under 'statements', each with its
+    TTL. Tickers yfinance has no data for are cached as negative entries;
+    failed fetches raise and are not cached.
+    """
+
+    name = 'yfinance'
+    # Fields cached with the short 'quotes' TTL
+    QUOTE_FIELDS = ('market_cap', 'volatility')
+
+    def __init__(self, analyzer, cache=None):
+        self.analyzer = analyzer
+        self.cache = cache or get_finance_cache()
+
+    def resolve_ticker(self, company_name):
+        return self.analyzer.find_ticker(company_name, raise_errors=True)
+
+    def fetch(self, ticker):
+        key = f'{ticker}:yfinance'
+        statements = self.cache.get('statements', key)
+        quotes = self.cache.get('quotes', key)
+        if statements is not None and quotes is not None:
+            parts = [part for part in (statements, quotes) if part is not MISSING]
+            return dict(parts[0], **(parts[1] if len(parts) > 1 else {})) if parts else None
+
+        data = self.analyzer.get_company_financials(ticker=ticker, raise_errors=True)
+        data = data or {}
+        self.cache.set('statements', key, {k: v for k, v in data.items() if k not in self.QUOTE_FIELDS} or None)
+        self.cache.set('quotes', key, {k: v for k, v in data.items() if k in self.QUOTE_FIELDS} or None)
+        return data or None
+
+    def prefetch(self, tickers):
+        """Download the price history of the uncached tickers in one batched request"""
+        uncached = [ticker for ticker in tickers
+                    if self.cache.get('statements', f'{ticker}:yfinance') is None
+                    or self.cache.get('quotes', f'{ticker}:yfinance') is None]
+        if uncached:
+            self.analyzer.download_close_prices(uncached)
+
+
+class FinancialDataProvider:
+    """Resolves, fetches and merges company financials across ordered backends"""
+
+    def __init__(self, backends, cache=None, predictor=None):
+        """
+        Initialize the provider
+
+        Args:
+            backends (list): FinancialBackend instances in their initial priority order
+            cache: FinanceCache used for name -> ticker resolution (backends cache their own data)
+            predictor: Optional object with model_trained and predict_missing_metrics(),
+                       applied once to the merged result
+        """
+        self.backends = list(backends)
+        self.cache = cache or get_finance_cache()
+        self.predictor = predictor
+        self._lock = threading.Lock()
+        # Priors: 1 second latency, 50% hit rate, so untried backends keep their initial order
+        self.stats = {
+            backend.name: {'latency': 1.0 + 0.01 * i, 'hit_rate': 0.5, 'calls': 0, 'failures': 0, 'resolutions': 0}
+            for i, backend in enumerate(self.backends)
+        }
+
+    def ordered_backends(self):
+        """Backends sorted by expected cost: latency divided by hit rate"""
+        with self._lock:
+            return sorted(
+                self.backends,
+                key=lambda backend: self.stats[backend.name]['latency'] / max(self.stats[backend.name]['hit_rate'], 0.05)
+            )
+
+    def _record(self, backend, latency, hit, failed=False):
+        with self._lock:
+            stats = self.stats[backend.name]
+            stats['latency'] += EWMA_ALPHA * (latency - stats['latency'])
+            stats['hit_rate'] += EWMA_ALPHA * (hit - stats['hit_rate'])
+            stats['calls'] += 1
+            if failed:
+                stats['failures'] += 1
+
+    def resolve_ticker(self, company_name):
+        """Resolve a company name to a ticker once, caching hits and definitive misses"""
+        return self.lookup_ticker(company_name)[0]
+
+    def lookup_ticker(self, company_name):
+        """
+        Resolve a company name to a ticker, telling "no match" apart from a failed search
+
+        A miss is cached (and reported as no_match) only when every backend
+        completed its search; a failed search is retried on the next lookup.
+
+        Returns:
+            tuple: (ticker or None, no_match)
+        """
+        if not company_name:
+            return None, False
+        try:
+            ticker = self.cache.get_or_fetch(
+                'ticker', normalize_company_key(company_name),
+                self._resolve_uncached, company_name, cache_empty=True
+            )
+        except TickerLookupError as e:
+            logger.warning(str(e))
+            return None, False
+        return ticker, not ticker
+
+    def _resolve_uncached(self, company_name):
+        """
+        Ask the backends in turn for a confirmed symbol
+
+        Backends only return symbols whose listed name matched the company;
+        anything not shaped like a symbol is discarded as well, so it is never
+        fetched, counted as a resolution or credited in provenance.
+        """
+        failed = []
+        for backend in self.backends:
+            try:
+                ticker = backend.resolve_ticker(company_name)
+            except Exception as e:
+                logger.warning(f"{backend.name} ticker lookup failed for {company_name}: {str(e)}")
+                failed.append(backend.name)
+                continue
+            if not isinstance(ticker, str) or not _SYMBOL_PATTERN.match(ticker.strip().upper()):
+                if ticker:
+                    logger.warning(f"{backend.name} returned an invalid symbol {ticker!r} for {company_name}")
+                continue
+            with self._lock:
+                self.stats[backend.name]['resolutions'] += 1
+            return ticker.strip().upper()
+        if failed:
+            raise TickerLookupError(f"Ticker lookup for {company_name} incomplete, failed backends: {', '.join(failed)}")
+        return None
+
+    def get_financials(self, ticker):
+        """
+        Fetch and merge financials for a ticker
+
+        Backends are asked in cost order until every REQUIRED_FIELDS entry is
+        filled. A field keeps the first actual value seen; values a backend only
+        predicted give way to actual values from a later backend.
+
+        Returns:
+            dict: Merged financials with 'ticker', per-field 'provenance' and, when
+                  a backend ran out of time, 'timed_out_sources'; None if no backend had any data
+        """
+        merged = {}
+        provenance = {}
+        incomplete = []
+
+        for backend in self.ordered_backends():
+            missing = [field for field in REQUIRED_FIELDS if not self._has_actual(merged, field)]
+            if merged and not missing:
+                break
+
+            start = time.perf_counter()
+            try:
+                data = backend.fetch(ticker)
+            except Exception as e:
+                logger.warning(f"{backend.name} fetch failed for {ticker}: {str(e)}")
+                self._record(backend, max(time.perf_counter() - start, FAILURE_LATENCY), 0.0, failed=True)
+                continue
+            # Sources a backend could not fetch in time count against it like a failure
+            timed_out = data.pop('timed_out_sources', None) if data else None
+            supplied = [field for field in missing if self._has_actual(data or {}, field)]
+            self._record(backend, time.perf_counter() - start, len(supplied) / len(missing) if missing else 1.0,
+                         failed=bool(timed_out))
+            if timed_out:
+                incomplete.extend(f'{backend.name}:{source}' for source in timed_out)
+
+            if data:
+                self._merge(merged, provenance, data, backend.name)
+
+        if not any(merged.get(field) is not None for field in REQUIRED_FIELDS + ['market_cap']):
+            return None
+
+        if self.predictor is not None and self.predictor.model_trained:
+            merged = self.predictor.predict_missing_metrics(merged)
+            for field, value in merged.items():
+                if merged.get(f'{field}_predicted') and field not in provenance:
+                    provenance[field] = 'model'
+
+        merged['ticker'] = ticker
+        merged['provenance'] = provenance
+        if incomplete:
+            merged['timed_out_sources'] = incomplete
+        return merged
+
+    def get_bulk_financials(self, tickers, batch_size=BULK_BATCH_SIZE, max_workers=BULK_MAX_WORKERS):
+        """
+        Fetch and merge financials for many tickers
+
+        Each batch is first prefetched by the backends that support it (one
+        price download for all uncached yfinance tickers), then every ticker
+        goes through get_financials, so cached data, backend ordering and
+        provenance apply exactly as for single lookups.
+
+        Returns:
+            dict: ticker -> merged financials or None
+        """
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bulk-financials') as executor:
+            for offset in range(0, len(tickers), batch_size):
+                batch = tickers[offset:offset + batch_size]
+                for backend in self.backends:
+                    try:
+                        backend.prefetch(batch)
+                    except Exception as e:
+                        logger.warning(f"{backend.name} prefetch failed: {str(e)}")
+                results.update(zip(batch, executor.map(self._bulk_financials_item, batch)))
+
+        logger.info(f"Bulk financials fetched for {sum(1 for f in results.values() if f)} of {len(tickers)} tickers")
+        return results
+
+    def _bulk_financials_item(self, ticker):
+        try:
+            return self.get_financials(ticker)
+        except Exception as e:
+            logger.warning(f"Error getting bulk financial data for {ticker}: {str(e)}")
+            return None
+
+    def _has_actual(self, financials, field):
+        return financials.get(field) is not None and not financials.get(f'{field}_predicted')
+
+    def _merge(self, merged, provenance, data, source):
+        """Merge one backend's fields into the result according to the merge policy"""
+        for field, value in data.items():
+            if value is None or field.endswith('_predicted'):
+                continue
+            predicted = bool(data.get(f'{field}_predicted'))
+            if field in merged and (predicted or not merged.get(f'{field}_predicted')):
+                continue
+            merged[field] = value
+            provenance[field] = source
+            if predicted:
+                merged[f'{field}_predicted'] = True
+            else:
+                merged.pop(f'{field}_predicted', None)
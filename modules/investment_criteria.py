@@ -5,20 +5,88 @@ import logging
 import re
 import torch
 import json
+from typing import NamedTuple, Optional, Any
+from .model_store import DEFAULT_MODEL_DIR, load_model_artifacts
+from .criteria_engine import (DEFAULT_PROFILES_PATH, load_criteria_profiles, merge_criteria,
+                              get_criteria_engine, match_tier, format_amount)
+from .revenue_estimator import company_keyword_text
 
 logger = logging.getLogger(__name__)
 
+
+def _chunks(items, size):
+    """Yields lists of up to size items from any iterable"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class CriteriaFeatures(NamedTuple):
+    """Criterion inputs for one lead, extracted once and shared by all scoring stages"""
+    revenue: Optional[float]
+    cash_flow: Optional[float]
+    ebitda_margin: Optional[float]
+    profit_years: Optional[float]
+    capex: Optional[str]
+    recurring_revenue_pct: Optional[float]
+    market_position: Optional[str]
+    customer_diversity: Optional[str]
+    operations_complexity: Optional[str]
+    management_strength: Optional[str]
+    owner_status: Optional[str]
+    service_based: Optional[str]
+    recurring_model: Optional[str]
+    b2b_focus: Optional[str]
+    competitive_landscape: Optional[Any]
+    market_size: Optional[float]
+    growth_rate: Optional[float]
+    verified: bool
+
+
 class InvestmentCriteriaValidator:
     """
     Validates company leads against Caprae Capital's investment criteria
     using advanced machine learning models
     """
     
-    def __init__(self):
+    # Feature groups used for confidence and data completeness
+    FINANCIAL_FEATURES = ('revenue', 'cash_flow', 'ebitda_margin', 'profit_years',
+                          'capex', 'recurring_revenue_pct')
+    BUSINESS_FEATURES = ('market_position', 'customer_diversity', 'operations_complexity',
+                         'management_strength', 'owner_status')
+    CONFIDENCE_INDUSTRY_FEATURES = ('service_based', 'market_size', 'growth_rate')
+    COMPLETENESS_INDUSTRY_FEATURES = ('service_based', 'b2b_focus', 'market_size', 'growth_rate')
+    
+    # Points awarded per categorical value, shared by batch scoring
+    BUSINESS_POINTS = {
+        'market_position': {'strong': 20, 'moderate': 12},
+        'customer_diversity': {'diverse': 20, 'moderate': 12},
+        'operations_complexity': {'straightforward': 20, 'moderate': 12},
+        'management_strength': {'strong': 20, 'moderate': 12},
+        'owner_status': {'exit': 20, 'reduced_role': 15}
+    }
+    INDUSTRY_POINTS = {
+        'service_based': {'service': 20, 'hybrid': 10},
+        'recurring_model': {'strong': 20, 'moderate': 12},
+        'b2b_focus': {'b2b': 15, 'mixed': 8},
+        'competitive_landscape': {'fragmented': 15, 'moderate': 8}
+    }
+    CAPEX_POINTS = {'low': 15, 'moderate': 8}  # Feature encoding only; scoring lives in the criteria engine
+    MODEL_NUMERIC_FEATURES = ('revenue', 'cash_flow', 'ebitda_margin', 'profit_years',
+                              'recurring_revenue_pct', 'market_size', 'growth_rate')
+    
+    def __init__(self, profiles_path=DEFAULT_PROFILES_PATH):
         """Initialize the investment criteria validator with ML models"""
         # Initialize traditional ML models
         self.rf_model = RandomForestClassifier(n_estimators=200, random_state=42)
         self.mlp_model = MLPClassifier(hidden_layer_sizes=(100, 50), random_state=42)
+        self.trained_models = []
+        self.model_version = None
         
         # Initialize BERT for text analysis if available
         self.has_bert = False
@@ -31,29 +99,22 @@ class InvestmentCriteriaValidator:
         except (ImportError, ModuleNotFoundError) as e:
             logger.warning(f"BERT not available: {str(e)}. Falling back to rule-based analysis.")
             
-        # Define investment criteria thresholds
-        self.criteria = {
-            'revenue': {
-                'min': 5000000,  # $5 million
-                'max': 50000000  # $50 million
-            },
-            'cash_flow': {
-                'min': 1000000,  # $1 million
-                'max': 5000000   # $5 million
-            },
-            'ebitda_margin': {
-                'min': 15        # 15%
-            },
-            'recurring_revenue': {
-                'min': 50        # 50%
-            },
-            'profitability_years': {
-                'min': 3         # 3+ years
-            },
-            'market_size': {
-                'min': 1000000000  # $1 billion
-            }
-        }
+        # Investment criteria thresholds, including alternative per-fund profiles
+        self.criteria_profiles = load_criteria_profiles(profiles_path)
+        self.criteria = self.criteria_profiles['default']
+    
+    def get_criteria_profile(self, profile=None):
+        """
+        Resolves a criteria profile by name, or merges an inline profile dict over
+        the default criteria. Returns the default criteria when profile is None.
+        """
+        if profile is None:
+            return self.criteria
+        if isinstance(profile, dict):
+            return merge_criteria(self.criteria, profile)
+        if profile not in self.criteria_profiles:
+            raise ValueError(f"Unknown criteria profile: {profile}")
+        return self.criteria_profiles[profile]
     
     def get_text_from_data(self, company_data, key='text_data'):
         """Helper method to safely extract text from company_data"""
@@ -71,11 +132,14 @@ class InvestmentCriteriaValidator:
             
         return None
     
-    def validate(self, analysis_results, sales_insights, financials=None, business_details=None, industry_details=None):
+    def validate(self, analysis_results, sales_insights, financials=None, business_details=None,
+                 industry_details=None, profile=None):
         """
         Validates if a company meets Caprae Capital's investment criteria
         Returns a detailed assessment of criteria match
         """
+        criteria = self.get_criteria_profile(profile)
+        
         # Safely handle input data
         company_data = {}
         
@@ -111,10 +175,13 @@ class InvestmentCriteriaValidator:
         if industry_details and isinstance(industry_details, dict):
             company_data['industry_details'] = industry_details
         
+        # Extract every criterion input once
+        features = self.extract_features(company_data)
+        
         # Evaluate each criterion category
-        business_match = self._evaluate_business_criteria(company_data)
-        industry_match = self._evaluate_industry_criteria(company_data)
-        financial_match = self._evaluate_financial_criteria(company_data)
+        business_match = self._evaluate_business_criteria(features)
+        industry_match = self._evaluate_industry_criteria(features, criteria)
+        financial_match = self._evaluate_financial_criteria(features, criteria)
         
         # Calculate overall match score (weighted average)
         overall_match = (
@@ -124,17 +191,10 @@ class InvestmentCriteriaValidator:
         )
         
         # Determine match tier
-        if overall_match >= 80:
-            match_tier = "Strong Match"
-        elif overall_match >= 60:
-            match_tier = "Potential Match"
-        elif overall_match >= 40:
-            match_tier = "Partial Match"
-        else:
-            match_tier = "Weak Match"
+        match_tier = self._get_match_tier(overall_match)
             
         # Calculate confidence level based on data completeness
-        confidence = self._calculate_confidence(company_data)
+        confidence = self._calculate_confidence(features)
         
         # Combine results
         result = {
@@ -146,12 +206,251 @@ class InvestmentCriteriaValidator:
             'financial_criteria': financial_match,
             'key_strengths': self._identify_key_strengths(company_data, business_match, industry_match, financial_match),
             'key_concerns': self._identify_key_concerns(company_data, business_match, industry_match, financial_match),
-            'data_completeness': self._get_data_completeness(company_data)
+            'data_completeness': self._get_data_completeness(features),
+            'features': features._asdict()
         }
         
+        # Add the learned verification likelihood when trained models are loaded
+        probability = self.predict_verification_probability([features])
+        if probability is not None:
+            result['ml_verification_probability'] = float(probability[0])
+            result['model_version'] = self.model_version
+        
         return result
     
-    def _evaluate_business_criteria(self, company_data):
+    def validate_batch(self, leads, profile=None, min_match=None, limit=None, chunk_size=1000):
+        """
+        Validates many stored leads against a criteria profile at once.
+        Uses the feature records saved with each lead's investment match when
+        available, scores leads chunk by chunk with vectorized operations and
+        returns the matches ranked by overall match score. leads may be any
+        iterable (e.g. a store's validation records); only chunk_size leads
+        plus the best limit candidates are held at a time.
+        """
+        criteria = self.get_criteria_profile(profile)
+        candidates = []     # (overall match, position, lead, features, scores, probability)
+        position = 0
+        
+        for chunk in _chunks(leads, chunk_size):
+            features = [self._get_lead_features(lead) for lead in chunk]
+            scores = self._score_feature_table(features, criteria)
+            overall = scores['overall_match']
+            probabilities = self.predict_verification_probability(features)
+            
+            for idx, lead in enumerate(chunk):
+                if min_match is not None and not overall[idx] >= min_match:
+                    continue
+                candidates.append((
+                    float(overall[idx]), position + idx, lead, features[idx],
+                    {name: float(values[idx]) for name, values in scores.items()},
+                    float(probabilities[idx]) if probabilities is not None else None
+                ))
+            position += len(chunk)
+            
+            # Rank by overall match (ties keep store order) and keep only what can still be returned
+            candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+            if limit:
+                del candidates[limit:]
+        
+        results = []
+        for overall_match, _, lead, lead_features, lead_scores, probability in candidates:
+            business_match = self._evaluate_business_criteria(lead_features)
+            industry_match = self._evaluate_industry_criteria(lead_features, criteria)
+            financial_match = self._evaluate_financial_criteria(lead_features, criteria)
+            
+            results.append({
+                'id': lead.get('id'),
+                'company_name': lead.get('company_name'),
+                'url': lead.get('url'),
+                'overall_match': overall_match,
+                'match_tier': self._get_match_tier(overall_match),
+                'confidence': lead_scores['confidence'],
+                'business_score': lead_scores['business'],
+                'industry_score': lead_scores['industry'],
+                'financial_score': lead_scores['financial'],
+                'key_strengths': self._identify_key_strengths(lead, business_match, industry_match, financial_match),
+                'key_concerns': self._identify_key_concerns(lead, business_match, industry_match, financial_match)
+            })
+            if probability is not None:
+                results[-1]['ml_verification_probability'] = probability
+        
+        return results
+    
+    def _get_lead_features(self, lead):
+        """Returns the feature record for a stored lead, extracting it only if not saved"""
+        stored = (lead.get('investment_match') or {}).get('features')
+        verified = lead.get('verification', {}).get('status') == 'Verified'
+        
+        if isinstance(stored, dict):
+            try:
+                return CriteriaFeatures(**stored)._replace(verified=verified)
+            except TypeError:
+                logger.debug(f"Stale feature record for lead {lead.get('id')}, re-extracting")
+        
+        company_data = {key: value for key, value in lead.items() if key != 'investment_match'}
+        return self.extract_features(company_data)
+    
+    def _score_feature_table(self, features, criteria):
+        """
+        Scores a list of feature records column-wise.
+        Mirrors the per-lead evaluators (each category has 100 points available;
+        financial scores come from the shared criteria engine) and returns numpy
+        arrays of business, industry, financial and overall scores plus confidence.
+        """
+        def categorical(name, points):
+            return self._categorical_column(features, name, points)
+        
+        def numeric(name):
+            return self._numeric_column(features, name)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            business = sum(categorical(name, points) for name, points in self.BUSINESS_POINTS.items())
+            
+            industry = sum(categorical(name, points) for name, points in self.INDUSTRY_POINTS.items())
+            market_size = numeric('market_size')
+            industry += np.where(market_size >= criteria['market_size']['min'], 15, 0)
+            growth = numeric('growth_rate')
+            industry += np.where(growth > 5, 15, np.where(growth > 2, 8, 0))
+        
+        financial = get_criteria_engine(criteria).evaluate_many(features)['score']
+        
+        overall = business * 0.35 + industry * 0.25 + financial * 0.40
+        
+        data_points = (self.FINANCIAL_FEATURES + self.BUSINESS_FEATURES +
+                       self.CONFIDENCE_INDUSTRY_FEATURES)
+        available = np.array([sum(1 for name in data_points if getattr(f, name) is not None)
+                              for f in features], dtype=float)
+        verified = np.array([f.verified for f in features], dtype=bool)
+        confidence = available / len(data_points) * 100
+        confidence = np.where(verified, np.minimum(100, confidence + 15), confidence)
+        
+        return {
+            'business': business,
+            'industry': industry,
+            'financial': financial,
+            'overall_match': overall,
+            'confidence': confidence
+        }
+    
+    def _categorical_column(self, features, name, points):
+        """Maps a categorical feature to its criteria points for every record"""
+        return np.array([points.get(getattr(f, name), 0) for f in features], dtype=float)
+    
+    def _numeric_column(self, features, name):
+        """Returns a numeric feature column with missing and zero values as NaN"""
+        # Missing and zero values are both treated as absent, as in the per-lead path
+        values = np.empty(len(features), dtype=float)
+        for i, f in enumerate(features):
+            value = getattr(f, name)
+            try:
+                values[i] = float(value) if value else np.nan
+            except (TypeError, ValueError):
+                values[i] = np.nan
+        return values
+    
+    def encode_features(self, features):
+        """
+        Encodes feature records into the numeric matrix used by the ML models.
+        Categorical inputs are encoded as their criteria points, numeric inputs
+        are zero-filled with a separate missing-value indicator column.
+        """
+        columns = []
+        for points_table in (self.BUSINESS_POINTS, self.INDUSTRY_POINTS):
+            for name, points in points_table.items():
+                columns.append(self._categorical_column(features, name, points))
+        columns.append(self._categorical_column(features, 'capex', self.CAPEX_POINTS))
+        
+        for name in self.MODEL_NUMERIC_FEATURES:
+            values = self._numeric_column(features, name)
+            missing = np.isnan(values)
+            columns.append(np.where(missing, 0, values))
+            columns.append(missing.astype(float))
+        
+        return np.column_stack(columns)
+    
+    def load_models(self, model_dir=DEFAULT_MODEL_DIR, version=None):
+        """
+        Loads trained classifiers from the model store.
+        Returns True if at least one trained model is available.
+        """
+        version, models = load_model_artifacts(['criteria_rf', 'criteria_mlp'], model_dir, version)
+        self.trained_models = []
+        if 'criteria_rf' in models:
+            self.rf_model = models['criteria_rf']
+            self.trained_models.append(self.rf_model)
+        if 'criteria_mlp' in models:
+            self.mlp_model = models['criteria_mlp']
+            self.trained_models.append(self.mlp_model)
+        
+        self.model_version = version if self.trained_models else None
+        if self.trained_models:
+            logger.info(f"Loaded investment criteria models version {version}")
+        return bool(self.trained_models)
+    
+    def predict_verification_probability(self, features):
+        """
+        Predicts, for a batch of feature records, the probability that an analyst
+        verifies the lead. Returns None when no trained model is loaded.
+        """
+        if not self.trained_models or not features:
+            return None
+        
+        matrix = self.encode_features(features)
+        probabilities = []
+        for model in self.trained_models:
+            classes = list(model.classes_)
+            if 1 not in classes:
+                continue
+            probabilities.append(model.predict_proba(matrix)[:, classes.index(1)])
+        
+        if not probabilities:
+            return None
+        return np.mean(probabilities, axis=0)
+    
+    def _get_match_tier(self, overall_match):
+        """Maps an overall match score to a match tier"""
+        return match_tier(overall_match)
+    
+    def extract_features(self, company_data):
+        """
+        Extracts all criterion inputs from the combined company data in a single pass.
+        Dependent inputs (cash flow, recurring model) reuse the values computed here,
+        and the lowercased text used for keyword checks is built at most once.
+        """
+        text_cache = []
+        
+        def data_text():
+            if not text_cache:
+                text_cache.append(company_keyword_text(company_data))
+            return text_cache[0]
+        
+        industry = self._extract_industry_type(company_data)
+        revenue = self._extract_revenue(company_data)
+        ebitda = self._extract_ebitda_margin(company_data)
+        recurring_pct = self._extract_recurring_revenue_pct(company_data, data_text)
+        
+        return CriteriaFeatures(
+            revenue=revenue,
+            cash_flow=self._extract_cash_flow(company_data, revenue, ebitda),
+            ebitda_margin=ebitda,
+            profit_years=self._extract_profitability_years(company_data),
+            capex=self._extract_capex(company_data, industry),
+            recurring_revenue_pct=recurring_pct,
+            market_position=self._extract_market_position(company_data),
+            customer_diversity=self._extract_customer_diversity(company_data),
+            operations_complexity=self._extract_operations_complexity(company_data, industry),
+            management_strength=self._extract_management_strength(company_data),
+            owner_status=self._extract_owner_status(company_data),
+            service_based=self._extract_service_based(company_data, industry),
+            recurring_model=self._extract_recurring_revenue_model(recurring_pct, data_text),
+            b2b_focus=self._extract_b2b_focus(company_data, data_text),
+            competitive_landscape=self._extract_competitive_landscape(company_data),
+            market_size=self._extract_market_size(company_data),
+            growth_rate=self._extract_industry_growth(company_data),
+            verified=company_data.get('verification', {}).get('status') == 'Verified'
+        )
+    
+    def _evaluate_business_criteria(self, features):
         """Evaluates business-related investment criteria"""
         score = 0
         max_score = 0
@@ -160,7 +459,7 @@ class InvestmentCriteriaValidator:
         
         # Market position assessment
         max_score += 20
-        market_position = self._extract_market_position(company_data)
+        market_position = features.market_position
         if market_position == 'strong':
             score += 20
             criteria_met.append("Distinctive and defensible market position")
@@ -172,7 +471,7 @@ class InvestmentCriteriaValidator:
         
         # Customer base assessment
         max_score += 20
-        customer_diversity = self._extract_customer_diversity(company_data)
+        customer_diversity = features.customer_diversity
         if customer_diversity == 'diverse':
             score += 20
             criteria_met.append("Strong and diverse customer base")
@@ -184,7 +483,7 @@ class InvestmentCriteriaValidator:
         
         # Operations complexity
         max_score += 20
-        operations = self._extract_operations_complexity(company_data)
+        operations = features.operations_complexity
         if operations == 'straightforward':
             score += 20
             criteria_met.append("Straightforward operations")
@@ -196,7 +495,7 @@ class InvestmentCriteriaValidator:
         
         # Middle management assessment
         max_score += 20
-        management = self._extract_management_strength(company_data)
+        management = features.management_strength
         if management == 'strong':
             score += 20
             criteria_met.append("Strong middle-management team")
@@ -208,7 +507,7 @@ class InvestmentCriteriaValidator:
         
         # Owner status assessment
         max_score += 20
-        owner_status = self._extract_owner_status(company_data)
+        owner_status = features.owner_status
         if owner_status == 'exit':
             score += 20
             criteria_met.append("Owner seeking exit")
@@ -234,8 +533,9 @@ class InvestmentCriteriaValidator:
             }
         }
     
-    def _evaluate_industry_criteria(self, company_data):
+    def _evaluate_industry_criteria(self, features, criteria=None):
         """Evaluates industry-related investment criteria"""
+        criteria = criteria or self.criteria
         score = 0
         max_score = 0
         criteria_met = []
@@ -243,7 +543,7 @@ class InvestmentCriteriaValidator:
         
         # Service-based assessment
         max_score += 20
-        service_based = self._extract_service_based(company_data)
+        service_based = features.service_based
         if service_based == 'service':
             score += 20
             criteria_met.append("Service-based industry")
@@ -255,7 +555,7 @@ class InvestmentCriteriaValidator:
         
         # Recurring revenue model
         max_score += 20
-        recurring_model = self._extract_recurring_revenue_model(company_data)
+        recurring_model = features.recurring_model
         if recurring_model == 'strong':
             score += 20
             criteria_met.append("Strong recurring revenue model")
@@ -267,7 +567,7 @@ class InvestmentCriteriaValidator:
         
         # B2B focus
         max_score += 15
-        b2b_focus = self._extract_b2b_focus(company_data)
+        b2b_focus = features.b2b_focus
         if b2b_focus == 'b2b':
             score += 15
             criteria_met.append("B2B focus")
@@ -279,7 +579,7 @@ class InvestmentCriteriaValidator:
         
         # Competitive landscape
         max_score += 15
-        competitive = self._extract_competitive_landscape(company_data)
+        competitive = features.competitive_landscape
         if competitive == 'fragmented':
             score += 15
             criteria_met.append("Fragmented competitive landscape")
@@ -291,16 +591,17 @@ class InvestmentCriteriaValidator:
         
         # Market size
         max_score += 15
-        market_size = self._extract_market_size(company_data)
-        if market_size and market_size >= self.criteria['market_size']['min']:
+        market_size = features.market_size
+        market_label = f"Large total market (>{format_amount(criteria['market_size']['min'])})"
+        if market_size and market_size >= criteria['market_size']['min']:
             score += 15
-            criteria_met.append("Large total market (>$1B)")
+            criteria_met.append(market_label)
         else:
-            criteria_missed.append("Large total market (>$1B)")
+            criteria_missed.append(market_label)
         
         # Industry growth
         max_score += 15
-        growth_rate = self._extract_industry_growth(company_data)
+        growth_rate = features.growth_rate
         if growth_rate and growth_rate > 5:  # >5% growth
             score += 15
             criteria_met.append("Growing industry")
@@ -327,108 +628,15 @@ class InvestmentCriteriaValidator:
             }
         }
     
-    def _evaluate_financial_criteria(self, company_data):
-        """Evaluates financial-related investment criteria"""
-        score = 0
-        max_score = 0
-        criteria_met = []
-        criteria_missed = []
-        
-        # Revenue range assessment
-        max_score += 20
-        revenue = self._extract_revenue(company_data)
-        if revenue:
-            if self.criteria['revenue']['min'] <= revenue <= self.criteria['revenue']['max']:
-                score += 20
-                criteria_met.append(f"Revenue in target range ($5-50M)")
-            elif revenue < self.criteria['revenue']['min']:
-                score += 10 * (revenue / self.criteria['revenue']['min'])
-                criteria_missed.append(f"Revenue in target range ($5-50M)")
-            else:
-                score += 10 * (self.criteria['revenue']['max'] / revenue)
-                criteria_missed.append(f"Revenue in target range ($5-50M)")
-        else:
-            criteria_missed.append(f"Revenue in target range ($5-50M)")
-        
-        # Cash flow assessment
-        max_score += 20
-        cash_flow = self._extract_cash_flow(company_data)
-        if cash_flow:
-            if self.criteria['cash_flow']['min'] <= cash_flow <= self.criteria['cash_flow']['max']:
-                score += 20
-                criteria_met.append(f"Cash flow in target range ($1-5M)")
-            elif cash_flow < self.criteria['cash_flow']['min']:
-                score += 10 * (cash_flow / self.criteria['cash_flow']['min'])
-                criteria_missed.append(f"Cash flow in target range ($1-5M)")
-            else:
-                score += 10 * (self.criteria['cash_flow']['max'] / cash_flow)
-                criteria_missed.append(f"Cash flow in target range ($1-5M)")
-        else:
-            criteria_missed.append(f"Cash flow in target range ($1-5M)")
-        
-        # Profitability years
-        max_score += 15
-        profit_years = self._extract_profitability_years(company_data)
-        if profit_years and profit_years >= self.criteria['profitability_years']['min']:
-            score += 15
-            criteria_met.append(f"3+ years of profitability")
-        elif profit_years:
-            score += 15 * (profit_years / self.criteria['profitability_years']['min'])
-            criteria_missed.append(f"3+ years of profitability")
-        else:
-            criteria_missed.append(f"3+ years of profitability")
-        
-        # EBITDA margin
-        max_score += 20
-        ebitda = self._extract_ebitda_margin(company_data)
-        if ebitda and ebitda >= self.criteria['ebitda_margin']['min']:
-            score += 20
-            criteria_met.append(f"EBITDA margin >15%")
-        elif ebitda:
-            score += 20 * (ebitda / self.criteria['ebitda_margin']['min'])
-            criteria_missed.append(f"EBITDA margin >15%")
-        else:
-            criteria_missed.append(f"EBITDA margin >15%")
-        
-        # Capital expenditure
-        max_score += 15
-        capex = self._extract_capex(company_data)
-        if capex == 'low':
-            score += 15
-            criteria_met.append("Low capital expenditure requirements")
-        elif capex == 'moderate':
-            score += 8
-            criteria_met.append("Moderate capital expenditure requirements")
-        else:
-            criteria_missed.append("Low capital expenditure requirements")
-        
-        # Recurring revenue percentage
-        max_score += 10
-        recurring_pct = self._extract_recurring_revenue_pct(company_data)
-        if recurring_pct and recurring_pct >= self.criteria['recurring_revenue']['min']:
-            score += 10
-            criteria_met.append(f"Strong recurring revenue component (>50%)")
-        elif recurring_pct:
-            score += 10 * (recurring_pct / self.criteria['recurring_revenue']['min'])
-            criteria_missed.append(f"Strong recurring revenue component (>50%)")
-        else:
-            criteria_missed.append(f"Strong recurring revenue component (>50%)")
-        
-        # Normalize score
-        final_score = (score / max_score * 100) if max_score > 0 else 0
+    def _evaluate_financial_criteria(self, features, criteria=None):
+        """Evaluates financial-related investment criteria with the shared criteria engine"""
+        evaluation = get_criteria_engine(criteria or self.criteria).evaluate(features)
         
         return {
-            'score': final_score,
-            'criteria_met': criteria_met,
-            'criteria_missed': criteria_missed,
-            'details': {
-                'revenue': revenue,
-                'cash_flow': cash_flow,
-                'profit_years': profit_years,
-                'ebitda_margin': ebitda,
-                'capex': capex,
-                'recurring_revenue_pct': recurring_pct
-            }
+            'score': evaluation['score'],
+            'criteria_met': evaluation['criteria_met'],
+            'criteria_missed': evaluation['criteria_missed'],
+            'details': evaluation['details']
         }
     
     def _identify_key_strengths(self, company_data, business_match, industry_match, financial_match):
@@ -475,104 +683,34 @@ class InvestmentCriteriaValidator:
         
         return concerns
     
-    def _calculate_confidence(self, company_data):
+    def _calculate_confidence(self, features):
         """Calculates confidence level in the assessment based on data completeness"""
         # Count available data points
-        available_data = 0
-        total_data_points = 14  # Total number of key data points we look for
-        
-        # Financial data
-        if self._extract_revenue(company_data) is not None:
-            available_data += 1
-        if self._extract_cash_flow(company_data) is not None:
-            available_data += 1
-        if self._extract_ebitda_margin(company_data) is not None:
-            available_data += 1
-        if self._extract_profitability_years(company_data) is not None:
-            available_data += 1
-        if self._extract_capex(company_data) is not None:
-            available_data += 1
-        if self._extract_recurring_revenue_pct(company_data) is not None:
-            available_data += 1
-            
-        # Business data
-        if self._extract_market_position(company_data) is not None:
-            available_data += 1
-        if self._extract_customer_diversity(company_data) is not None:
-            available_data += 1
-        if self._extract_operations_complexity(company_data) is not None:
-            available_data += 1
-        if self._extract_management_strength(company_data) is not None:
-            available_data += 1
-        if self._extract_owner_status(company_data) is not None:
-            available_data += 1
-            
-        # Industry data
-        if self._extract_service_based(company_data) is not None:
-            available_data += 1
-        if self._extract_market_size(company_data) is not None:
-            available_data += 1
-        if self._extract_industry_growth(company_data) is not None:
-            available_data += 1
-            
+        data_points = (self.FINANCIAL_FEATURES + self.BUSINESS_FEATURES +
+                       self.CONFIDENCE_INDUSTRY_FEATURES)
+        available_data = sum(1 for name in data_points if getattr(features, name) is not None)
+        
         # Calculate confidence percentage
-        confidence = (available_data / total_data_points) * 100
+        confidence = (available_data / len(data_points)) * 100
         
         # Add a bonus for verified data
-        if company_data.get('verification', {}).get('status') == 'Verified':
+        if features.verified:
             confidence = min(100, confidence + 15)
             
         return confidence
     
-    def _get_data_completeness(self, company_data):
+    def _get_data_completeness(self, features):
         """Returns a breakdown of data completeness by category"""
-        completeness = {
-            'financial': 0,
-            'business': 0,
-            'industry': 0
+        groups = {
+            'financial': self.FINANCIAL_FEATURES,
+            'business': self.BUSINESS_FEATURES,
+            'industry': self.COMPLETENESS_INDUSTRY_FEATURES
         }
         
-        # Financial data (6 data points)
-        financial_available = 0
-        if self._extract_revenue(company_data) is not None:
-            financial_available += 1
-        if self._extract_cash_flow(company_data) is not None:
-            financial_available += 1
-        if self._extract_ebitda_margin(company_data) is not None:
-            financial_available += 1
-        if self._extract_profitability_years(company_data) is not None:
-            financial_available += 1
-        if self._extract_capex(company_data) is not None:
-            financial_available += 1
-        if self._extract_recurring_revenue_pct(company_data) is not None:
-            financial_available += 1
-        completeness['financial'] = (financial_available / 6) * 100
-        
-        # Business data (5 data points)
-        business_available = 0
-        if self._extract_market_position(company_data) is not None:
-            business_available += 1
-        if self._extract_customer_diversity(company_data) is not None:
-            business_available += 1
-        if self._extract_operations_complexity(company_data) is not None:
-            business_available += 1
-        if self._extract_management_strength(company_data) is not None:
-            business_available += 1
-        if self._extract_owner_status(company_data) is not None:
-            business_available += 1
-        completeness['business'] = (business_available / 5) * 100
-        
-        # Industry data (4 data points)
-        industry_available = 0
-        if self._extract_service_based(company_data) is not None:
-            industry_available += 1
-        if self._extract_b2b_focus(company_data) is not None:
-            industry_available += 1
-        if self._extract_market_size(company_data) is not None:
-            industry_available += 1
-        if self._extract_industry_growth(company_data) is not None:
-            industry_available += 1
-        completeness['industry'] = (industry_available / 4) * 100
+        completeness = {}
+        for category, names in groups.items():
+            available = sum(1 for name in names if getattr(features, name) is not None)
+            completeness[category] = (available / len(names)) * 100
         
         return completeness
     
@@ -580,9 +718,12 @@ class InvestmentCriteriaValidator:
     
     def _extract_revenue(self, company_data):
         """Extracts revenue from company data"""
-        # First, check if we have verified financial data
-        if company_data.get('financials', {}).get('estimated_revenue') is not None:
-            return company_data['financials']['estimated_revenue']
+        # First, check if we have verified or reported financial data
+        financials = company_data.get('financials', {})
+        if financials.get('estimated_revenue') is not None:
+            return financials['estimated_revenue']
+        if financials.get('annual_revenue') is not None:
+            return financials['annual_revenue']
         
         # Otherwise check for sales insights data
         sales = company_data.get('sales_insights', {})
@@ -591,16 +732,16 @@ class InvestmentCriteriaValidator:
         
         return None
     
-    def _extract_cash_flow(self, company_data):
+    def _extract_cash_flow(self, company_data, revenue, ebitda):
         """Extracts annual cash flow from company data"""
-        # First, check if we have verified financial data
-        if company_data.get('financials', {}).get('estimated_annual_cash_flow') is not None:
-            return company_data['financials']['estimated_annual_cash_flow']
+        # First, check if we have verified or reported financial data
+        financials = company_data.get('financials', {})
+        if financials.get('estimated_annual_cash_flow') is not None:
+            return financials['estimated_annual_cash_flow']
+        if financials.get('free_cash_flow') is not None:
+            return financials['free_cash_flow']
         
         # Otherwise, try to estimate from revenue and margins
-        revenue = self._extract_revenue(company_data)
-        ebitda = self._extract_ebitda_margin(company_data)
-        
         if revenue and ebitda:
             # Very rough approximation: EBITDA as percentage of revenue → cash flow
             estimated_cf = revenue * (ebitda / 100) * 0.8  # 80% of EBITDA as proxy for FCF
@@ -624,14 +765,13 @@ class InvestmentCriteriaValidator:
         
         return None
     
-    def _extract_capex(self, company_data):
+    def _extract_capex(self, company_data, industry):
         """Extracts capital expenditure requirements from company data"""
         # Check if we have verified financial data
         if company_data.get('financials', {}).get('capex_requirements') is not None:
             return company_data['financials']['capex_requirements']
         
         # Try to infer from industry type
-        industry = self._extract_industry_type(company_data)
         if industry:
             low_capex_industries = ['software', 'consulting', 'professional services', 
                                   'financial services', 'marketing', 'digital']
@@ -651,7 +791,7 @@ class InvestmentCriteriaValidator:
         
         return None
     
-    def _extract_recurring_revenue_pct(self, company_data):
+    def _extract_recurring_revenue_pct(self, company_data, data_text):
         """Extracts recurring revenue percentage from company data"""
         financials = company_data.get('financials', {})
         
@@ -665,7 +805,7 @@ class InvestmentCriteriaValidator:
             return recurring_pct
         
         # Try to infer from business model
-        business_model = self._extract_business_model(company_data)
+        business_model = self._extract_business_model(data_text())
         if business_model:
             if 'subscription' in business_model.lower():
                 return 80  # Subscription businesses typically have high recurring revenue
@@ -707,14 +847,13 @@ class InvestmentCriteriaValidator:
         
         return None
     
-    def _extract_operations_complexity(self, company_data):
+    def _extract_operations_complexity(self, company_data, industry):
         """Extracts operations complexity from company data"""
         # Check if we have verified business details
         if company_data.get('business_details', {}).get('operations_complexity') is not None:
             return company_data['business_details']['operations_complexity']
         
         # Try to infer from industry type
-        industry = self._extract_industry_type(company_data)
         if industry:
             simple_ops_industries = ['software', 'digital services', 'consulting']
             complex_ops_industries = ['manufacturing', 'logistics', 'healthcare']
@@ -758,7 +897,7 @@ class InvestmentCriteriaValidator:
         
         return None
     
-    def _extract_service_based(self, company_data):
+    def _extract_service_based(self, company_data, industry):
         """Determines if company is service-based"""
         # Check if we have verified industry details
         if company_data.get('industry_details', {}).get('industry_type') is not None:
@@ -771,7 +910,6 @@ class InvestmentCriteriaValidator:
                 return 'product'
         
         # Try to infer from other data
-        industry = self._extract_industry_type(company_data)
         if industry:
             service_industries = ['consulting', 'professional services', 'software as a service',
                                 'managed services', 'outsourcing', 'support']
@@ -789,10 +927,9 @@ class InvestmentCriteriaValidator:
         
         return None
     
-    def _extract_recurring_revenue_model(self, company_data):
+    def _extract_recurring_revenue_model(self, recurring_pct, data_text):
         """Evaluates strength of recurring revenue model"""
         # Check recurring revenue percentage
-        recurring_pct = self._extract_recurring_revenue_pct(company_data)
         if recurring_pct:
             if recurring_pct >= 70:
                 return 'strong'
@@ -802,7 +939,7 @@ class InvestmentCriteriaValidator:
                 return 'weak'
         
         # Try to infer from business model
-        business_model = self._extract_business_model(company_data)
+        business_model = self._extract_business_model(data_text())
         if business_model:
             strong_recurring = ['subscription', 'saas', 'retainer']
             moderate_recurring = ['services', 'maintenance', 'support']
@@ -817,7 +954,7 @@ class InvestmentCriteriaValidator:
         
         return None
     
-    def _extract_b2b_focus(self, company_data):
+    def _extract_b2b_focus(self, company_data, data_text):
         """Determines if company is B2B focused"""
         # Check if we have verified industry details
         if company_data.get('industry_details', {}).get('b2b_percentage') is not None:
@@ -830,7 +967,7 @@ class InvestmentCriteriaValidator:
                 return 'b2c'
         
         # Try simple text analysis if BERT is not available
-        data_str = str(company_data).lower()
+        data_str = data_text()
         b2b_indicators = ['enterprise', 'business customer', 'corporate', 'client', 
                        'organization', 'solution', 'platform']
         b2c_indicators = ['consumer', 'personal', 'individual', 'user', 'customer']
@@ -881,11 +1018,10 @@ class InvestmentCriteriaValidator:
         
         return None
     
-    def _extract_business_model(self, company_data):
-        """Helper method to extract business model"""
+    def _extract_business_model(self, data_str):
+        """Helper method to extract business model from lowercased company text"""
         # This would normally use NLP to extract from text content
         # Simplified version checks for keywords in the data
-        data_str = str(company_data).lower()
         
         if 'subscription' in data_str:
             return 'subscription'
@@ -0,0 +1,288 @@
+"""
+Job queue for long-running analyses.
+
+A JobQueue is a local broker: submitted jobs wait in a bounded queue and run
+on a pool of worker threads, so no external service is needed. Each job
+keeps its status, current stage, progress percentage and an ordered list of
+events. Job state and events are written to a SQLite database shared by all
+worker processes on the node, so a job accepted by one gunicorn worker can be
+polled, or its events streamed, from any other. Clients either poll a
+snapshot of the job or block in events() until something new happens, which
+is what the Server-Sent Events route streams. Finished jobs are kept for a
+retention period and then dropped.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.storage import default_path, json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_DB_PATH = default_path('JOB_DB_PATH', 'data', 'jobs.sqlite3')
+
+FINISHED_STATES = ('complete', 'failed')
+
+# Seconds between checks for events written by other processes
+EVENT_POLL_INTERVAL = 0.5
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of pending jobs"""
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'), default=json_default)
+
+
+class JobStore:
+    """SQLite (WAL) table of job state and events, shared across processes"""
+
+    def __init__(self, path=DEFAULT_JOB_DB_PATH):
+        """
+        Initialize the store
+
+        Args:
+            path (str): SQLite database file, ':memory:' for a process-local store
+        """
+        self.path = path
+        self._local = threading.local()
+        self._shared_conn = None
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_db()
+
+    def _connect(self):
+        """Returns this thread's connection (a single shared one for in-memory stores)"""
+        if self.path == ':memory:':
+            if self._shared_conn is None:
+                self._shared_conn = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+            return self._shared_conn
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _init_db(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress NUMERIC NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    finished_at TEXT,
+                    finished_time REAL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    event_id INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (job_id, event_id)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_finished_time ON jobs (finished_time)')
+
+    def create(self, job_id, kind):
+        self._execute(
+            "INSERT INTO jobs (id, kind, status, stage, progress, created_at) VALUES (?, ?, 'queued', 'queued', 0, ?)",
+            (job_id, kind, datetime.now().isoformat())
+        )
+
+    def update(self, job_id, **fields):
+        if 'result' in fields:
+            fields['result'] = _dumps(fields['result']) if fields['result'] is not None else None
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        self._execute(f'UPDATE jobs SET {assignments} WHERE id = ?', list(fields.values()) + [job_id])
+
+    def add_event(self, job_id, event_id, event, data):
+        self._execute('INSERT INTO job_events VALUES (?, ?, ?, ?)', (job_id, event_id, event, _dumps(data)))
+
+    def get(self, job_id, include_result=True):
+        rows = self._execute(
+            'SELECT id, kind, status, stage, progress, created_at, finished_at, error, result FROM jobs WHERE id = ?',
+            (job_id,)
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        data = {
+            'job_id': row[0],
+            'kind': row[1],
+            'status': row[2],
+            'stage': row[3],
+            'progress': row[4],
+            'created_at': row[5],
+            'finished_at': row[6]
+        }
+        if row[7]:
+            data['error'] = row[7]
+        if include_result and row[8] is not None:
+            data['result'] = json.loads(row[8])
+        return data
+
+    def events(self, job_id, after=0):
+        """Events of a job after the given event id, as (event id, event name, data)"""
+        rows = self._execute(
+            'SELECT event_id, event, data FROM job_events WHERE job_id = ? AND event_id > ? ORDER BY event_id',
+            (job_id, after)
+        )
+        return [(event_id, event, json.loads(data)) for event_id, event, data in rows]
+
+    def prune(self, cutoff):
+        """Drops jobs that finished before the cutoff (epoch seconds) and their events"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute(
+                    'DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE finished_time < ?)', (cutoff,)
+                )
+                conn.execute('DELETE FROM jobs WHERE finished_time < ?', (cutoff,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+
+class JobQueue:
+    """Bounded local job broker with a worker thread pool and per-job progress events"""
+
+    def __init__(self, max_workers=4, max_pending=100, retention=3600, name='jobs', store=None):
+        """
+        Initialize the queue
+
+        Args:
+            max_workers (int): Worker threads executing jobs
+            max_pending (int): Queued or running jobs accepted (per process) before submit() rejects new ones
+            retention (int): Seconds a finished job stays available to clients
+            store (JobStore): Shared job state; defaults to the JOB_DB_PATH database
+        """
+        self.max_pending = max_pending
+        self.retention = retention
+        self.store = store or JobStore()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._pending = 0
+        self._event_counts = {}     # job id -> events written, for jobs running in this process
+        self._changed = threading.Condition()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queue fn(*args, progress=callback, **kwargs) and return the job id
+
+        fn reports progress by calling progress(stage, percent); its return
+        value becomes the job result. An exception marks the job failed.
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+        """
+        with self._changed:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"{self._pending} jobs are already pending")
+            self._pending += 1
+
+        try:
+            self.store.prune(time.time() - self.retention)
+            job_id = uuid.uuid4().hex
+            self.store.create(job_id, kind)
+            self._event_counts[job_id] = 0
+            self._emit(job_id, 'queued', {'stage': 'queued', 'progress': 0})
+            self._executor.submit(self._run, job_id, kind, fn, args, kwargs)
+        except Exception:
+            with self._changed:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def _run(self, job_id, kind, fn, args, kwargs):
+        def progress(stage, percent):
+            self.store.update(job_id, stage=stage, progress=percent)
+            self._emit(job_id, 'progress', {'stage': stage, 'progress': percent})
+
+        self.store.update(job_id, status='running')
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+            self._finish(job_id, 'complete', result=result)
+        except Exception as e:
+            logger.error(f"{kind} job {job_id} failed: {str(e)}", exc_info=True)
+            self._finish(job_id, 'failed', error=str(e))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        try:
+            fields = {'status': status, 'stage': status, 'result': result, 'error': error,
+                      'finished_at': datetime.now().isoformat(), 'finished_time': time.time()}
+            if status == 'complete':
+                fields['progress'] = 100
+            snapshot = self.store.get(job_id, include_result=False)
+            snapshot.update({name: value for name, value in fields.items()
+                             if name != 'finished_time' and value is not None})
+            # The final event is written before the status, so a reader that sees
+            # the job finished always finds its final event
+            self._emit(job_id, status, snapshot)
+            self.store.update(job_id, **fields)
+        finally:
+            self._event_counts.pop(job_id, None)
+            with self._changed:
+                self._pending -= 1
+                self._changed.notify_all()
+
+    def _emit(self, job_id, event, data):
+        """Appends an event and wakes waiting subscribers in this process"""
+        self._event_counts[job_id] += 1
+        self.store.add_event(job_id, self._event_counts[job_id], event, data)
+        with self._changed:
+            self._changed.notify_all()
+
+    def get(self, job_id):
+        """Snapshot of a job, or None if unknown or expired"""
+        return self.store.get(job_id)
+
+    def events(self, job_id, after=0, timeout=15):
+        """
+        Events of a job after the given event id, waiting up to timeout seconds for new ones
+
+        Jobs running in this process wake the wait as soon as they emit; jobs
+        running in other processes are noticed within EVENT_POLL_INTERVAL.
+
+        Returns:
+            tuple: (list of (event id, event name, data), finished flag), or None if the job is unknown
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id, include_result=False)
+            if job is None:
+                return None
+            new_events = self.store.events(job_id, after)
+            finished = job['status'] in FINISHED_STATES
+            remaining = deadline - time.monotonic()
+            if new_events or finished or remaining <= 0:
+                return new_events, finished
+            with self._changed:
+                self._changed.wait(min(remaining, EVENT_POLL_INTERVAL))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
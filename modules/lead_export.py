@@ -0,0 +1,474 @@
+"""
+Streaming lead exports.
+
+Exports read leads either from the request payload (the single-lead exports
+of the web UI) or from the lead store by id or filter, and render them as a
+generator of text chunks. Routes hand the generator to a streaming response,
+so memory use does not grow with the number of exported leads.
+
+CSV and JSON are streamed as they are rendered. XLSX and PDF are containers
+that can only be finished once every row is written: they are rendered into
+a temporary file first, so the first byte is sent only after the whole file
+exists on disk (memory use stays flat; time to first byte grows with size).
+"""
+
+import io
+import os
+import csv
+import json
+import zlib
+import logging
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+
+from utils.storage import json_default
+
+logger = logging.getLogger(__name__)
+
+# Optional faster serializer and compressor
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+try:
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen import canvas as pdf_canvas
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# Bytes per chunk when streaming a rendered file
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Rows rendered per yielded chunk
+EXPORT_CHUNK_ROWS = 500
+
+# reportlab keeps every page of a document in memory until it is saved, so PDF
+# reports stop at this many leads; CSV, XLSX and JSON exports are unbounded
+PDF_MAX_ROWS = int(os.environ.get('PDF_EXPORT_MAX_ROWS', 5000))
+
+CSV_HEADERS = [
+    'Company Name',
+    'Website',
+    'Lead Score',
+    'Lead Tier',
+    'AI Readiness Score',
+    'Company Size',
+    'Outreach Timing',
+    'Contact Name',
+    'Contact Title',
+    'Contact Email',
+    'Contact Phone',
+    'Recommended Approach',
+    'Conversation Starters',
+    'Pain Points',
+    'Verification Status',
+    'Verification Date',
+    'CRM Status'
+]
+
+# Shorter column set used for emailed exports
+EMAIL_CSV_HEADERS = [
+    'Company Name',
+    'Website',
+    'Lead Score',
+    'Lead Tier',
+    'AI Readiness Score',
+    'Company Size',
+    'Contact Name',
+    'Contact Title',
+    'Verification Status'
+]
+
+
+# field_selection layout of the JSON export: section -> [(selection key, output key, getter)]
+FIELD_SELECTION_SPEC = {
+    'company': [
+        ('name', 'name', lambda lead: lead.get('company_name', '')),
+        ('website', 'website', lambda lead: lead.get('url', '')),
+        ('size', 'size', lambda lead: lead.get('company_size_indicator', ''))
+    ],
+    'contact': [
+        (key, key, lambda lead, key=key: lead.get('sales_insights', {}).get('primary_contact', {}).get(key, ''))
+        for key in ['name', 'title', 'email', 'phone']
+    ],
+    'assessment': [
+        ('aiScore', 'aiReadinessScore', lambda lead: lead.get('ai_readiness_score', 0)),
+        ('leadScore', 'leadScore', lambda lead: lead.get('sales_insights', {}).get('lead_score', 0)),
+        ('leadTier', 'leadTier', lambda lead: lead.get('sales_insights', {}).get('lead_tier', '')),
+        ('painPoints', 'painPoints', lambda lead: lead.get('sales_insights', {}).get('pain_points', []))
+    ],
+    'verification': [
+        (key, key, lambda lead, key=key: lead.get('verification', {}).get(key, ''))
+        for key in ['status', 'date', 'notes']
+    ]
+}
+
+# Sections only exported when the lead has the underlying data
+SECTION_REQUIRES = {
+    'contact': lambda lead: lead.get('sales_insights', {}).get('primary_contact'),
+    'verification': lambda lead: lead.get('verification')
+}
+
+
+def compile_field_selection(field_selection):
+    """
+    Compile a field_selection into a projection function
+
+    The selection is resolved once per export; the returned function only
+    runs the getters of the selected fields for each lead. Without a
+    selection, leads are exported unchanged.
+    """
+    if not field_selection:
+        return lambda lead: lead
+
+    sections = []
+    for section, fields in FIELD_SELECTION_SPEC.items():
+        selected = field_selection.get(section, {})
+        if any(selected.values()):
+            getters = [(output, getter) for key, output, getter in fields if selected.get(key)]
+            sections.append((section, getters, SECTION_REQUIRES.get(section)))
+
+    def project(lead):
+        projected = {}
+        for section, getters, requires in sections:
+            if requires is None or requires(lead):
+                projected[section] = {output: getter(lead) for output, getter in getters}
+        return projected
+
+    return project
+
+
+def dumps(value):
+    """Compact JSON bytes, using orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, separators=(',', ':'), default=json_default).encode('utf-8')
+
+
+def select_export_leads(store, data):
+    """
+    Leads to export for a request payload
+
+    The payload is either {'lead_ids': [...]} and/or {'filters': {...}} to
+    export from the lead store, or the lead data itself (one lead, a list of
+    leads, or {'leads': [...]}).
+
+    Returns:
+        iterable: Leads, streamed from the store when selected by id or filter
+    """
+    if isinstance(data, dict) and ('lead_ids' in data or 'filters' in data):
+        return store.iter_leads(data.get('filters') or None, lead_ids=data.get('lead_ids'))
+
+    leads = data.get('leads', data) if isinstance(data, dict) else data
+    return leads if isinstance(leads, list) else [leads]
+
+
+def is_single_lead(data):
+    """True if the payload is one lead's data (exported as an object rather than an array)"""
+    return isinstance(data, dict) and 'lead_ids' not in data and 'filters' not in data \
+        and isinstance(data.get('leads', data), dict)
+
+
+def csv_row(lead):
+    """CSV export row for one lead (CSV_HEADERS columns)"""
+    sales_insights = lead.get('sales_insights', {})
+    crm_data = sales_insights.get('crm_ready', {})
+    outreach = sales_insights.get('outreach_recommendation', {})
+    pain_points = sales_insights.get('pain_points', [])
+    verification = lead.get('verification', {})
+    crm_status = lead.get('crm', {})
+
+    company = crm_data.get('company', {})
+    contact = crm_data.get('contact', {})
+    approach = outreach.get('approach', {})
+
+    return [
+        lead.get('company_name', company.get('name', '')),
+        lead.get('url', company.get('website', '')),
+        sales_insights.get('lead_score', company.get('lead_score', '')),
+        sales_insights.get('lead_tier', company.get('lead_tier', '')),
+        lead.get('ai_readiness_score', company.get('ai_readiness_score', '')),
+        lead.get('company_size_indicator', company.get('size', '')),
+        outreach.get('timing', company.get('outreach_timing', '')),
+        contact.get('name', ''),
+        contact.get('title', ''),
+        contact.get('email', ''),
+        contact.get('phone', ''),
+        approach.get('focus', ''),
+        '; '.join(approach.get('conversation_starters', [])),
+        '; '.join(pain_points[:3]),  # Include up to 3 pain points
+        verification.get('status', 'Pending'),
+        verification.get('date', ''),
+        crm_status.get('status', 'Not Synced')
+    ]
+
+
+def email_csv_row(lead):
+    """CSV row for emailed exports (EMAIL_CSV_HEADERS columns)"""
+    sales_insights = lead.get('sales_insights', {})
+    primary_contact = sales_insights.get('primary_contact', {})
+    return [
+        lead.get('company_name', ''),
+        lead.get('url', ''),
+        sales_insights.get('lead_score', ''),
+        sales_insights.get('lead_tier', ''),
+        lead.get('ai_readiness_score', ''),
+        lead.get('company_size_indicator', ''),
+        primary_contact.get('name', ''),
+        primary_contact.get('title', ''),
+        lead.get('verification', {}).get('status', 'Pending')
+    ]
+
+
+def iter_csv(leads, headers=CSV_HEADERS, row=csv_row, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Render leads as CSV, yielding one text chunk per chunk_rows rows
+
+    Only the current chunk is buffered, so any number of leads can be exported
+    in constant memory.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    rows = 0
+
+    for lead in leads:
+        writer.writerow(row(lead))
+        rows += 1
+        if rows % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+    logger.info(f"Exported {rows} leads as CSV")
+
+
+def iter_json(leads, project=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Render leads as a JSON array, yielding bytes chunks"""
+    project = project or (lambda lead: lead)
+    parts = [b'[']
+    rows = 0
+    for lead in leads:
+        if rows:
+            parts.append(b',')
+        parts.append(dumps(project(lead)))
+        rows += 1
+        if rows % chunk_rows == 0:
+            yield b''.join(parts)
+            parts = []
+    parts.append(b']')
+    yield b''.join(parts)
+    logger.info(f"Exported {rows} leads as JSON")
+
+
+def iter_ndjson(leads, project=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Render leads as JSON Lines (one lead per line), yielding bytes chunks"""
+    project = project or (lambda lead: lead)
+    parts = []
+    rows = 0
+    for lead in leads:
+        parts.append(dumps(project(lead)) + b'\n')
+        rows += 1
+        if rows % chunk_rows == 0:
+            yield b''.join(parts)
+            parts = []
+    if parts:
+        yield b''.join(parts)
+    logger.info(f"Exported {rows} leads as NDJSON")
+
+
+# Compression name -> file suffix
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def compress_chunks(chunks, compression):
+    """
+    Compress a stream of text or bytes chunks with gzip or zstd
+
+    Raises:
+        ValueError: For unknown compression, or zstd when zstandard is not installed
+    """
+    if compression == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    elif compression == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd compression requires the zstandard package")
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return _compress(chunks, compressor)
+
+
+def _compress(chunks, compressor):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _iter_file(f, chunk_size=FILE_CHUNK_SIZE):
+    """Streams a rendered temporary file and closes it"""
+    try:
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+
+def iter_xlsx(leads):
+    """
+    Render leads as an XLSX workbook with the CSV_HEADERS columns
+
+    Uses openpyxl's write-only mode, which streams rows to disk instead of
+    building the worksheet in memory. The response is buffered: the workbook
+    is saved to a temporary file before its first byte is yielded.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Leads')
+    sheet.append(CSV_HEADERS)
+    rows = 0
+    for lead in leads:
+        sheet.append(csv_row(lead))
+        rows += 1
+
+    f = tempfile.TemporaryFile()
+    workbook.save(f)
+    logger.info(f"Exported {rows} leads as XLSX")
+    return _iter_file(f)
+
+
+# PDF report columns: (header, index into csv_row, width in points)
+PDF_COLUMNS = [
+    ('Company', 0, 150),
+    ('Website', 1, 190),
+    ('Lead Score', 2, 60),
+    ('Tier', 3, 60),
+    ('AI Score', 4, 55),
+    ('Verification', 14, 90),
+    ('CRM', 16, 90)
+]
+
+
+class PdfLeadTemplate:
+    """Page layout of the PDF lead report, computed once and reused by every export"""
+
+    font = 'Helvetica'
+    bold_font = 'Helvetica-Bold'
+    font_size = 8
+    row_height = 14
+    margin = 36
+
+    def __init__(self):
+        self.page_size = landscape(letter)
+        width, height = self.page_size
+        self.top = height - self.margin - 40
+        self.columns = []
+        x = self.margin
+        for header, index, column_width in PDF_COLUMNS:
+            self.columns.append((header, index, x, column_width))
+            x += column_width
+        self.rows_per_page = int((self.top - self.margin) // self.row_height)
+
+    def fit(self, text, width):
+        """Truncates text to the column width"""
+        text = '' if text is None else str(text)
+        limit = width - 4
+        if stringWidth(text, self.font, self.font_size) <= limit:
+            return text
+        while text and stringWidth(text + '...', self.font, self.font_size) > limit:
+            text = text[:-1]
+        return text + '...'
+
+    def draw_header(self, canvas, page, generated):
+        width, height = self.page_size
+        canvas.setFont(self.bold_font, 14)
+        canvas.drawString(self.margin, height - self.margin - 10, 'Lead Report')
+        canvas.setFont(self.font, self.font_size)
+        canvas.drawRightString(width - self.margin, height - self.margin - 10, f'{generated} - page {page}')
+        canvas.setFont(self.bold_font, self.font_size)
+        for header, _, x, _ in self.columns:
+            canvas.drawString(x, self.top, header)
+        canvas.line(self.margin, self.top - 4, width - self.margin, self.top - 4)
+        canvas.setFont(self.font, self.font_size)
+
+    def draw_row(self, canvas, y, values):
+        for _, index, x, column_width in self.columns:
+            canvas.drawString(x, y, self.fit(values[index], column_width))
+
+
+@lru_cache(maxsize=1)
+def get_pdf_template():
+    """Returns the shared PDF report layout"""
+    return PdfLeadTemplate()
+
+
+def iter_pdf(leads, max_rows=None):
+    """
+    Render leads as a tabular PDF report and stream it
+
+    At most max_rows leads (PDF_MAX_ROWS by default) are rendered; a longer
+    selection ends with a note pointing to the CSV and XLSX exports. Page
+    content is compressed, which keeps the pages held until save() small. The
+    response is buffered: the report is written to a temporary file before its
+    first byte is yielded.
+    """
+    max_rows = PDF_MAX_ROWS if max_rows is None else max_rows
+    template = get_pdf_template()
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M')
+
+    f = tempfile.TemporaryFile()
+    canvas = pdf_canvas.Canvas(f, pagesize=template.page_size, pageCompression=1)
+    page = 1
+    template.draw_header(canvas, page, generated)
+    rows = 0
+    truncated = False
+    for lead in leads:
+        if rows >= max_rows:
+            truncated = True
+            break
+        if rows and rows % template.rows_per_page == 0:
+            canvas.showPage()
+            page += 1
+            template.draw_header(canvas, page, generated)
+        y = template.top - template.row_height * (rows % template.rows_per_page + 1)
+        template.draw_row(canvas, y, csv_row(lead))
+        rows += 1
+
+    if truncated:
+        if rows % template.rows_per_page == 0:
+            canvas.showPage()
+            template.draw_header(canvas, page + 1, generated)
+        y = template.top - template.row_height * (rows % template.rows_per_page + 1)
+        canvas.setFont(template.bold_font, template.font_size)
+        canvas.drawString(template.margin, y,
+                          f'Report limited to the first {max_rows} leads; use the CSV or XLSX export for the full list.')
+        logger.warning(f"PDF export truncated at {max_rows} leads")
+    canvas.save()
+    logger.info(f"Exported {rows} leads as PDF")
+    return _iter_file(f)
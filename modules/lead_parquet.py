@@ -0,0 +1,278 @@
+"""
+Columnar (Parquet / Arrow IPC) export and import of the lead book.
+
+Leads are mapped onto a fixed Arrow schema: flat summary columns for
+filtering in pandas or BI tools, typed struct/map columns for the nested
+score components, technology indicators, financials and investment match,
+and the complete lead as JSON in 'lead_json' so an import restores it
+losslessly. Exports are written one row group (record batch) at a time from
+a streaming lead iterator, and the encoded bytes are yielded after each row
+group, so memory stays bounded by the row group size.
+"""
+
+import json
+import logging
+
+from utils.storage import json_default_str
+
+from .lead_store import lead_domain
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logger.warning("pyarrow not available, Parquet/Arrow lead export is disabled")
+
+# Leads per row group / record batch
+ROW_GROUP_SIZE = 10000
+
+FINANCIAL_COLUMNS = ['annual_revenue', 'free_cash_flow', 'ebitda_margin', 'capex_to_revenue',
+                     'market_cap', 'recurring_revenue_percentage']
+
+
+def _build_schema():
+    criteria = pa.struct([
+        ('score', pa.float64()),
+        ('criteria_met', pa.list_(pa.string())),
+        ('criteria_missed', pa.list_(pa.string()))
+    ])
+    return pa.schema([
+        ('id', pa.string()),
+        ('url', pa.string()),
+        ('domain', pa.string()),
+        ('company_name', pa.string()),
+        ('company_size_indicator', pa.string()),
+        ('ai_readiness_score', pa.float64()),
+        ('lead_score', pa.float64()),
+        ('lead_tier', pa.string()),
+        ('verification_status', pa.string()),
+        ('verification_date', pa.string()),
+        ('crm_status', pa.string()),
+        ('financials_status', pa.string()),
+        ('score_components', pa.struct([
+            ('technology_score', pa.float64()),
+            ('leadership_score', pa.float64()),
+            ('growth_score', pa.float64())
+        ])),
+        ('lead_score_components', pa.struct([
+            ('decision_maker_score', pa.float64()),
+            ('tech_investment_score', pa.float64()),
+            ('growth_score', pa.float64()),
+            ('ai_readiness_factor', pa.float64())
+        ])),
+        ('tech_indicators', pa.map_(pa.string(), pa.struct([
+            ('total', pa.int64()),
+            ('indicators', pa.map_(pa.string(), pa.int64()))
+        ]))),
+        ('financials', pa.struct(
+            [('ticker', pa.string())] + [(column, pa.float64()) for column in FINANCIAL_COLUMNS]
+        )),
+        ('investment_match', pa.struct([
+            ('overall_match', pa.float64()),
+            ('match_tier', pa.string()),
+            ('confidence', pa.float64()),
+            ('business_criteria', criteria),
+            ('industry_criteria', criteria),
+            ('financial_criteria', criteria),
+            ('key_strengths', pa.list_(pa.string())),
+            ('key_concerns', pa.list_(pa.string()))
+        ])),
+        ('lead_json', pa.large_string())
+    ])
+
+
+LEAD_SCHEMA = _build_schema() if PYARROW_AVAILABLE else None
+
+
+def _float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _str(value):
+    return str(value) if value is not None else None
+
+
+def _strings(values):
+    return [str(value) for value in values] if isinstance(values, list) else None
+
+
+def _criteria(match):
+    if not isinstance(match, dict):
+        return None
+    return {
+        'score': _float(match.get('score')),
+        'criteria_met': _strings(match.get('criteria_met')),
+        'criteria_missed': _strings(match.get('criteria_missed'))
+    }
+
+
+def lead_record(lead):
+    """Maps a lead onto LEAD_SCHEMA"""
+    sales_insights = lead.get('sales_insights') or {}
+    verification = lead.get('verification') or {}
+    score_components = lead.get('score_components') or {}
+    lead_components = sales_insights.get('score_components') or {}
+    financials = lead.get('financials') or {}
+    match = lead.get('investment_match') or {}
+
+    tech_indicators = None
+    if isinstance(lead.get('tech_indicators'), dict):
+        tech_indicators = [
+            (str(category), {
+                'total': _int(data.get('total')),
+                'indicators': [(str(k), _int(v)) for k, v in (data.get('indicators') or {}).items()]
+            })
+            for category, data in lead['tech_indicators'].items() if isinstance(data, dict)
+        ]
+
+    return {
+        'id': _str(lead.get('id')),
+        'url': _str(lead.get('url')),
+        'domain': lead_domain(lead.get('url')),
+        'company_name': _str(lead.get('company_name')),
+        'company_size_indicator': _str(lead.get('company_size_indicator')),
+        'ai_readiness_score': _float(lead.get('ai_readiness_score')),
+        'lead_score': _float(sales_insights.get('lead_score')),
+        'lead_tier': _str(sales_insights.get('lead_tier')),
+        'verification_status': _str(verification.get('status')),
+        'verification_date': _str(verification.get('date')),
+        'crm_status': _str((lead.get('crm') or {}).get('status')),
+        'financials_status': _str(lead.get('financials_status')),
+        'score_components': {key: _float(score_components.get(key))
+                             for key in ['technology_score', 'leadership_score', 'growth_score']},
+        'lead_score_components': {key: _float(lead_components.get(key))
+                                  for key in ['decision_maker_score', 'tech_investment_score',
+                                              'growth_score', 'ai_readiness_factor']},
+        'tech_indicators': tech_indicators,
+        'financials': dict({column: _float(financials.get(column)) for column in FINANCIAL_COLUMNS},
+                           ticker=_str(financials.get('ticker'))) if financials else None,
+        'investment_match': {
+            'overall_match': _float(match.get('overall_match')),
+            'match_tier': _str(match.get('match_tier')),
+            'confidence': _float(match.get('confidence')),
+            'business_criteria': _criteria(match.get('business_criteria')),
+            'industry_criteria': _criteria(match.get('industry_criteria')),
+            'financial_criteria': _criteria(match.get('financial_criteria')),
+            'key_strengths': _strings(match.get('key_strengths')),
+            'key_concerns': _strings(match.get('key_concerns'))
+        } if match else None,
+        'lead_json': json.dumps(lead, separators=(',', ':'), default=json_default_str)
+    }
+
+
+def iter_record_batches(leads, batch_size=ROW_GROUP_SIZE):
+    """Yields RecordBatches of up to batch_size leads"""
+    records = []
+    for lead in leads:
+        records.append(lead_record(lead))
+        if len(records) >= batch_size:
+            yield pa.RecordBatch.from_pylist(records, schema=LEAD_SCHEMA)
+            records = []
+    if records:
+        yield pa.RecordBatch.from_pylist(records, schema=LEAD_SCHEMA)
+
+
+class _ChunkSink:
+    """Write-only file object that collects written bytes until drained"""
+
+    def __init__(self):
+        self.closed = False
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_parquet(leads, row_group_size=ROW_GROUP_SIZE, compression='zstd'):
+    """Render leads as a Parquet file, yielding the bytes written after each row group"""
+    sink = _ChunkSink()
+    rows = 0
+    with pq.ParquetWriter(sink, LEAD_SCHEMA, compression=compression) as writer:
+        for batch in iter_record_batches(leads, row_group_size):
+            writer.write_batch(batch, row_group_size=row_group_size)
+            rows += batch.num_rows
+            yield sink.drain()
+    yield sink.drain()
+    logger.info(f"Exported {rows} leads as Parquet")
+
+
+def iter_arrow(leads, batch_size=ROW_GROUP_SIZE):
+    """Render leads as an Arrow IPC file, yielding the bytes written after each record batch"""
+    sink = _ChunkSink()
+    rows = 0
+    with pa.ipc.new_file(sink, LEAD_SCHEMA) as writer:
+        for batch in iter_record_batches(leads, batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            yield sink.drain()
+    yield sink.drain()
+    logger.info(f"Exported {rows} leads as Arrow")
+
+
+def _batches(source, fmt):
+    if fmt == 'arrow':
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+    else:
+        yield from pq.ParquetFile(source).iter_batches(batch_size=ROW_GROUP_SIZE)
+
+
+def iter_imported_leads(source, fmt='parquet'):
+    """
+    Read leads back from a Parquet or Arrow file written by this module
+
+    Rows without 'lead_json' (e.g. files produced by other tools with the same
+    column names) are rebuilt from the flat summary columns.
+
+    Args:
+        source: Path, file object or buffer
+        fmt (str): 'parquet' or 'arrow'
+    """
+    for batch in _batches(source, fmt):
+        for row in batch.to_pylist():
+            if row.get('lead_json'):
+                yield json.loads(row['lead_json'])
+            elif row.get('id'):
+                yield {
+                    'id': row['id'],
+                    'url': row.get('url'),
+                    'company_name': row.get('company_name'),
+                    'company_size_indicator': row.get('company_size_indicator'),
+                    'ai_readiness_score': row.get('ai_readiness_score'),
+                    'sales_insights': {'lead_score': row.get('lead_score'), 'lead_tier': row.get('lead_tier')},
+                    'verification': {'status': row.get('verification_status'),
+                                     'date': row.get('verification_date')},
+                    'crm': {'status': row.get('crm_status')}
+                }
@@ -0,0 +1,774 @@
+"""
+Durable lead storage.
+
+LeadStore is the storage interface used by the application routes. The
+default SQLiteLeadStore keeps each lead in one row of a WAL-mode SQLite
+database: the fields routes filter and sort on (url/domain, lead tier and
+score, AI readiness score, verification, CRM and enrichment status) are
+indexed columns, and the full nested lead is stored as zlib-compressed JSON.
+Leads survive restarts, are shared by every worker process on the node and
+are streamed from disk instead of being held in memory. JournalLeadStore
+keeps leads in an append-only JSON-lines journal instead.
+"""
+
+import os
+import json
+import zlib
+import base64
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+from utils.storage import REPO_ROOT, default_path, json_default
+from utils.lead_journal import LeadJournal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEAD_DB_PATH = default_path('LEAD_DB_PATH', 'data', 'leads.sqlite3')
+DEFAULT_LEAD_JOURNAL_PATH = default_path('LEADS_JOURNAL_PATH', 'data', 'leads.jsonl')
+
+# leads.json array written by earlier versions of utils.helpers, imported into a new journal
+LEGACY_LEADS_PATH = os.path.join(REPO_ROOT, 'utils', 'data', 'leads.json')
+
+
+# Fields /get-leads can sort on, with the value NULLs sort as
+SORT_FIELDS = {
+    'created_at': "''",
+    'updated_at': "''",
+    'lead_score': '-1',
+    'ai_readiness_score': '-1',
+    'company_name': "''",
+    'lead_tier': "''"
+}
+
+# Flat summary columns served from the index without decoding lead blobs
+SUMMARY_FIELDS = ['id', 'url', 'domain', 'company_name', 'lead_tier', 'lead_score', 'ai_readiness_score',
+                  'verification_status', 'crm_status', 'financials_status', 'created_at', 'updated_at']
+
+
+# Lead fields batch validation reads when the lead carries a stored feature record
+VALIDATION_FIELDS = ['id', 'url', 'company_name', 'verification.status', 'investment_match.features']
+
+# Analyst workflow state kept when a lead for a stored domain is saved again
+REANALYSIS_KEEP_FIELDS = ('verification', 'crm')
+
+
+def encode_cursor(sort_value, lead_id):
+    """Opaque pagination cursor for the position after a lead"""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, lead_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Returns (sort_value, lead_id) from a cursor; raises ValueError if malformed"""
+    try:
+        sort_value, lead_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return sort_value, lead_id
+
+
+def project_lead(lead, fields):
+    """Copy of a lead restricted to the given (optionally dotted) field paths"""
+    projected = {}
+    for path in fields:
+        value = lead
+        parts = path.split('.')
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
+
+def validation_record(lead):
+    """
+    The part of a lead batch validation needs
+
+    Leads with a stored feature record are reduced to VALIDATION_FIELDS; leads
+    without one are returned whole so their features can be extracted.
+    """
+    if isinstance((lead.get('investment_match') or {}).get('features'), dict):
+        return project_lead(lead, VALIDATION_FIELDS)
+    return lead
+
+
+def lead_domain(url):
+    """Normalized domain of a lead URL (lowercase, without www.)"""
+    if not url:
+        return None
+    netloc = urlparse(url if '://' in url else f'https://{url}').netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc or None
+
+
+def lead_index_values(lead):
+    """Indexed column values for a lead"""
+    sales_insights = lead.get('sales_insights') or {}
+    return {
+        'url': lead.get('url'),
+        'domain': lead_domain(lead.get('url')),
+        'company_name': lead.get('company_name'),
+        'lead_tier': sales_insights.get('lead_tier'),
+        'lead_score': sales_insights.get('lead_score'),
+        'ai_readiness_score': lead.get('ai_readiness_score'),
+        'verification_status': (lead.get('verification') or {}).get('status'),
+        'crm_status': (lead.get('crm') or {}).get('status'),
+        'financials_status': lead.get('financials_status')
+    }
+
+
+class LeadStore:
+    """Storage interface for leads; leads are dicts keyed by their 'id'"""
+
+    def get(self, lead_id):
+        """Return a lead or None"""
+        raise NotImplementedError
+
+    def get_many(self, lead_ids):
+        """Return the leads that exist for the given ids, in the given order"""
+        leads = (self.get(lead_id) for lead_id in lead_ids)
+        return [lead for lead in leads if lead is not None]
+
+    def put(self, lead):
+        """Insert or replace a lead; returns its id"""
+        raise NotImplementedError
+
+    def put_many(self, leads):
+        """Insert or replace many leads; returns the number written"""
+        count = 0
+        for lead in leads:
+            self.put(lead)
+            count += 1
+        return count
+
+    def update(self, lead_id, updates):
+        """Merge top-level fields into a stored lead; returns the updated lead or None"""
+        raise NotImplementedError
+
+    def get_by_domain(self, domain):
+        """Return the lead stored for a domain (see lead_domain), or None"""
+        raise NotImplementedError
+
+    def upsert_by_domain(self, lead, keep_fields=()):
+        """
+        Store a lead, replacing the existing lead for the same domain in place
+
+        The existing lead keeps its id (and creation time); keep_fields are
+        carried over from it. Lookup and write happen atomically, so concurrent
+        analyses of one domain never produce duplicate leads.
+
+        Returns:
+            dict: The stored lead
+        """
+        raise NotImplementedError
+
+    def delete(self, lead_id):
+        """Delete a lead; returns True if it existed"""
+        raise NotImplementedError
+
+    def iter_leads(self, filters=None, lead_ids=None):
+        """Yield stored leads matching the filters (see lead_matches_filters)"""
+        raise NotImplementedError
+
+    def iter_validation_records(self, filters=None, lead_ids=None):
+        """Yield validation_record() of the matching leads (see iter_leads), streamed"""
+        for lead in self.iter_leads(filters, lead_ids=lead_ids):
+            yield validation_record(lead)
+
+    def count(self, filters=None):
+        """Number of stored leads matching the filters"""
+        return sum(1 for _ in self.iter_leads(filters))
+
+    def page(self, filters=None, sort='created_at', descending=True, limit=50, cursor=None, summary=False):
+        """
+        One page of leads in a stable order, for cursor pagination
+
+        Args:
+            filters (dict): Lead filters (see lead_matches_filters)
+            sort (str): One of SORT_FIELDS; ties are broken by lead id
+            descending (bool): Sort direction
+            limit (int): Maximum leads per page
+            cursor (str): next_cursor of the previous page
+            summary (bool): Return SUMMARY_FIELDS rows instead of full leads
+
+        Returns:
+            tuple: (list of leads, next cursor or None)
+        """
+        null_value = -1 if SORT_FIELDS[sort] == '-1' else ''
+        rows = []
+        for row, lead in self._summarized_leads(filters):
+            key = row[sort] if row[sort] is not None else null_value
+            rows.append((key, row['id'], row, lead))
+        rows.sort(key=lambda item: (item[0], item[1]), reverse=descending)
+
+        if cursor:
+            position = tuple(decode_cursor(cursor))
+            rows = [item for item in rows
+                    if ((item[0], item[1]) < position if descending else (item[0], item[1]) > position)]
+
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1][0], page[-1][1]) if len(rows) > limit else None
+        return [item[2] if summary else item[3] for item in page], next_cursor
+
+    def _summarized_leads(self, filters):
+        """Yield (SUMMARY_FIELDS row, lead) for the leads matching the filters"""
+        for lead in self.iter_leads(filters):
+            yield self._summary(lead), lead
+
+    def _summary(self, lead):
+        row = dict(lead_index_values(lead), id=lead.get('id'))
+        row.setdefault('created_at', None)
+        row.setdefault('updated_at', None)
+        return row
+
+    def __contains__(self, lead_id):
+        return self.get(lead_id) is not None
+
+
+class MemoryLeadStore(LeadStore):
+    """Process-local dict store (development and tests)"""
+
+    def __init__(self):
+        self._leads = {}
+        self._times = {}    # lead id -> (created_at, updated_at)
+        self._domains = {}  # domain -> lead id
+        self._lock = threading.Lock()
+
+    def get(self, lead_id):
+        return self._leads.get(lead_id)
+
+    def put(self, lead):
+        with self._lock:
+            self._put(lead)
+        return lead['id']
+
+    def _put(self, lead):
+        now = datetime.now().isoformat()
+        self._leads[lead['id']] = lead
+        self._times[lead['id']] = (self._times.get(lead['id'], (now,))[0], now)
+        domain = lead_domain(lead.get('url'))
+        if domain:
+            self._domains[domain] = lead['id']
+
+    def get_by_domain(self, domain):
+        lead_id = self._domains.get(domain)
+        return self._leads.get(lead_id) if lead_id else None
+
+    def upsert_by_domain(self, lead, keep_fields=()):
+        with self._lock:
+            existing = self._leads.get(self._domains.get(lead_domain(lead.get('url'))))
+            if existing is not None:
+                lead = _merge_existing(lead, existing, keep_fields)
+            self._put(lead)
+            return lead
+
+    def update(self, lead_id, updates):
+        with self._lock:
+            lead = self._leads.get(lead_id)
+            if lead is None:
+                return None
+            lead.update(updates)
+            self._times[lead_id] = (self._times[lead_id][0], datetime.now().isoformat())
+            return lead
+
+    def delete(self, lead_id):
+        with self._lock:
+            self._times.pop(lead_id, None)
+            lead = self._leads.pop(lead_id, None)
+            if lead is None:
+                return False
+            domain = lead_domain(lead.get('url'))
+            if self._domains.get(domain) == lead_id:
+                del self._domains[domain]
+            return True
+
+    def iter_leads(self, filters=None, lead_ids=None):
+        leads = self.get_many(lead_ids) if lead_ids is not None else list(self._leads.values())
+        for lead in leads:
+            created_at = self._times.get(lead.get('id'), (None,))[0]
+            if lead_matches_filters(lead, filters, created_at):
+                yield lead
+
+    def _summary(self, lead):
+        created_at, updated_at = self._times.get(lead.get('id'), (None, None))
+        return dict(lead_index_values(lead), id=lead.get('id'), created_at=created_at, updated_at=updated_at)
+
+
+class JournalLeadStore(LeadStore):
+    """
+    Append-only JSONL journal lead store (see utils/lead_journal.py)
+
+    Saves append one record to a single file and every worker process on the
+    node shares it through an advisory file lock. Filtering and pagination
+    scan the journal, so this backend suits small lead books and setups
+    without SQLite; the SQLite store is the default.
+    """
+
+    def __init__(self, path=DEFAULT_LEAD_JOURNAL_PATH, legacy_path=LEGACY_LEADS_PATH):
+        """
+        Initialize the store
+
+        Args:
+            path (str): Journal file
+            legacy_path (str): leads.json array imported when the journal does not exist yet
+        """
+        self.journal = LeadJournal(
+            path, legacy_path=legacy_path,
+            key_fn=lambda lead: lead_domain(lead.get('url')),
+            json_default=json_default
+        )
+
+    def get(self, lead_id):
+        return self.journal.get(lead_id)
+
+    def get_many(self, lead_ids):
+        return self.journal.get_many(lead_ids)
+
+    def put(self, lead):
+        self.journal.put_many([lead])
+        return lead['id']
+
+    def put_many(self, leads):
+        return self.journal.put_many(leads)
+
+    def update(self, lead_id, updates):
+        return self.journal.update(lead_id, updates)
+
+    def get_by_domain(self, domain):
+        return self.journal.find(domain)
+
+    def upsert_by_domain(self, lead, keep_fields=()):
+        return self.journal.upsert_by_key(
+            lead, lambda lead, existing: _merge_existing(lead, existing, keep_fields)
+        )
+
+    def delete(self, lead_id):
+        return self.journal.delete(lead_id)
+
+    def iter_leads(self, filters=None, lead_ids=None):
+        if lead_ids is not None:
+            for lead in self.get_many(lead_ids):
+                if lead_matches_filters(lead, filters, self.journal.times(lead['id'])[0]):
+                    yield lead
+            return
+        for lead, created_at, _ in self.journal.scan():
+            if lead_matches_filters(lead, filters, created_at):
+                yield lead
+
+    def count(self, filters=None):
+        if not filters:
+            return len(self.journal)
+        return super().count(filters)
+
+    def _summarized_leads(self, filters):
+        for lead, created_at, updated_at in self.journal.scan():
+            if lead_matches_filters(lead, filters, created_at):
+                yield dict(lead_index_values(lead), id=lead.get('id'),
+                           created_at=created_at, updated_at=updated_at), lead
+
+    def _summary(self, lead):
+        created_at, updated_at = self.journal.times(lead.get('id'))
+        return dict(lead_index_values(lead), id=lead.get('id'), created_at=created_at, updated_at=updated_at)
+
+
+class SQLiteLeadStore(LeadStore):
+    """
+    SQLite (WAL) lead store with indexed columns and compressed lead blobs
+
+    The lead's stored investment feature record is also kept uncompressed in
+    the features column, so batch validation reads it without decoding blobs.
+    """
+
+    INDEXED_COLUMNS = ['url', 'domain', 'company_name', 'lead_tier', 'lead_score', 'ai_readiness_score',
+                       'verification_status', 'crm_status', 'financials_status']
+
+    # ORDER BY key per sort field; each has an index on exactly (key, id) for keyset pagination
+    SORT_KEYS = {
+        field: field if field in ('created_at', 'updated_at') else f'COALESCE({field}, {null_value})'
+        for field, null_value in SORT_FIELDS.items()
+    }
+
+    def __init__(self, path=DEFAULT_LEAD_DB_PATH, fetch_size=500):
+        """
+        Initialize the store
+
+        Args:
+            path (str): SQLite database file
+            fetch_size (int): Rows fetched per round trip when streaming leads
+        """
+        self.path = path
+        self.fetch_size = fetch_size
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_db()
+
+    def _connect(self):
+        """Returns this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS leads (
+                id TEXT PRIMARY KEY,
+                url TEXT,
+                domain TEXT,
+                company_name TEXT,
+                lead_tier TEXT,
+                lead_score REAL,
+                ai_readiness_score REAL,
+                verification_status TEXT,
+                crm_status TEXT,
+                financials_status TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                data BLOB NOT NULL,
+                features TEXT
+            )
+        ''')
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(leads)')]
+        if 'features' not in columns:
+            conn.execute('ALTER TABLE leads ADD COLUMN features TEXT')
+            self._backfill_features(conn)
+        for column in ['domain', 'lead_tier', 'lead_score', 'ai_readiness_score',
+                       'verification_status', 'crm_status']:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_leads_{column} ON leads ({column})')
+        # Superseded by idx_leads_sort_updated_at
+        conn.execute('DROP INDEX IF EXISTS idx_leads_updated_at')
+        for field, sort_key in self.SORT_KEYS.items():
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_leads_sort_{field} ON leads ({sort_key}, id)')
+
+    def _backfill_features(self, conn):
+        """One-time fill of the features column for databases created before it existed"""
+        rows = conn.execute('SELECT id, data FROM leads').fetchall()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for lead_id, blob in rows:
+                features = self._encode_features(self._decode(blob))
+                if features is not None:
+                    conn.execute('UPDATE leads SET features = ? WHERE id = ?', (features, lead_id))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        logger.info(f"Backfilled investment features for {len(rows)} stored leads")
+
+    @staticmethod
+    def _encode_features(lead):
+        features = (lead.get('investment_match') or {}).get('features')
+        if not isinstance(features, dict):
+            return None
+        return json.dumps(features, separators=(',', ':'), default=json_default)
+
+    @staticmethod
+    def _encode(lead):
+        return zlib.compress(json.dumps(lead, separators=(',', ':'), default=json_default).encode('utf-8'))
+
+    @staticmethod
+    def _decode(blob):
+        return json.loads(zlib.decompress(blob))
+
+    def _write(self, conn, lead, created_at=None):
+        now = datetime.now().isoformat()
+        values = lead_index_values(lead)
+        conn.execute(
+            f'''INSERT OR REPLACE INTO leads
+                (id, {', '.join(self.INDEXED_COLUMNS)}, created_at, updated_at, data, features)
+                VALUES (?, {', '.join('?' * len(self.INDEXED_COLUMNS))}, ?, ?, ?, ?)''',
+            [lead['id']] + [values[c] for c in self.INDEXED_COLUMNS] +
+            [created_at or now, now, self._encode(lead), self._encode_features(lead)]
+        )
+
+    def get(self, lead_id):
+        row = self._connect().execute('SELECT data FROM leads WHERE id = ?', (lead_id,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def get_many(self, lead_ids):
+        lead_ids = list(lead_ids)
+        found = {}
+        # Stay below SQLite's bound parameter limit
+        for offset in range(0, len(lead_ids), 500):
+            chunk = lead_ids[offset:offset + 500]
+            rows = self._connect().execute(
+                f"SELECT id, data FROM leads WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            found.update((lead_id, self._decode(blob)) for lead_id, blob in rows)
+        return [found[lead_id] for lead_id in lead_ids if lead_id in found]
+
+    def put(self, lead):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT created_at FROM leads WHERE id = ?', (lead['id'],)).fetchone()
+            self._write(conn, lead, row[0] if row else None)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return lead['id']
+
+    def put_many(self, leads):
+        # One transaction per call instead of one per lead
+        leads = list(leads)
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for lead in leads:
+                row = conn.execute('SELECT created_at FROM leads WHERE id = ?', (lead['id'],)).fetchone()
+                self._write(conn, lead, row[0] if row else None)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(leads)
+
+    def get_by_domain(self, domain):
+        row = self._connect().execute(
+            'SELECT data FROM leads WHERE domain = ? ORDER BY created_at LIMIT 1', (domain,)
+        ).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def upsert_by_domain(self, lead, keep_fields=()):
+        conn = self._connect()
+        # The write lock is held from the domain lookup to the write
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT data, created_at FROM leads WHERE domain = ? ORDER BY created_at LIMIT 1',
+                (lead_domain(lead.get('url')),)
+            ).fetchone()
+            if row is not None:
+                lead = _merge_existing(lead, self._decode(row[0]), keep_fields)
+                self._write(conn, lead, row[1])
+            else:
+                existing = conn.execute('SELECT created_at FROM leads WHERE id = ?', (lead['id'],)).fetchone()
+                self._write(conn, lead, existing[0] if existing else None)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return lead
+
+    def update(self, lead_id, updates):
+        conn = self._connect()
+        # IMMEDIATE takes the write lock up front so concurrent patches are not lost
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT data, created_at FROM leads WHERE id = ?', (lead_id,)).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return None
+            lead = self._decode(row[0])
+            lead.update(updates)
+            self._write(conn, lead, row[1])
+            conn.execute('COMMIT')
+            return lead
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def delete(self, lead_id):
+        cursor = self._connect().execute('DELETE FROM leads WHERE id = ?', (lead_id,))
+        return cursor.rowcount > 0
+
+    def _where(self, filters, lead_ids=None):
+        """Translates lead filters into a SQL WHERE clause over the indexed columns"""
+        clauses = []
+        params = []
+        filters = filters or {}
+        if filters.get('lead_tier'):
+            clauses.append('lead_tier = ?')
+            params.append(filters['lead_tier'])
+        if filters.get('min_lead_score') is not None:
+            clauses.append('COALESCE(lead_score, 0) >= ?')
+            params.append(filters['min_lead_score'])
+        if filters.get('max_lead_score') is not None:
+            clauses.append('COALESCE(lead_score, 0) <= ?')
+            params.append(filters['max_lead_score'])
+        if filters.get('min_ai_score') is not None:
+            clauses.append('COALESCE(ai_readiness_score, 0) >= ?')
+            params.append(filters['min_ai_score'])
+        if filters.get('verification_status'):
+            clauses.append('verification_status = ?')
+            params.append(filters['verification_status'])
+        if filters.get('crm_status'):
+            clauses.append('crm_status = ?')
+            params.append(filters['crm_status'])
+        if filters.get('added_after'):
+            clauses.append('created_at >= ?')
+            params.append(filters['added_after'])
+        if filters.get('added_before'):
+            clauses.append('created_at < ?')
+            params.append(filters['added_before'])
+        if lead_ids is not None:
+            clauses.append(f"id IN ({', '.join('?' * len(lead_ids))})")
+            params.extend(lead_ids)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def iter_leads(self, filters=None, lead_ids=None):
+        if lead_ids is not None:
+            lead_ids = list(lead_ids)
+            found = {}
+            for offset in range(0, len(lead_ids), 500):
+                chunk = lead_ids[offset:offset + 500]
+                where, params = self._where(filters, chunk)
+                rows = self._connect().execute(f'SELECT id, data FROM leads{where}', params)
+                found.update((lead_id, self._decode(blob)) for lead_id, blob in rows)
+            for lead_id in lead_ids:
+                if lead_id in found:
+                    yield found.pop(lead_id)
+            return
+
+        where, params = self._where(filters)
+        # A dedicated connection keeps the read snapshot stable while the caller consumes rows
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute(f'SELECT data FROM leads{where} ORDER BY created_at, id', params)
+            while True:
+                rows = cursor.fetchmany(self.fetch_size)
+                if not rows:
+                    break
+                for (blob,) in rows:
+                    yield self._decode(blob)
+        finally:
+            conn.close()
+
+    # The blob is only read (and decoded) for leads without a stored feature record
+    VALIDATION_COLUMNS = 'id, url, company_name, verification_status, features, CASE WHEN features IS NULL THEN data END'
+
+    def _validation_record(self, row):
+        lead_id, url, company_name, verification_status, features, blob = row
+        if features is None:
+            return self._decode(blob)
+        record = {'id': lead_id, 'url': url, 'company_name': company_name,
+                  'investment_match': {'features': json.loads(features)}}
+        if verification_status is not None:
+            record['verification'] = {'status': verification_status}
+        return record
+
+    def iter_validation_records(self, filters=None, lead_ids=None):
+        if lead_ids is not None:
+            lead_ids = list(lead_ids)
+            for offset in range(0, len(lead_ids), 500):
+                chunk = lead_ids[offset:offset + 500]
+                where, params = self._where(filters, chunk)
+                rows = self._connect().execute(f'SELECT {self.VALIDATION_COLUMNS} FROM leads{where}', params)
+                found = {row[0]: row for row in rows}
+                for lead_id in chunk:
+                    if lead_id in found:
+                        yield self._validation_record(found.pop(lead_id))
+            return
+
+        where, params = self._where(filters)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute(f'SELECT {self.VALIDATION_COLUMNS} FROM leads{where} ORDER BY created_at, id', params)
+            while True:
+                rows = cursor.fetchmany(self.fetch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._validation_record(row)
+        finally:
+            conn.close()
+
+    def count(self, filters=None):
+        where, params = self._where(filters)
+        return self._connect().execute(f'SELECT COUNT(*) FROM leads{where}', params).fetchone()[0]
+
+    def page(self, filters=None, sort='created_at', descending=True, limit=50, cursor=None, summary=False):
+        sql, params = self._page_query(filters, sort, descending, limit, cursor, summary)
+        rows = self._connect().execute(sql, params).fetchall()
+
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1][0], page[-1][1]) if len(rows) > limit else None
+        if summary:
+            return [dict(zip(SUMMARY_FIELDS, row[1:])) for row in page], next_cursor
+        return [self._decode(row[2]) for row in page], next_cursor
+
+    def _page_query(self, filters, sort, descending, limit, cursor, summary):
+        """SQL and parameters for one page (limit + 1 rows, to detect a next page)"""
+        # Keyset pagination: seek past the cursor on the indexed (sort key, id) instead of using OFFSET
+        sort_key = self.SORT_KEYS[sort]
+        where, params = self._where(filters)
+        if cursor:
+            sort_value, lead_id = decode_cursor(cursor)
+            # Spelled out rather than as a row value so SQLite seeks the expression indexes too
+            op = '<' if descending else '>'
+            where += (' AND ' if where else ' WHERE ') + \
+                f'{sort_key} {op}= ? AND ({sort_key} {op} ? OR id {op} ?)'
+            params += [sort_value, sort_value, lead_id]
+
+        direction = 'DESC' if descending else 'ASC'
+        columns = ', '.join(SUMMARY_FIELDS) if summary else 'id, data'
+        sql = f'SELECT {sort_key}, {columns} FROM leads{where} ORDER BY {sort_key} {direction}, id {direction} LIMIT ?'
+        return sql, params + [limit + 1]
+
+
+def _merge_existing(lead, existing, keep_fields):
+    """New version of an existing lead: its id and keep_fields come from the stored lead"""
+    merged = dict(lead, id=existing['id'])
+    for field in keep_fields:
+        if field in existing:
+            merged[field] = existing[field]
+    return merged
+
+
+def lead_matches_filters(lead, filters, created_at=None):
+    """Check a lead against simple tier, score, status and date added filters"""
+    if not filters:
+        return True
+
+    sales_insights = lead.get('sales_insights', {})
+    if filters.get('lead_tier') and sales_insights.get('lead_tier') != filters['lead_tier']:
+        return False
+    if filters.get('min_lead_score') is not None and (sales_insights.get('lead_score') or 0) < filters['min_lead_score']:
+        return False
+    if filters.get('max_lead_score') is not None and (sales_insights.get('lead_score') or 0) > filters['max_lead_score']:
+        return False
+    if filters.get('min_ai_score') is not None and (lead.get('ai_readiness_score') or 0) < filters['min_ai_score']:
+        return False
+    if filters.get('verification_status') and lead.get('verification', {}).get('status') != filters['verification_status']:
+        return False
+    if filters.get('crm_status') and lead.get('crm', {}).get('status') != filters['crm_status']:
+        return False
+    if filters.get('added_after') and (created_at or '') < filters['added_after']:
+        return False
+    if filters.get('added_before') and (created_at or '') >= filters['added_before']:
+        return False
+    return True
+
+
+def create_lead_store():
+    """Build the lead store selected by LEAD_STORE_BACKEND (sqlite by default, journal or memory)"""
+    backend = os.environ.get('LEAD_STORE_BACKEND', 'sqlite').lower()
+    if backend == 'memory':
+        return MemoryLeadStore()
+    if backend == 'journal':
+        return JournalLeadStore()
+    return SQLiteLeadStore()
+
+
+_store_instance = None
+_store_lock = threading.Lock()
+
+
+def get_lead_store():
+    """Returns the process-wide lead store used by the routes, helpers and training scripts"""
+    global _store_instance
+    with _store_lock:
+        if _store_instance is None:
+            _store_instance = create_lead_store()
+        return _store_instance
@@ -0,0 +1,104 @@
+"""
+Versioned storage for trained model artifacts.
+
+Each training run writes its estimators into models/<version>/ together with
+a manifest.json, then points models/LATEST at the new version. Artifacts are
+dumped uncompressed so that loading with mmap_mode='r' memory-maps the large
+numpy arrays inside tree ensembles, letting workers share them instead of
+each holding a private copy.
+"""
+
+import os
+import json
+import logging
+import joblib
+from datetime import datetime
+
+from utils.storage import default_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = default_path('MODEL_DIR', 'models')
+LATEST_FILE = 'LATEST'
+MANIFEST_FILE = 'manifest.json'
+
+
+def save_model_artifacts(models, metadata=None, model_dir=DEFAULT_MODEL_DIR):
+    """
+    Save a set of fitted estimators as a new model version
+
+    Args:
+        models (dict): Artifact name -> fitted estimator
+        metadata (dict): Extra information recorded in the manifest
+        model_dir (str): Root directory holding all model versions
+
+    Returns:
+        str: The version identifier that was written
+    """
+    version = datetime.now().strftime('%Y%m%d%H%M%S')
+    version_dir = os.path.join(model_dir, version)
+    suffix = 1
+    while os.path.exists(version_dir):
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{suffix}"
+        version_dir = os.path.join(model_dir, version)
+        suffix += 1
+    os.makedirs(version_dir)
+
+    for name, model in models.items():
+        joblib.dump(model, os.path.join(version_dir, f'{name}.joblib'))
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'models': sorted(models.keys())
+    }
+    manifest.update(metadata or {})
+    with open(os.path.join(version_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Switch the LATEST pointer atomically so running workers never see a partial write
+    latest_tmp = os.path.join(model_dir, LATEST_FILE + '.tmp')
+    with open(latest_tmp, 'w') as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(model_dir, LATEST_FILE))
+
+    logger.info(f"Saved model version {version} with {len(models)} artifacts")
+    return version
+
+
+def get_latest_version(model_dir=DEFAULT_MODEL_DIR):
+    """Returns the latest model version, or None if no models have been trained"""
+    try:
+        with open(os.path.join(model_dir, LATEST_FILE), 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_model_artifacts(names, model_dir=DEFAULT_MODEL_DIR, version=None):
+    """
+    Load the requested artifacts from a model version
+
+    Args:
+        names (list): Artifact names to load; missing artifacts are skipped
+        model_dir (str): Root directory holding all model versions
+        version (str): Version to load, defaults to the latest
+
+    Returns:
+        tuple: (version, dict of artifact name -> estimator)
+    """
+    version = version or get_latest_version(model_dir)
+    if not version:
+        return None, {}
+
+    models = {}
+    for name in names:
+        path = os.path.join(model_dir, version, f'{name}.joblib')
+        if not os.path.exists(path):
+            continue
+        try:
+            models[name] = joblib.load(path, mmap_mode='r')
+        except Exception as e:
+            logger.error(f"Failed to load model artifact {name} from version {version}: {str(e)}")
+
+    return version, models
@@ -0,0 +1,222 @@
+"""
+Offline training pipeline for the lead and financial ML models.
+
+Trains the models that InvestmentCriteriaValidator, FinancialAnalyzer and
+YahooFinanceHandler construct but never fit, using the leads and financials
+accumulated in the application lead store, and writes them as a new versioned
+artifact set via modules.model_store. Workers pick up the latest version at
+startup.
+
+The verification classifiers and the investment fit regressors both learn
+from analyst verification outcomes (Verified / Flagged), so they add signal
+the rule-based criteria scores do not already carry. The missing-metric
+regressors learn reported financials from the other reported financials.
+
+Usage:
+    python -m modules.model_training [--leads leads.json] [--model-dir models]
+"""
+
+import argparse
+import json
+import logging
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from .investment_criteria import InvestmentCriteriaValidator
+from .financial_analyzer import FinancialAnalyzer
+from .yahoo_finance_handler import YahooFinanceHandler
+from .model_store import DEFAULT_MODEL_DIR, save_model_artifacts
+from .lead_store import create_lead_store
+
+logger = logging.getLogger(__name__)
+
+# Analyst verification outcomes used as classifier labels (and, scaled to 0-100, fit regression targets)
+VERIFICATION_LABELS = {'Verified': 1, 'Flagged': 0}
+
+
+class ModelTrainer:
+    """Builds training sets from stored leads and fits the dormant models"""
+
+    def __init__(self, validator=None, financial_analyzer=None, yahoo_handler=None, min_samples=20):
+        """
+        Initialize the trainer
+
+        Args:
+            validator: InvestmentCriteriaValidator providing feature encoding and model settings
+            financial_analyzer: FinancialAnalyzer providing the fit feature vector and regressors
+            yahoo_handler: YahooFinanceHandler providing the missing-metric feature vector
+            min_samples (int): Minimum rows required before a model is trained
+        """
+        self.validator = validator or InvestmentCriteriaValidator()
+        self.financial_analyzer = financial_analyzer or FinancialAnalyzer()
+        self.yahoo_handler = yahoo_handler or YahooFinanceHandler()
+        self.min_samples = min_samples
+
+    def train(self, leads):
+        """
+        Train every model that has enough labelled data
+
+        Returns:
+            tuple: (dict of artifact name -> fitted estimator, metadata dict)
+        """
+        models = {}
+        metadata = {'lead_count': len(leads), 'evaluation': {}}
+
+        self._train_criteria_models(leads, models, metadata)
+        self._train_fit_models(leads, models, metadata)
+        self._train_metric_models(leads, models, metadata)
+
+        return models, metadata
+
+    def run(self, leads, model_dir=DEFAULT_MODEL_DIR):
+        """Train the models and save them as a new version; returns the version or None"""
+        models, metadata = self.train(leads)
+        if not models:
+            logger.warning("Not enough data to train any model, nothing saved")
+            return None
+        return save_model_artifacts(models, metadata, model_dir)
+
+    def _train_criteria_models(self, leads, models, metadata):
+        """Verification classifiers over the investment criteria feature records"""
+        features = []
+        labels = []
+        for lead in leads:
+            label = VERIFICATION_LABELS.get(lead.get('verification', {}).get('status'))
+            if label is None:
+                continue
+            features.append(self.validator._get_lead_features(lead))
+            labels.append(label)
+
+        if len(labels) < self.min_samples or len(set(labels)) < 2:
+            logger.info(f"Skipping criteria classifiers: {len(labels)} labelled leads")
+            return
+
+        X = self.validator.encode_features(features)
+        y = np.array(labels)
+        estimators = {
+            'criteria_rf': clone(self.validator.rf_model),
+            'criteria_mlp': make_pipeline(StandardScaler(), clone(self.validator.mlp_model))
+        }
+        for name, estimator in estimators.items():
+            metadata['evaluation'][name] = self._holdout_score(estimator, X, y, stratify=y)
+            models[name] = estimator.fit(X, y)
+        metadata['criteria_samples'] = len(y)
+
+    def _train_fit_models(self, leads, models, metadata):
+        """
+        Investment fit regressors over financial feature vectors
+
+        The target is the analyst verdict scaled to the 0-100 fit score range
+        (Verified = 100, Flagged = 0), so the model score blended into
+        FinancialAnalyzer's rule score estimates how likely analysts are to
+        accept a company with these financials. Fitting the rule-based
+        financial criteria score instead would only re-learn the rules.
+        """
+        rows = []
+        targets = []
+        for lead in leads:
+            financials = lead.get('financials')
+            label = VERIFICATION_LABELS.get((lead.get('verification') or {}).get('status'))
+            if isinstance(financials, dict) and financials and label is not None:
+                rows.append(self.financial_analyzer.financial_feature_vector(financials))
+                targets.append(100.0 * label)
+
+        if len(targets) < self.min_samples or len(set(targets)) < 2:
+            logger.info(f"Skipping investment fit regressors: {len(targets)} verified leads with financials")
+            return
+
+        scaler = StandardScaler().fit(np.array(rows, dtype=float))
+        X = scaler.transform(np.array(rows, dtype=float))
+        y = np.array(targets, dtype=float)
+        estimators = {
+            'fit_rf': clone(self.financial_analyzer.rf_model),
+            'fit_gb': clone(self.financial_analyzer.gb_model)
+        }
+        for name, estimator in estimators.items():
+            metadata['evaluation'][name] = self._holdout_score(estimator, X, y)
+            models[name] = estimator.fit(X, y)
+        models['fit_scaler'] = scaler
+        metadata['fit_samples'] = len(y)
+
+    def _train_metric_models(self, leads, models, metadata):
+        """Per-metric regressors used to fill metrics missing from Yahoo data"""
+        metrics_rows = []
+        for lead in leads:
+            financials = lead.get('financials')
+            if isinstance(financials, dict) and self.yahoo_handler._create_feature_vector(financials) is not None:
+                metrics_rows.append(financials)
+
+        if len(metrics_rows) < self.min_samples:
+            logger.info(f"Skipping missing-metric regressors: {len(metrics_rows)} usable financials")
+            return
+
+        X_all = np.array([self.yahoo_handler._create_feature_vector(m) for m in metrics_rows], dtype=float)
+        scaler = StandardScaler().fit(X_all)
+        feature_offset = len(X_all[0]) - len(self.yahoo_handler.FEATURE_METRICS)
+
+        trained_any = False
+        for key in self.yahoo_handler.PREDICTED_METRICS:
+            target_rows = [i for i, m in enumerate(metrics_rows)
+                           if m.get(key) is not None and not m.get(f'{key}_predicted')]
+            if len(target_rows) < self.min_samples:
+                continue
+
+            # At prediction time the target is missing, so train with its input column zeroed
+            X = X_all[target_rows].copy()
+            if key in self.yahoo_handler.FEATURE_METRICS:
+                X[:, feature_offset + self.yahoo_handler.FEATURE_METRICS.index(key)] = 0
+            X = scaler.transform(X)
+            y = np.array([metrics_rows[i][key] for i in target_rows], dtype=float)
+
+            estimator = clone(self.yahoo_handler.model)
+            metadata['evaluation'][f'metrics_{key}'] = self._holdout_score(estimator, X, y)
+            models[f'metrics_{key}'] = estimator.fit(X, y)
+            trained_any = True
+
+        if trained_any:
+            models['metrics_scaler'] = scaler
+
+    def _holdout_score(self, estimator, X, y, stratify=None):
+        """Score a clone of the estimator on a 20% holdout split"""
+        try:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=42, stratify=stratify
+            )
+            return float(clone(estimator).fit(X_train, y_train).score(X_test, y_test))
+        except ValueError as e:
+            logger.debug(f"Holdout evaluation skipped: {str(e)}")
+            return None
+
+
+def load_training_leads(path=None):
+    """Load accumulated leads from a JSON export, or from the application lead store"""
+    if path:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return data.get('leads', data) if isinstance(data, dict) else data
+
+    return list(create_lead_store().iter_leads())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and persist lead and financial models")
+    parser.add_argument('--leads', help="JSON file of leads (defaults to the application lead store)")
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR, help="Root directory for model versions")
+    parser.add_argument('--min-samples', type=int, default=20, help="Minimum rows required per model")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    leads = load_training_leads(args.leads)
+    logger.info(f"Training on {len(leads)} leads")
+    version = ModelTrainer(min_samples=args.min_samples).run(leads, args.model_dir)
+    if version:
+        logger.info(f"Model version {version} written to {args.model_dir}")
+
+
+if __name__ == '__main__':
+    main()
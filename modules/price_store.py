@@ -0,0 +1,182 @@
+"""
+Local columnar store of closing prices.
+
+Each ticker/interval pair is an append-only binary file of (timestamp, close)
+records that is read back as a memory-mapped NumPy array. Callers fetch only
+the bars after the last stored timestamp and compute volatility, momentum and
+52-week statistics directly from the stored arrays instead of re-downloading
+the whole window into a fresh DataFrame on every request.
+
+Writers in different processes are serialized with an advisory file lock per
+series, and every write replaces the file atomically (temp file + rename), so
+readers never see a partly written series. A '.checked' sidecar file is
+touched after every successful refresh, including ones that brought no new
+bars, and its mtime is what decides whether a series is fresh.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+from utils.storage import default_path, file_lock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRICE_DIR = default_path('PRICE_STORE_DIR', 'data', 'prices')
+
+PRICE_DTYPE = np.dtype([('ts', '<i8'), ('close', '<f8')])
+
+# Bars per year for annualizing volatility
+PERIODS_PER_YEAR = {'1d': 252, '1wk': 52, '1mo': 12}
+
+_UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9._-]')
+
+
+def price_stats(timestamps, closes, periods_per_year):
+    """
+    Computes current price, 52-week high/low, annualized volatility and
+    6-month momentum from aligned timestamp and close arrays
+    """
+    closes = np.asarray(closes, dtype=float)
+    timestamps = np.asarray(timestamps)
+    if closes.size == 0:
+        return {}
+
+    returns = closes[1:] / closes[:-1] - 1
+    momentum_lag = periods_per_year // 2
+    last_year = closes[timestamps >= timestamps[-1] - 365 * 86400]
+
+    return {
+        'current_price': float(closes[-1]),
+        'price_52w_high': float(last_year.max()),
+        'price_52w_low': float(last_year.min()),
+        'volatility': float(returns.std(ddof=1) * np.sqrt(periods_per_year)) if returns.size > 1 else None,
+        'momentum': float(closes[-1] / closes[-1 - momentum_lag] - 1) if closes.size > momentum_lag else None
+    }
+
+
+class PriceStore:
+    """Append-only, memory-mapped closing price series per ticker and interval"""
+
+    def __init__(self, root=DEFAULT_PRICE_DIR):
+        """
+        Initialize the store
+
+        Args:
+            root (str): Directory holding one file per ticker and interval
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, ticker, interval):
+        return os.path.join(self.root, f"{_UNSAFE_CHARS.sub('_', ticker.upper())}.{interval}.bin")
+
+    def _read(self, path):
+        """Memory-maps a series file; returns an empty array if it does not exist"""
+        if not os.path.exists(path) or os.path.getsize(path) < PRICE_DTYPE.itemsize:
+            return np.empty(0, dtype=PRICE_DTYPE)
+        return np.memmap(path, dtype=PRICE_DTYPE, mode='r')
+
+    def series(self, ticker, interval, since=None):
+        """
+        Returns (timestamps, closes) for a ticker, optionally from a unix timestamp on
+
+        The arrays are views of the memory-mapped file, not copies.
+        """
+        data = self._read(self._path(ticker, interval))
+        if since is not None and data.size:
+            data = data[np.searchsorted(data['ts'], since):]
+        return data['ts'], data['close']
+
+    def last_timestamp(self, ticker, interval):
+        """Timestamp of the most recent stored bar, or None"""
+        data = self._read(self._path(ticker, interval))
+        return int(data['ts'][-1]) if data.size else None
+
+    def is_fresh(self, ticker, interval, max_age):
+        """True if the series was refreshed (written or checked) within the last max_age seconds"""
+        path = self._path(ticker, interval)
+        checked_at = None
+        for candidate in (path, path + '.checked'):
+            try:
+                checked_at = max(checked_at or 0, os.path.getmtime(candidate))
+            except FileNotFoundError:
+                continue
+        return checked_at is not None and time.time() - checked_at < max_age
+
+    def mark_checked(self, ticker, interval):
+        """Record a successful refresh of a series that may not have brought new bars"""
+        checked_path = self._path(ticker, interval) + '.checked'
+        with open(checked_path, 'a'):
+            os.utime(checked_path)
+
+    def append(self, ticker, interval, timestamps, closes):
+        """
+        Append bars to a series
+
+        Bars at or after the first new timestamp are replaced, so re-fetching the
+        latest (still forming) bar updates it in place. Missing closes are dropped.
+        The series is marked as checked even when there is nothing to append.
+        """
+        timestamps = np.asarray(timestamps, dtype='<i8')
+        closes = np.asarray([np.nan if c is None else c for c in closes], dtype='<f8')
+        valid = ~np.isnan(closes)
+        if not valid.any():
+            self.mark_checked(ticker, interval)
+            return 0
+
+        new = np.empty(int(valid.sum()), dtype=PRICE_DTYPE)
+        new['ts'] = timestamps[valid]
+        new['close'] = closes[valid]
+        new.sort(order='ts')
+
+        path = self._path(ticker, interval)
+        with self._locked(path):
+            existing = self._read(path)
+            keep = int(np.searchsorted(existing['ts'], new['ts'][0])) if existing.size else 0
+
+            # Bars from the first replaced one on are rewritten; the series is written
+            # to a temp file and renamed over the old one, so live memory maps of the
+            # previous file stay valid
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(existing[:keep].tobytes())
+                    f.write(new.tobytes())
+                del existing
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        self.mark_checked(ticker, interval)
+        return len(new)
+
+    @contextmanager
+    def _locked(self, path):
+        """Holds the thread lock and the inter-process file lock of a series"""
+        with self._lock, file_lock(path + '.lock'):
+            yield
+
+    def stats(self, ticker, interval, since=None):
+        """Price statistics computed from the stored series"""
+        timestamps, closes = self.series(ticker, interval, since)
+        return price_stats(timestamps, closes, PERIODS_PER_YEAR.get(interval, 252))
+
+
+_store_instance = None
+_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """Returns the process-wide price store shared by the finance backends"""
+    global _store_instance
+    with _store_lock:
+        if _store_instance is None:
+            _store_instance = PriceStore()
+        return _store_instance
@@ -0,0 +1,156 @@
+"""
+Registry of companies known to be private.
+
+Most target companies are private $5-50M businesses with no ticker, so every
+financial lookup for them used to run the whole Yahoo/yfinance search chain
+before giving up. The registry records those misses (and analysts' manual
+verdicts) and lets FinancialAPIIntegration skip the chain entirely. Names are
+normalized (case, punctuation, legal suffixes) and must match exactly, so
+"Acme Widgets, Inc." reuses the decision made for "Acme Widgets" while
+"Apples" and "Apple" stay distinct. Every change bumps a version row, so registries in
+other worker processes reload their index before their next lookup.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+
+from .finance_cache import DEFAULT_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Lookup misses are re-checked after this many seconds; manual entries never expire
+MISS_TTL = 30 * 24 * 3600
+
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'llp', 'ltd', 'limited', 'corp', 'corporation',
+    'co', 'company', 'plc', 'gmbh', 'lp', 'pllc', 'pc', 'the'
+}
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_name(company_name):
+    """Lowercases a company name and drops punctuation and legal suffixes"""
+    words = _NON_ALNUM.sub(' ', str(company_name).lower()).split()
+    core = [word for word in words if word not in LEGAL_SUFFIXES]
+    return ' '.join(core or words)
+
+
+class PrivateCompanyRegistry:
+    """Persistent known-private registry with an in-memory normalized name index"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, miss_ttl=MISS_TTL):
+        """
+        Initialize the registry
+
+        Args:
+            path (str): SQLite database file (shared with the finance cache by default)
+            miss_ttl (int): Seconds before an automatically recorded miss is re-checked
+        """
+        self.path = path
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS known_private (
+                name_key TEXT PRIMARY KEY,
+                company_name TEXT,
+                source TEXT NOT NULL,
+                marked_at REAL NOT NULL,
+                expires_at REAL
+            )
+        ''')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS known_private_version (version INTEGER NOT NULL)')
+        self._conn.execute(
+            'INSERT INTO known_private_version SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM known_private_version)'
+        )
+        self._conn.commit()
+
+        # name_key -> expires_at
+        self._entries = {}
+        self._version = None
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        """Reloads the index if another process changed the registry; caller holds the lock"""
+        version = self._conn.execute('SELECT version FROM known_private_version').fetchone()[0]
+        if version == self._version:
+            return
+        self._entries = dict(self._conn.execute('SELECT name_key, expires_at FROM known_private'))
+        self._version = version
+
+    def _bump_version(self):
+        """Marks the registry as changed for other processes; caller holds the lock"""
+        self._conn.execute('UPDATE known_private_version SET version = version + 1')
+        self._version = self._conn.execute('SELECT version FROM known_private_version').fetchone()[0]
+
+    def is_private(self, company_name):
+        """True if the company (under any spelling that normalizes to the same name) is known to be private"""
+        if not company_name:
+            return False
+        name_key = normalize_name(company_name)
+        with self._lock:
+            try:
+                self._sync()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to refresh the private company registry: {str(e)}")
+            if name_key not in self._entries:
+                return False
+            expires_at = self._entries[name_key]
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[name_key]
+                return False
+        return True
+
+    def mark_private(self, company_name, source='manual'):
+        """
+        Record a company as private
+
+        Args:
+            company_name (str): Company name as entered or extracted
+            source (str): 'manual' for analyst verification (never expires) or
+                          'lookup_miss' for automatic misses (expire after miss_ttl)
+        """
+        if not company_name:
+            return
+        name_key = normalize_name(company_name)
+        now = time.time()
+        expires_at = None if source == 'manual' else now + self.miss_ttl
+        try:
+            with self._lock:
+                self._sync()
+                # An automatic miss never downgrades a manual decision
+                if source != 'manual' and name_key in self._entries and self._entries[name_key] is None:
+                    return
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO known_private VALUES (?, ?, ?, ?, ?)',
+                    (name_key, company_name, source, now, expires_at)
+                )
+                self._bump_version()
+                self._conn.commit()
+                self._entries[name_key] = expires_at
+            logger.info(f"Marked '{company_name}' as private ({source})")
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to record private company {company_name}: {str(e)}")
+
+    def unmark(self, company_name):
+        """Remove a company from the registry, e.g. once it is found to be public"""
+        if not company_name:
+            return
+        name_key = normalize_name(company_name)
+        try:
+            with self._lock:
+                self._sync()
+                self._conn.execute('DELETE FROM known_private WHERE name_key = ?', (name_key,))
+                self._bump_version()
+                self._conn.commit()
+                self._entries.pop(name_key, None)
+            logger.info(f"Unmarked '{company_name}' as private")
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to unmark private company {company_name}: {str(e)}")
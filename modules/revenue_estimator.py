@@ -0,0 +1,167 @@
+"""
+Vectorized recurring-revenue and CapEx estimation.
+
+The recurring-revenue and capital expenditure heuristics used to be
+per-company rule chains in FinancialAnalyzer and YahooFinanceHandler. Here
+they run over a feature table of many companies at once: industry and sector
+keyword flags are computed once per distinct string, and the rule chains
+become numpy selections over whole columns. The per-company methods are thin
+wrappers around a one-row table.
+"""
+
+import numpy as np
+
+# Website terms that indicate a subscription business model (counted by ContentAnalyzer)
+SUBSCRIPTION_TERMS = ['subscription', 'recurring', 'monthly fee', 'annual fee',
+                      'saas', 'service fee', 'retainer']
+
+CAPEX_CLASSES = np.array(['low', 'moderate', 'high'], dtype=object)
+
+# Text fields searched for business model keywords (dotted paths into company data)
+KEYWORD_TEXT_FIELDS = ('business_details.description', 'business_details.business_model',
+                       'industry_details.industry_type', 'industry_details.description',
+                       'financials.description', 'financials.industry', 'financials.sector',
+                       'sales_insights.crm_ready.company.industry', 'company_size_indicator')
+# Content-analysis keyword collections: dicts contribute their keys, lists their items
+KEYWORD_COLLECTION_FIELDS = ('subscription_indicators', 'growth_indicators')
+
+
+def _text_column(values):
+    return np.array([str(value or '').lower() for value in values], dtype=object)
+
+
+def _float_column(values):
+    column = np.empty(len(values), dtype=float)
+    for i, value in enumerate(values):
+        try:
+            column[i] = float(value) if value is not None else np.nan
+        except (TypeError, ValueError):
+            column[i] = np.nan
+    return column
+
+
+def _contains(column, term):
+    """Substring flag per row, evaluated once per distinct value"""
+    unique, inverse = np.unique(column.astype(str), return_inverse=True)
+    return (np.char.find(unique, term) >= 0)[inverse]
+
+
+def build_feature_table(records):
+    """
+    Builds the estimator feature table from financials/metrics dicts
+
+    Each record may carry 'industry', 'sector', 'volatility', 'ebitda_margin',
+    'capex_to_revenue' and 'subscription_hits' (count of subscription terms on
+    the company's website). Missing numbers become NaN.
+
+    Returns:
+        dict: Column name -> numpy array
+    """
+    return {
+        'industry': _text_column([r.get('industry') for r in records]),
+        'sector': _text_column([r.get('sector') for r in records]),
+        'volatility': _float_column([r.get('volatility') for r in records]),
+        'ebitda_margin': _float_column([r.get('ebitda_margin') for r in records]),
+        'capex_to_revenue': _float_column([r.get('capex_to_revenue') for r in records]),
+        'subscription_hits': np.array([r.get('subscription_hits') or 0 for r in records], dtype=int)
+    }
+
+
+def company_keyword_text(company_data):
+    """
+    Lowercased text for keyword checks, built from the descriptive fields only
+
+    Field names, numbers and unrelated nested data are left out, so keywords
+    match what the company does rather than how the record is structured.
+    """
+    parts = []
+    for path in KEYWORD_TEXT_FIELDS:
+        value = company_data
+        for key in path.split('.'):
+            value = value.get(key) if isinstance(value, dict) else None
+        if isinstance(value, str):
+            parts.append(value)
+
+    for field in KEYWORD_COLLECTION_FIELDS:
+        value = company_data.get(field)
+        if isinstance(value, (dict, list, tuple)):
+            parts.extend(str(item) for item in value)
+
+    # Matched technology indicators from the content analysis
+    tech_indicators = company_data.get('tech_indicators')
+    if isinstance(tech_indicators, dict):
+        for category in tech_indicators.values():
+            if isinstance(category, dict) and isinstance(category.get('indicators'), dict):
+                parts.extend(category['indicators'])
+
+    return ' '.join(parts).lower()
+
+
+def count_subscription_hits(text):
+    """Counts subscription-term occurrences in lowercased text"""
+    return sum(text.count(term) for term in SUBSCRIPTION_TERMS)
+
+
+def estimate_recurring_revenue_batch(table):
+    """
+    Business-model recurring revenue estimate (%) per row: software industry,
+    subscription language, low volatility and high margins each add points
+    """
+    volatility = np.where(np.isnan(table['volatility']), 0.5, table['volatility'])
+    ebitda_margin = np.where(np.isnan(table['ebitda_margin']), 10, table['ebitda_margin'])
+
+    recurring = (
+        np.where(_contains(table['industry'], 'software'), 60, 0)
+        + np.where(table['subscription_hits'] > 0, 25, 0)
+        + np.where(volatility < 0.3, 15, 0)
+        + np.where(ebitda_margin > 20, 10, 0)
+    )
+    return np.minimum(recurring, 95)
+
+
+def estimate_industry_recurring_revenue_batch(table):
+    """Industry-based recurring revenue estimate (%) per row; the first matching rule wins"""
+    industry = table['industry']
+    sector = table['sector']
+    volatility = table['volatility']
+    has_volatility = ~np.isnan(volatility)
+
+    conditions = [
+        _contains(industry, 'software') & (_contains(industry, 'service') | _contains(industry, 'saas')),
+        _contains(industry, 'subscription') | _contains(industry, 'streaming'),
+        _contains(industry, 'services') & _contains(industry, 'business'),
+        _contains(sector, 'technology'),
+        _contains(sector, 'health') | _contains(industry, 'medical'),
+        _contains(sector, 'utilities') | _contains(industry, 'telecom'),
+        _contains(sector, 'financial') | _contains(industry, 'banking'),
+        # Lower volatility can indicate more recurring revenue
+        has_volatility & (volatility < 0.2),
+        has_volatility & (volatility < 0.3),
+        has_volatility & (volatility < 0.4)
+    ]
+    choices = [80, 75, 65, 55, 60, 70, 50, 60, 50, 40]
+    return np.select(conditions, choices, default=30)
+
+
+def classify_capex_batch(table):
+    """CapEx requirement class ('low', 'moderate', 'high') per row"""
+    industry = table['industry']
+    sector = table['sector']
+    ratio = table['capex_to_revenue']
+    has_ratio = ~np.isnan(ratio)
+
+    # Indices into CAPEX_CLASSES; the CapEx to revenue ratio wins when available
+    conditions = [
+        has_ratio & (ratio < 5),
+        has_ratio & (ratio < 15),
+        has_ratio,
+        _contains(industry, 'software') | _contains(industry, 'digital'),
+        _contains(sector, 'technology') & ~_contains(industry, 'hardware'),
+        _contains(industry, 'manufacturing') | _contains(sector, 'industrial'),
+        _contains(sector, 'utilities') | _contains(industry, 'telecom'),
+        _contains(sector, 'energy') | _contains(sector, 'materials'),
+        _contains(industry, 'retail'),
+        _contains(industry, 'services')
+    ]
+    choices = [0, 1, 2, 0, 0, 2, 2, 2, 1, 0]
+    return CAPEX_CLASSES[np.select(conditions, choices, default=1)]
@@ -1,40 +1,160 @@
+import os
 import requests
 import pandas as pd
 import numpy as np
 import json
 import re
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from contextlib import suppress
+from .model_store import DEFAULT_MODEL_DIR, load_model_artifacts
+from .price_store import get_price_store
+from .finance_replay import create_finance_session
+from .revenue_estimator import (
+    build_feature_table, estimate_industry_recurring_revenue_batch, classify_capex_batch
+)
+from .finance_cache import get_finance_cache, normalize_company_key
+from .financial_provider import TickerLookupError, company_names_match
+from .criteria_engine import get_criteria_engine, record_from_financials, match_tier
 
 logger = logging.getLogger(__name__)
 
+# Base URLs can point at a local mock finance server (see modules/finance_replay.py)
+YAHOO_BASE_URL = os.environ.get('YAHOO_BASE_URL', 'https://finance.yahoo.com')
+YAHOO_QUERY1_URL = os.environ.get('YAHOO_QUERY1_URL', 'https://query1.finance.yahoo.com')
+YAHOO_QUERY2_URL = os.environ.get('YAHOO_QUERY2_URL', 'https://query2.finance.yahoo.com')
+
+# Display values such as "1,234.5", "1.2M", "-3.4B" or "-"
+_VALUE_PATTERN = re.compile(r'^(-?[\d.]+)([TBMk]?)$')
+_MULTIPLIERS = {'': 1, 'k': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+
+
+def parse_financial_values(texts):
+    """
+    Converts Yahoo display values ("1.2M", "2,500.3", "-4.1B", "-") to floats
+    in one vectorized pass; unparseable entries become None
+    """
+    if not texts:
+        return []
+    parts = pd.Series(list(texts), dtype=object).astype(str).str.strip().str.replace(',', '', regex=False).str.extract(_VALUE_PATTERN)
+    numbers = pd.to_numeric(parts[0], errors='coerce') * parts[1].map(_MULTIPLIERS)
+    return [None if pd.isna(value) else float(value) for value in numbers]
+
 class YahooFinanceHandler:
     """Handles integration with Yahoo Finance API to get financial data for companies"""
     
-    def __init__(self):
+    # Metrics that the trained models can fill in when Yahoo has no data
+    PREDICTED_METRICS = ['annual_revenue', 'ebitda_margin', 'free_cash_flow']
+    # Financial metrics included in the prediction feature vector, in order
+    FEATURE_METRICS = ['annual_revenue', 'ebitda', 'total_debt', 'cash',
+                       'operating_cash_flow', 'free_cash_flow', 'capex']
+    # Statement line items and their fundamentals-timeseries type names
+    STATEMENT_ITEMS = {
+        'income_statement': {
+            'Total Revenue': 'TotalRevenue',
+            'Operating Income': 'OperatingIncome',
+            'Net Income': 'NetIncome',
+            'EBITDA': 'EBITDA',
+            'Gross Profit': 'GrossProfit',
+            'Operating Expense': 'OperatingExpense'
+        },
+        'balance_sheet': {
+            'Total Assets': 'TotalAssets',
+            'Total Liabilities': 'TotalLiabilitiesNetMinorityInterest',
+            'Total Stockholder Equity': 'StockholdersEquity',
+            'Cash And Cash Equivalents': 'CashAndCashEquivalents',
+            'Total Debt': 'TotalDebt'
+        },
+        'cash_flow': {
+            'Operating Cash Flow': 'OperatingCashFlow',
+            'Free Cash Flow': 'FreeCashFlow',
+            'Capital Expenditure': 'CapitalExpenditure',
+            'Cash Flow From Investing Activities': 'InvestingCashFlow',
+            'Cash Flow From Financing Activities': 'FinancingCashFlow'
+        }
+    }
+    # One alternation per statement so the HTML fallback finds every row in a single pass
+    STATEMENT_ROW_PATTERNS = {
+        statement: re.compile('^(' + '|'.join(re.escape(item) for item in items) + ')$')
+        for statement, items in STATEMENT_ITEMS.items()
+    }
+    
+    def __init__(self, cache=None, session=None):
         """Initialize the Yahoo Finance handler with required headers and URLs"""
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.base_url = "https://finance.yahoo.com"
-        self.search_url = "https://query1.finance.yahoo.com/v1/finance/search"
-        self.quote_url = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-        self.company_url = "https://finance.yahoo.com/quote/{symbol}/profile"
-        self.financials_url = "https://finance.yahoo.com/quote/{symbol}/financials"
-        self.balance_sheet_url = "https://finance.yahoo.com/quote/{symbol}/balance-sheet"
-        self.cash_flow_url = "https://finance.yahoo.com/quote/{symbol}/cash-flow"
+        self.base_url = YAHOO_BASE_URL
+        self.search_url = YAHOO_QUERY1_URL + "/v1/finance/search"
+        self.quote_url = YAHOO_QUERY1_URL + "/v8/finance/chart/{symbol}"
+        self.company_url = YAHOO_BASE_URL + "/quote/{symbol}/profile"
+        self.financials_url = YAHOO_BASE_URL + "/quote/{symbol}/financials"
+        self.balance_sheet_url = YAHOO_BASE_URL + "/quote/{symbol}/balance-sheet"
+        self.cash_flow_url = YAHOO_BASE_URL + "/quote/{symbol}/cash-flow"
+        self.timeseries_url = YAHOO_QUERY2_URL + "/ws/fundamentals-timeseries/v1/finance/timeseries/{symbol}"
+        
+        # Per-request timeout, per-source deadline counted from when the source starts
+        # running, and the longest a source may wait for a free fetch worker (seconds)
+        self.timeout = 10
+        self.fetch_deadline = 15
+        self.queue_timeout = 60
+        # Shared by every concurrent analysis (request threads, job and batch workers),
+        # each fanning out up to four sources
+        self.max_workers = int(os.environ.get('YAHOO_FETCH_WORKERS', 32))
+        
+        # Shared session keeps connections to Yahoo alive across sub-requests;
+        # an injected session can record, replay or redirect the traffic
+        self.session = session or create_finance_session(pool_size=self.max_workers * 2)
+        self.session.headers.update(self.headers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='yahoo-fetch')
+        
+        # Persistent cache for ticker lookups, statements, quotes and profiles
+        self.cache = cache or get_finance_cache()
+        
+        # Local monthly close series, topped up at most once per refresh interval (seconds)
+        self.price_store = get_price_store()
+        self.price_refresh_interval = 24 * 3600
         
         # ML model for predicting missing financials
         self.model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
+        self.metric_models = {}
         self.model_trained = False
+        self.model_version = None
+    
+    def load_models(self, model_dir=DEFAULT_MODEL_DIR, version=None):
+        """Load trained per-metric regressors from the model store"""
+        names = ['metrics_scaler'] + [f'metrics_{key}' for key in self.PREDICTED_METRICS]
+        version, models = load_model_artifacts(names, model_dir, version)
+        
+        self.metric_models = {
+            key: models[f'metrics_{key}'] for key in self.PREDICTED_METRICS
+            if f'metrics_{key}' in models
+        }
+        if 'metrics_scaler' in models and self.metric_models:
+            self.scaler = models['metrics_scaler']
+            self.model_trained = True
+            self.model_version = version
+            logger.info(f"Loaded missing-metric models version {version} for {sorted(self.metric_models)}")
+        else:
+            self.metric_models = {}
+            self.model_trained = False
+        return self.model_trained
     
-    def search_ticker(self, company_name):
-        """Search for a company ticker symbol by name"""
+    def search_ticker(self, company_name, raise_errors=False):
+        """
+        Search for a company ticker symbol by name
+
+        With raise_errors, a search that could not be completed (request error,
+        timeout, non-200 response) raises TickerLookupError instead of
+        returning None, so callers can tell it apart from "no such company".
+        """
+        failure = None
         try:
             params = {
                 'q': company_name,
@@ -45,43 +165,49 @@ class YahooFinanceHandler:
             }
             
             # Use timeout and handle connection issues
-            response = requests.get(
+            response = self.session.get(
                 self.search_url, 
-                headers=self.headers, 
                 params=params,
-                timeout=10  # 10 second timeout
+                timeout=self.timeout
             )
             
             # Check if the request was successful
             if response.status_code != 200:
                 logger.warning(f"Search ticker API returned status code {response.status_code}")
-                return self._search_alternative(company_name)
-            
-            # Parse the JSON response
-            try:
-                data = response.json()
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.error(f"Failed to parse JSON response: {str(e)}")
-                return self._search_alternative(company_name)
-            
-            # Check if the response has the expected structure
-            if 'quotes' in data and data['quotes']:
-                # Filter quotes to get only equity type
-                equity_quotes = [quote for quote in data['quotes'] if quote.get('quoteType') == 'EQUITY']
+                failure = f"search API returned status code {response.status_code}"
+            else:
+                # Parse the JSON response
+                try:
+                    data = response.json()
+                except (json.JSONDecodeError, ValueError) as e:
+                    logger.error(f"Failed to parse JSON response: {str(e)}")
+                    failure = "unparseable search response"
+                    data = {}
                 
-                if equity_quotes:
-                    # Sort by name similarity to input (basic implementation)
-                    return equity_quotes[0]['symbol']
-            
-            # Try alternative method if no results
-            return self._search_alternative(company_name)
+                # Check if the response has the expected structure
+                if 'quotes' in data and data['quotes']:
+                    # Only an equity whose listed name matches the company confirms the symbol;
+                    # fuzzy search otherwise returns unrelated companies
+                    for quote in data['quotes']:
+                        if quote.get('quoteType') == 'EQUITY' and quote.get('symbol') and any(
+                                company_names_match(company_name, quote.get(field))
+                                for field in ('shortname', 'longname')):
+                            return quote['symbol']
             
         except requests.RequestException as e:
             logger.error(f"Request error searching for ticker: {str(e)}")
-            return self._search_alternative(company_name)
+            failure = str(e)
         except Exception as e:
             logger.error(f"Unexpected error searching for ticker: {str(e)}")
+            if raise_errors:
+                raise TickerLookupError(f"Ticker search failed for {company_name}: {str(e)}") from e
             return None
+        
+        # Try alternative method if the search failed or found nothing
+        ticker = self._search_alternative(company_name, raise_errors=raise_errors)
+        if not ticker and failure and raise_errors:
+            raise TickerLookupError(f"Ticker search failed for {company_name}: {failure}")
+        return ticker
 
     def get_company_profile(self, ticker):
         """Get company profile information with improved error handling"""
@@ -89,11 +215,7 @@ class YahooFinanceHandler:
             url = self.company_url.format(symbol=ticker)
             
             # Use timeout and handle connection issues
-            response = requests.get(
-                url, 
-                headers=self.headers,
-                timeout=10  # 10 second timeout
-            )
+            response = self.session.get(url, timeout=self.timeout)
             
             # Check if the request was successful
             if response.status_code != 200:
@@ -160,7 +282,7 @@ class YahooFinanceHandler:
             logger.error(f"Unexpected error getting company profile for {ticker}: {str(e)}")
             return {}
     
-    def _search_alternative(self, company_name):
+    def _search_alternative(self, company_name, raise_errors=False):
         """Alternative search method using company description"""
         try:
             # Clean company name: remove common suffixes like Inc, LLC, etc.
@@ -174,23 +296,42 @@ class YahooFinanceHandler:
                 search_term = clean_name
                 
             url = f"{self.base_url}/lookup?s={search_term}"
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, timeout=self.timeout)
+            if raise_errors and response.status_code != 200:
+                raise TickerLookupError(f"Ticker lookup page returned status code {response.status_code}")
             
             # Parse HTML to extract the first search result
             soup = BeautifulSoup(response.text, 'html.parser')
             results_table = soup.find('table', {'class': 'lookup-table'})
             
             if results_table:
-                first_row = results_table.find('tr', {'class': 'data-row'})
-                if first_row:
-                    ticker_cell = first_row.find('td', {'class': 'data-col0'})
-                    if ticker_cell:
+                # First result row whose company name column confirms the match
+                for row in results_table.find_all('tr', {'class': 'data-row'}):
+                    ticker_cell = row.find('td', {'class': 'data-col0'})
+                    name_cell = row.find('td', {'class': 'data-col1'})
+                    if ticker_cell and name_cell and company_names_match(company_name, name_cell.text.strip()):
                         return ticker_cell.text.strip()
             
             return None
             
+        except TickerLookupError:
+            raise
         except Exception as e:
             logger.error(f"Error in alternative ticker search: {str(e)}")
+            if raise_errors:
+                raise TickerLookupError(f"Alternative ticker search failed for {company_name}: {str(e)}") from e
+            return None
+    
+    def resolve_ticker(self, company_name):
+        """Resolve a company name to a ticker, caching hits and definitive misses"""
+        try:
+            return self.cache.get_or_fetch(
+                'ticker', normalize_company_key(company_name),
+                self.search_ticker, company_name, True, cache_empty=True
+            )
+        except TickerLookupError as e:
+            # Failed searches are not cached, so the next lookup retries
+            logger.warning(str(e))
             return None
     
     def get_company_financials(self, company_name=None, ticker=None):
@@ -198,34 +339,13 @@ class YahooFinanceHandler:
         try:
             # If no ticker provided, search for it
             if not ticker and company_name:
-                ticker = self.search_ticker(company_name)
+                ticker = self.resolve_ticker(company_name)
             
             if not ticker:
                 logger.warning(f"No ticker found for {company_name}")
                 return None
             
-            # Get company profile
-            profile = self.get_company_profile(ticker)
-            
-            # Get stock data
-            stock_data = self.get_stock_data(ticker)
-            
-            # Get financial statements
-            income_statement = self.get_income_statement(ticker)
-            balance_sheet = self.get_balance_sheet(ticker)
-            cash_flow = self.get_cash_flow(ticker)
-            
-            # Combine all data
-            financials = {
-                'profile': profile,
-                'stock_data': stock_data,
-                'income_statement': income_statement,
-                'balance_sheet': balance_sheet,
-                'cash_flow': cash_flow
-            }
-            
-            # Extract key metrics
-            metrics = self.extract_key_metrics(financials)
+            metrics = self.get_ticker_metrics(ticker)
             
             # Predict missing values if possible
             if self.model_trained:
@@ -237,65 +357,139 @@ class YahooFinanceHandler:
             logger.error(f"Error getting financials for {ticker}: {str(e)}")
             return None
     
+    def get_ticker_metrics(self, ticker):
+        """
+        Fetch a ticker's Yahoo sources and extract the key metrics (no model predictions)
+        
+        Sources that hit their deadline are listed in 'timed_out_sources' so
+        callers can tell missing data from data that was not fetched in time.
+        """
+        # Fetch profile, prices, market cap and statements concurrently
+        financials = self._fetch_financial_sources(ticker)
+        timed_out = financials.pop('timed_out')
+        
+        # Extract key metrics
+        metrics = self.extract_key_metrics(financials)
+        if timed_out:
+            metrics['timed_out_sources'] = timed_out
+        return metrics
     
+    def _fetch_financial_sources(self, ticker):
+        """
+        Fetch all Yahoo sources for a ticker in parallel.
+        Each source gets fetch_deadline seconds from when it starts running, so
+        time spent waiting for a worker of the shared pool does not count
+        against it. Sources that fail are left empty; sources still running at
+        their deadline, or still waiting after queue_timeout, are left empty and
+        listed under 'timed_out'.
+        """
+        tasks = {
+            'profile': ('profiles', self.get_company_profile, {}),
+            'price_stats': ('quotes', self._get_price_stats, {}),
+            'market_cap': ('quotes', self._get_market_cap, None),
+            'statements': ('statements', self._fetch_financial_statements, {})
+        }
+        results = {name: default for name, (_, _, default) in tasks.items()}
+        
+        # Serve what the cache already holds and only fetch the rest
+        fetches = {}
+        for name, (namespace, fetch, _) in tasks.items():
+            cached = self.cache.get(namespace, f'{ticker}:{name}')
+            if cached is not None:
+                results[name] = cached
+            else:
+                fetches[name] = (namespace, fetch)
+        
+        started = {}
+        
+        def run(name, fetch):
+            started[name] = time.monotonic()
+            return fetch(ticker)
+        
+        submitted = time.monotonic()
+        futures = {self.executor.submit(run, name, fetch): name for name, (_, fetch) in fetches.items()}
+        pending = set(futures)
+        timed_out = []
+        while pending:
+            # Wake up at the earliest deadline of a running source (or the queue timeout)
+            deadlines = [submitted + self.queue_timeout] + [
+                started[futures[future]] + self.fetch_deadline
+                for future in pending if futures[future] in started
+            ]
+            done, pending = wait(pending, timeout=max(min(deadlines) - time.monotonic(), 0),
+                                 return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                    if results[name]:
+                        self.cache.set(fetches[name][0], f'{ticker}:{name}', results[name])
+                except Exception as e:
+                    logger.error(f"Error fetching {name} for {ticker}: {str(e)}")
+            
+            now = time.monotonic()
+            for future in list(pending):
+                name = futures[future]
+                if name in started:
+                    expired = now >= started[name] + self.fetch_deadline
+                else:
+                    expired = now >= submitted + self.queue_timeout
+                if expired:
+                    future.cancel()
+                    pending.discard(future)
+                    timed_out.append(name)
+                    logger.warning(f"Timed out fetching {name} for {ticker}, using partial data")
+        
+        stock_data = dict(results.pop('price_stats'))
+        if stock_data:
+            stock_data['market_cap'] = results.pop('market_cap')
+        else:
+            results.pop('market_cap')
+        results['stock_data'] = stock_data
+        
+        statements = results.pop('statements')
+        for statement in self.STATEMENT_ITEMS:
+            results[statement] = statements.get(statement, {})
+        results['timed_out'] = sorted(timed_out)
+        return results
     
     def get_stock_data(self, ticker):
         """Get stock price data"""
+        stock_data = self._get_price_stats(ticker)
+        if stock_data:
+            stock_data['market_cap'] = self._get_market_cap(ticker)
+        return stock_data
+    
+    def _get_price_stats(self, ticker):
+        """Get price statistics (price, 52-week range, volatility, momentum) from stored monthly closes"""
         try:
-            # Get data for past 2 years
-            end_date = int(datetime.now().timestamp())
-            start_date = int((datetime.now() - timedelta(days=730)).timestamp())
-            
-            params = {
-                'period1': start_date,
-                'period2': end_date,
-                'interval': '1mo',  # Monthly data
-                'includePrePost': False,
-                'events': 'div,split'
-            }
-            
-            url = self.quote_url.format(symbol=ticker)
-            response = requests.get(url, headers=self.headers, params=params)
-            data = response.json()
-            
-            if 'chart' not in data or 'result' not in data['chart'] or not data['chart']['result']:
-                return {}
+            # Statistics cover the past 2 years
+            window_start = int((datetime.now() - timedelta(days=730)).timestamp())
+            
+            # Only fetch bars from the last stored one on, and only once the series is stale
+            if not self.price_store.is_fresh(ticker, '1mo', self.price_refresh_interval):
+                last_stored = self.price_store.last_timestamp(ticker, '1mo')
+                params = {
+                    'period1': last_stored if last_stored and last_stored > window_start else window_start,
+                    'period2': int(datetime.now().timestamp()),
+                    'interval': '1mo',  # Monthly data
+                    'includePrePost': False,
+                    'events': 'div,split'
+                }
                 
-            chart_data = data['chart']['result'][0]
-            
-            # Extract timestamps and closing prices
-            timestamps = chart_data.get('timestamp', [])
-            close_prices = chart_data.get('indicators', {}).get('quote', [{}])[0].get('close', [])
-            
-            if not timestamps or not close_prices:
-                return {}
+                url = self.quote_url.format(symbol=ticker)
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                data = response.json()
                 
-            # Convert to DataFrame
-            df = pd.DataFrame({
-                'date': [datetime.fromtimestamp(ts) for ts in timestamps],
-                'close': close_prices
-            })
-            
-            # Calculate additional metrics
-            df['return'] = df['close'].pct_change()
-            
-            # Calculate volatility (annualized standard deviation of returns)
-            volatility = df['return'].std() * np.sqrt(12)  # Annualized for monthly data
-            
-            # Calculate momentum (6-month return)
-            momentum = df['close'].iloc[-1] / df['close'].iloc[-7] - 1 if len(df) >= 7 else None
-            
-            # Get current market cap
-            market_cap = self._get_market_cap(ticker)
-            
-            return {
-                'current_price': df['close'].iloc[-1] if not df.empty else None,
-                'price_52w_high': df['close'].max() if not df.empty else None,
-                'price_52w_low': df['close'].min() if not df.empty else None,
-                'volatility': volatility,
-                'momentum': momentum,
-                'market_cap': market_cap
-            }
+                if data.get('chart', {}).get('result'):
+                    chart_data = data['chart']['result'][0]
+                    timestamps = chart_data.get('timestamp', [])
+                    close_prices = chart_data.get('indicators', {}).get('quote', [{}])[0].get('close', [])
+                    if timestamps and close_prices:
+                        self.price_store.append(ticker, '1mo', timestamps, close_prices)
+            
+            return self.price_store.stats(ticker, '1mo', since=window_start)
             
         except Exception as e:
             logger.error(f"Error getting stock data for {ticker}: {str(e)}")
@@ -305,7 +499,7 @@ class YahooFinanceHandler:
         """Get current market cap"""
         try:
             url = f"{self.base_url}/quote/{ticker}"
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, timeout=self.timeout)
             
             # Parse HTML to extract market cap
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -315,18 +509,7 @@ class YahooFinanceHandler:
                 market_cap_value = market_cap_row.find_next_sibling('td').text.strip()
                 
                 # Convert to numeric (e.g., "1.2T" to 1,200,000,000,000)
-                multiplier = 1
-                if market_cap_value.endswith('T'):
-                    multiplier = 1e12
-                    market_cap_value = market_cap_value[:-1]
-                elif market_cap_value.endswith('B'):
-                    multiplier = 1e9
-                    market_cap_value = market_cap_value[:-1]
-                elif market_cap_value.endswith('M'):
-                    multiplier = 1e6
-                    market_cap_value = market_cap_value[:-1]
-                
-                return float(market_cap_value) * multiplier
+                return parse_financial_values([market_cap_value])[0]
             
             return None
             
@@ -334,169 +517,99 @@ class YahooFinanceHandler:
             logger.error(f"Error getting market cap for {ticker}: {str(e)}")
             return None
     
+    def get_financial_statements(self, ticker):
+        """Get the income statement, balance sheet and cash flow statement (cached)"""
+        return self.cache.get_or_fetch(
+            'statements', f'{ticker}:statements', self._fetch_financial_statements, ticker
+        ) or {}
+    
     def get_income_statement(self, ticker):
         """Get income statement data"""
-        try:
-            url = self.financials_url.format(symbol=ticker)
-            response = requests.get(url, headers=self.headers)
-            
-            # Parse HTML to extract income statement data
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find all rows in the income statement table
-            income_statement = {}
-            
-            # Common financial items to extract
-            items = ['Total Revenue', 'Operating Income', 'Net Income', 'EBITDA', 
-                   'Gross Profit', 'Operating Expense']
-            
-            for item in items:
-                row = soup.find('div', string=re.compile(f'^{re.escape(item)}$'))
-                if row:
-                    values = []
-                    value_cells = row.parent.parent.find_all('div', {'data-test': 'fin-col'})
-                    for cell in value_cells:
-                        try:
-                            # Parse the value and convert to numeric
-                            value_text = cell.text.strip()
-                            if value_text == '-':
-                                values.append(None)
-                            else:
-                                # Handle values like "1.2M", "2.5B", etc.
-                                multiplier = 1
-                                if value_text.endswith('T'):
-                                    multiplier = 1e12
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('B'):
-                                    multiplier = 1e9
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('M'):
-                                    multiplier = 1e6
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('k'):
-                                    multiplier = 1e3
-                                    value_text = value_text[:-1]
-                                
-                                values.append(float(value_text.replace(',', '')) * multiplier)
-                        except Exception:
-                            values.append(None)
-                    
-                    income_statement[item.lower().replace(' ', '_')] = values
-            
-            return income_statement
-            
-        except Exception as e:
-            logger.error(f"Error getting income statement for {ticker}: {str(e)}")
-            return {}
+        return self.get_financial_statements(ticker).get('income_statement', {})
     
     def get_balance_sheet(self, ticker):
         """Get balance sheet data"""
-        try:
-            url = self.balance_sheet_url.format(symbol=ticker)
-            response = requests.get(url, headers=self.headers)
-            
-            # Parse HTML to extract balance sheet data
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find all rows in the balance sheet table
-            balance_sheet = {}
-            
-            # Common balance sheet items to extract
-            items = ['Total Assets', 'Total Liabilities', 'Total Stockholder Equity',
-                   'Cash And Cash Equivalents', 'Total Debt']
-            
-            for item in items:
-                row = soup.find('div', string=re.compile(f'^{re.escape(item)}$'))
-                if row:
-                    values = []
-                    value_cells = row.parent.parent.find_all('div', {'data-test': 'fin-col'})
-                    for cell in value_cells:
-                        try:
-                            # Parse the value and convert to numeric
-                            value_text = cell.text.strip()
-                            if value_text == '-':
-                                values.append(None)
-                            else:
-                                # Handle values like "1.2M", "2.5B", etc.
-                                multiplier = 1
-                                if value_text.endswith('T'):
-                                    multiplier = 1e12
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('B'):
-                                    multiplier = 1e9
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('M'):
-                                    multiplier = 1e6
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('k'):
-                                    multiplier = 1e3
-                                    value_text = value_text[:-1]
-                                
-                                values.append(float(value_text.replace(',', '')) * multiplier)
-                        except Exception:
-                            values.append(None)
-                    
-                    balance_sheet[item.lower().replace(' ', '_')] = values
-            
-            return balance_sheet
-            
-        except Exception as e:
-            logger.error(f"Error getting balance sheet for {ticker}: {str(e)}")
-            return {}
+        return self.get_financial_statements(ticker).get('balance_sheet', {})
     
     def get_cash_flow(self, ticker):
         """Get cash flow statement data"""
+        return self.get_financial_statements(ticker).get('cash_flow', {})
+    
+    def _fetch_financial_statements(self, ticker):
+        """
+        Fetch all three statements from the JSON timeseries endpoint in one request,
+        scraping the HTML pages only for statements the endpoint did not return
+        """
+        statements = self._get_statements_json(ticker)
+        
+        html_urls = {
+            'income_statement': self.financials_url,
+            'balance_sheet': self.balance_sheet_url,
+            'cash_flow': self.cash_flow_url
+        }
+        for statement, url in html_urls.items():
+            if not statements.get(statement):
+                statements[statement] = self._scrape_statement(ticker, statement, url)
+        
+        return statements if any(statements.values()) else {}
+    
+    def _get_statements_json(self, ticker):
+        """Get annual statement values from the fundamentals-timeseries endpoint"""
         try:
-            url = self.cash_flow_url.format(symbol=ticker)
-            response = requests.get(url, headers=self.headers)
-            
-            # Parse HTML to extract cash flow data
+            types = [
+                f'annual{type_name}'
+                for items in self.STATEMENT_ITEMS.values()
+                for type_name in items.values()
+            ]
+            params = {
+                'type': ','.join(types),
+                'period1': int((datetime.now() - timedelta(days=5 * 365)).timestamp()),
+                'period2': int(datetime.now().timestamp())
+            }
+            response = self.session.get(
+                self.timeseries_url.format(symbol=ticker), params=params, timeout=self.timeout
+            )
+            if response.status_code != 200:
+                logger.warning(f"Timeseries API returned status code {response.status_code} for {ticker}")
+                return {}
+            results = response.json().get('timeseries', {}).get('result') or []
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Timeseries request failed for {ticker}: {str(e)}")
+            return {}
+        
+        # Values per type, most recent period first
+        series = {}
+        for result in results:
+            type_name = (result.get('meta', {}).get('type') or [None])[0]
+            points = [point for point in (result.get(type_name) or []) if point]
+            points.sort(key=lambda point: point.get('asOfDate', ''), reverse=True)
+            series[type_name] = [point.get('reportedValue', {}).get('raw') for point in points]
+        
+        statements = {}
+        for statement, items in self.STATEMENT_ITEMS.items():
+            statements[statement] = {
+                item.lower().replace(' ', '_'): series[f'annual{type_name}']
+                for item, type_name in items.items()
+                if series.get(f'annual{type_name}')
+            }
+        return statements
+    
+    def _scrape_statement(self, ticker, statement, url_template):
+        """Scrape one statement's line items from its Yahoo HTML page"""
+        try:
+            response = self.session.get(url_template.format(symbol=ticker), timeout=self.timeout)
             soup = BeautifulSoup(response.text, 'html.parser')
             
-            # Find all rows in the cash flow table
-            cash_flow = {}
-            
-            # Common cash flow items to extract
-            items = ['Operating Cash Flow', 'Free Cash Flow', 'Capital Expenditure',
-                   'Cash Flow From Investing Activities', 'Cash Flow From Financing Activities']
-            
-            for item in items:
-                row = soup.find('div', string=re.compile(f'^{re.escape(item)}$'))
-                if row:
-                    values = []
-                    value_cells = row.parent.parent.find_all('div', {'data-test': 'fin-col'})
-                    for cell in value_cells:
-                        try:
-                            # Parse the value and convert to numeric
-                            value_text = cell.text.strip()
-                            if value_text == '-':
-                                values.append(None)
-                            else:
-                                # Handle values like "1.2M", "2.5B", etc.
-                                multiplier = 1
-                                if value_text.endswith('T'):
-                                    multiplier = 1e12
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('B'):
-                                    multiplier = 1e9
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('M'):
-                                    multiplier = 1e6
-                                    value_text = value_text[:-1]
-                                elif value_text.endswith('k'):
-                                    multiplier = 1e3
-                                    value_text = value_text[:-1]
-                                
-                                values.append(float(value_text.replace(',', '')) * multiplier)
-                        except Exception:
-                            values.append(None)
-                    
-                    cash_flow[item.lower().replace(' ', '_')] = values
-            
-            return cash_flow
+            values_by_item = {}
+            for row in soup.find_all('div', string=self.STATEMENT_ROW_PATTERNS[statement]):
+                value_cells = row.parent.parent.find_all('div', {'data-test': 'fin-col'})
+                item = row.text.strip().lower().replace(' ', '_')
+                values_by_item[item] = parse_financial_values([cell.text for cell in value_cells])
+            
+            return values_by_item
             
         except Exception as e:
-            logger.error(f"Error getting cash flow for {ticker}: {str(e)}")
+            logger.error(f"Error getting {statement.replace('_', ' ')} for {ticker}: {str(e)}")
             return {}
     
     def extract_key_metrics(self, financials):
@@ -601,127 +714,45 @@ class YahooFinanceHandler:
     
     def _estimate_recurring_revenue(self, metrics):
         """Estimate recurring revenue percentage based on industry and volatility"""
-        industry = metrics.get('industry', '').lower()
-        sector = metrics.get('sector', '').lower()
-        volatility = metrics.get('volatility')
-        
-        # Software as a Service typically has high recurring revenue
-        if 'software' in industry and ('service' in industry or 'saas' in industry):
-            return 80
-        
-        # Subscription-based businesses
-        if any(term in industry for term in ['subscription', 'streaming']):
-            return 75
-        
-        # Business services often have higher recurring revenue
-        if 'services' in industry and 'business' in industry:
-            return 65
-        
-        # Technology sector typically has moderate recurring revenue
-        if 'technology' in sector:
-            return 55
-        
-        # Healthcare often has good recurring revenue
-        if 'health' in sector or 'medical' in industry:
-            return 60
-        
-        # Utilities and telecommunication have steady revenues
-        if 'utilities' in sector or 'telecom' in industry:
-            return 70
-        
-        # Financial services can have recurring components
-        if 'financial' in sector or 'banking' in industry:
-            return 50
-        
-        # Lower volatility can indicate more recurring revenue
-        if volatility is not None:
-            if volatility < 0.2:  # Very stable
-                return 60
-            elif volatility < 0.3:  # Somewhat stable
-                return 50
-            elif volatility < 0.4:  # Moderate volatility
-                return 40
-        
-        # Default estimate for unknown industries
-        return 30
+        return int(estimate_industry_recurring_revenue_batch(build_feature_table([metrics]))[0])
     
     def _determine_capex_requirements(self, metrics):
         """Determine capital expenditure requirements (low, moderate, high)"""
-        industry = metrics.get('industry', '').lower()
-        sector = metrics.get('sector', '').lower()
-        capex_ratio = metrics.get('capex_to_revenue')
-        
-        # Use CapEx to revenue ratio if available
-        if capex_ratio is not None:
-            if capex_ratio < 5:
-                return 'low'
-            elif capex_ratio < 15:
-                return 'moderate'
-            else:
-                return 'high'
-        
-        # Software and digital services typically have low CapEx
-        if 'software' in industry or 'digital' in industry:
-            return 'low'
-        
-        # Technology can vary but often moderate
-        if 'technology' in sector and 'hardware' not in industry:
-            return 'low'
-        
-        # Manufacturing and industrial typically have high CapEx
-        if 'manufacturing' in industry or 'industrial' in sector:
-            return 'high'
-        
-        # Utilities and telecom have high CapEx
-        if 'utilities' in sector or 'telecom' in industry:
-            return 'high'
-        
-        # Energy and materials typically have high CapEx
-        if 'energy' in sector or 'materials' in sector:
-            return 'high'
-        
-        # Retail can vary but often moderate
-        if 'retail' in industry:
-            return 'moderate'
-        
-        # Services typically have lower CapEx
-        if 'services' in industry:
-            return 'low'
-        
-        # Default to moderate for unknown industries
-        return 'moderate'
+        return str(classify_capex_batch(build_feature_table([metrics]))[0])
     
     def predict_missing_metrics(self, metrics):
         """Use ML model to predict missing financial metrics"""
-        # If missing key values, try to predict them
-        if self.model_trained:
-            missing_keys = []
-            
-            # Check for missing key metrics
-            if metrics.get('annual_revenue') is None:
-                missing_keys.append('annual_revenue')
-            if metrics.get('ebitda_margin') is None:
-                missing_keys.append('ebitda_margin')
-            if metrics.get('free_cash_flow') is None:
-                missing_keys.append('free_cash_flow')
-            
-            if missing_keys:
-                # Create feature vector from available metrics
-                features = self._create_feature_vector(metrics)
-                if features is not None:
-                    # Scale features
-                    scaled_features = self.scaler.transform([features])
-                    
-                    # Predict each missing metric
-                    for key in missing_keys:
-                        # Predict using appropriate model
-                        predicted_value = self.model.predict(scaled_features)[0]
-                        
-                        # Store prediction with uncertainty flag
-                        metrics[key] = predicted_value
-                        metrics[f'{key}_predicted'] = True
-        
-        return metrics
+        return self.predict_missing_metrics_batch([metrics])[0]
+    
+    def predict_missing_metrics_batch(self, metrics_list):
+        """
+        Predict missing key metrics for many companies at once.
+        Rows are grouped by missing metric so each model runs a single
+        batched prediction over the scaled feature matrix.
+        """
+        if not self.model_trained:
+            return metrics_list
+        
+        features = [self._create_feature_vector(metrics) for metrics in metrics_list]
+        usable = [i for i, vector in enumerate(features) if vector is not None]
+        if not usable:
+            return metrics_list
+        
+        scaled = self.scaler.transform(np.array([features[i] for i in usable], dtype=float))
+        
+        for key, model in self.metric_models.items():
+            rows = [pos for pos, i in enumerate(usable) if metrics_list[i].get(key) is None]
+            if not rows:
+                continue
+            
+            predictions = model.predict(scaled[rows])
+            for pos, predicted_value in zip(rows, predictions):
+                # Store prediction with uncertainty flag
+                metrics = metrics_list[usable[pos]]
+                metrics[key] = float(predicted_value)
+                metrics[f'{key}_predicted'] = True
+        
+        return metrics_list
     
     def _create_feature_vector(self, metrics):
         """Create a feature vector from available metrics for prediction"""
@@ -735,7 +766,7 @@ class YahooFinanceHandler:
         
         # Encode sector and industry (this would normally use one-hot encoding)
         # For simplicity, we'll just use a few proxy values based on sector
-        sector = metrics.get('sector', '').lower()
+        sector = (metrics.get('sector') or '').lower()
         if 'technology' in sector:
             features.extend([1, 0, 0, 0, 0])
         elif 'health' in sector:
@@ -750,160 +781,27 @@ class YahooFinanceHandler:
             features.extend([0, 0, 0, 0, 0])
             
         # Add numeric features
-        features.append(metrics.get('employees', 0))
-        features.append(metrics.get('market_cap', 0))
-        features.append(metrics.get('volatility', 0.3))
-        
-        # Add available financial metrics
-        features.append(metrics.get('annual_revenue', 0))
-        features.append(metrics.get('ebitda', 0))
-        features.append(metrics.get('total_debt', 0))
-        features.append(metrics.get('cash', 0))
-        features.append(metrics.get('operating_cash_flow', 0))
-        features.append(metrics.get('free_cash_flow', 0))
-        features.append(metrics.get('capex', 0))
+        features.append(metrics.get('employees') or 0)
+        features.append(metrics.get('market_cap') or 0)
+        features.append(metrics.get('volatility') or 0.3)
+        
+        # Add available financial metrics (missing values are zero-filled)
+        for key in self.FEATURE_METRICS:
+            features.append(metrics.get(key) or 0)
         
         return features
     
     def analyze_for_investment_criteria(self, metrics):
         """Analyze the financial metrics for investment criteria match"""
-        results = {
-            'match_score': 0,
-            'criteria_met': [],
-            'criteria_missed': []
-        }
+        # Evaluate against the shared investment criteria rule set
+        evaluation = get_criteria_engine().evaluate(record_from_financials(metrics))
         
-        # Define investment criteria
-        criteria = {
-            'revenue': {
-                'min': 5000000,  # $5 million
-                'max': 50000000  # $50 million
-            },
-            'cash_flow': {
-                'min': 1000000,  # $1 million
-                'max': 5000000   # $5 million
-            },
-            'ebitda_margin': {
-                'min': 15        # 15%
-            },
-            'recurring_revenue': {
-                'min': 50        # 50%
-            },
-            'profitability_years': {
-                'min': 3         # 3+ years
-            },
-            'capex': {
-                'level': 'low'   # Low capital requirements
-            }
+        results = {
+            'match_score': evaluation['score'],
+            'criteria_met': evaluation['criteria_met'],
+            'criteria_missed': evaluation['criteria_missed']
         }
         
-        # Calculate match score (total 100 points)
-        max_score = 0
-        score = 0
-        
-        # Revenue range (20 points)
-        max_score += 20
-        if metrics.get('annual_revenue') is not None:
-            revenue = metrics['annual_revenue']
-            if criteria['revenue']['min'] <= revenue <= criteria['revenue']['max']:
-                score += 20
-                results['criteria_met'].append("Revenue in target range ($5-50M)")
-            elif revenue < criteria['revenue']['min']:
-                # Partial points for close to range
-                partial = min(15, int(20 * (revenue / criteria['revenue']['min'])))
-                score += partial
-                results['criteria_missed'].append("Revenue in target range ($5-50M)")
-            else:
-                # Partial points for larger companies
-                partial = min(10, int(20 * (criteria['revenue']['max'] * 2 / revenue)))
-                score += partial
-                results['criteria_missed'].append("Revenue in target range ($5-50M)")
-        else:
-            results['criteria_missed'].append("Revenue in target range ($5-50M)")
-        
-        # Cash flow range (20 points)
-        max_score += 20
-        if metrics.get('free_cash_flow') is not None:
-            cash_flow = metrics['free_cash_flow']
-            if criteria['cash_flow']['min'] <= cash_flow <= criteria['cash_flow']['max']:
-                score += 20
-                results['criteria_met'].append("Cash flow in target range ($1-5M)")
-            elif cash_flow < criteria['cash_flow']['min']:
-                # Partial points for close to range
-                partial = min(15, int(20 * (cash_flow / criteria['cash_flow']['min'])))
-                score += partial
-                results['criteria_missed'].append("Cash flow in target range ($1-5M)")
-            else:
-                # Partial points for larger cash flows
-                partial = min(10, int(20 * (criteria['cash_flow']['max'] * 2 / cash_flow)))
-                score += partial
-                results['criteria_missed'].append("Cash flow in target range ($1-5M)")
-        else:
-            results['criteria_missed'].append("Cash flow in target range ($1-5M)")
-        
-        # EBITDA margin (20 points)
-        max_score += 20
-        if metrics.get('ebitda_margin') is not None:
-            ebitda_margin = metrics['ebitda_margin']
-            if ebitda_margin >= criteria['ebitda_margin']['min']:
-                score += 20
-                results['criteria_met'].append("EBITDA margin >15%")
-            else:
-                # Partial points based on how close to target
-                partial = min(15, int(20 * (ebitda_margin / criteria['ebitda_margin']['min'])))
-                score += partial
-                results['criteria_missed'].append("EBITDA margin >15%")
-        else:
-            results['criteria_missed'].append("EBITDA margin >15%")
-        
-        # Recurring revenue (15 points)
-        max_score += 15
-        if metrics.get('recurring_revenue_percentage') is not None:
-            recurring = metrics['recurring_revenue_percentage']
-            if recurring >= criteria['recurring_revenue']['min']:
-                score += 15
-                results['criteria_met'].append("Strong recurring revenue (>50%)")
-            else:
-                # Partial points based on how close to target
-                partial = min(10, int(15 * (recurring / criteria['recurring_revenue']['min'])))
-                score += partial
-                results['criteria_missed'].append("Strong recurring revenue (>50%)")
-        else:
-            results['criteria_missed'].append("Strong recurring revenue (>50%)")
-        
-        # Profitability track record (15 points)
-        max_score += 15
-        if metrics.get('profitability_years') is not None:
-            profit_years = metrics['profitability_years']
-            if profit_years >= criteria['profitability_years']['min']:
-                score += 15
-                results['criteria_met'].append("3+ years of profitability")
-            else:
-                # Partial points based on years
-                partial = int(15 * (profit_years / criteria['profitability_years']['min']))
-                score += partial
-                results['criteria_missed'].append("3+ years of profitability")
-        else:
-            results['criteria_missed'].append("3+ years of profitability")
-        
-        # Capital expenditure requirements (10 points)
-        max_score += 10
-        if metrics.get('capex_requirements') is not None:
-            capex_level = metrics['capex_requirements']
-            if capex_level == criteria['capex']['level']:
-                score += 10
-                results['criteria_met'].append("Low capital expenditure requirements")
-            elif capex_level == 'moderate':
-                score += 5
-                results['criteria_missed'].append("Low capital expenditure requirements")
-            else:
-                results['criteria_missed'].append("Low capital expenditure requirements")
-        else:
-            results['criteria_missed'].append("Low capital expenditure requirements")
-        
-        # Calculate final percentage score
-        results['match_score'] = (score / max_score * 100) if max_score > 0 else 0
-        
         # Add additional insights
         results['financials'] = {
             'revenue': metrics.get('annual_revenue'),
@@ -915,13 +813,6 @@ class YahooFinanceHandler:
         }
         
         # Determine match level
-        if results['match_score'] >= 80:
-            results['match_level'] = 'Strong Match'
-        elif results['match_score'] >= 60:
-            results['match_level'] = 'Potential Match'
-        elif results['match_score'] >= 40:
-            results['match_level'] = 'Partial Match'
-        else:
-            results['match_level'] = 'Weak Match'
+        results['match_level'] = match_tier(results['match_score'])
         
-        return results
\ No newline at end of file
+        return results
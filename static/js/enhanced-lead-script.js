@@ -458,6 +458,7 @@ document.addEventListener("DOMContentLoaded", () => {
     loadingElement.style.display = "flex";
     resultsSection.style.display = "none";
     resultsElement.innerHTML = "";
+    setLoadingStage("queued", 0);
 
     try {
       // Validate URL format
@@ -465,62 +466,200 @@ document.addEventListener("DOMContentLoaded", () => {
         url = "https://" + url;
       }
 
-      // Send request to server
+      // Queue the analysis; progress and the result arrive from the job
       const formData = new FormData();
       formData.append("url", url);
+      formData.append("async_job", "true");
+      if (document.getElementById("async-financials").checked) {
+        formData.append("async_financials", "true");
+      }
 
       const response = await fetch("/analyze", {
         method: "POST",
         body: formData,
       });
+      const job = await response.json();
 
-      const data = await response.json();
-      lastAnalysisData = data;
+      if (job.error || !job.job_id) {
+        loadingElement.style.display = "none";
+        showError(job.error || "Analysis could not be started");
+        return;
+      }
 
-      // Hide loading indicator
+      const data = await waitForAnalysisJob(job);
+      loadingElement.style.display = "none";
+      handleAnalysisResult(data, url);
+    } catch (error) {
       loadingElement.style.display = "none";
+      showError(`Analysis failed: ${error.message}`);
+    }
+  }
 
-      // Display results or error
-      if (data.error) {
-        showError(data.error);
-      } else {
-        displayResults(data, url);
-        resultsSection.style.display = "block";
-
-        // Auto-verify lead if enabled
-        if (document.getElementById("enable-verification").checked) {
-          // Add verification status to data
-          data.verification = {
-            status: "Pending",
-            date: new Date().toISOString(),
-            notes: "",
-          };
+  // Human-readable analysis stages reported by the job queue
+  const ANALYSIS_STAGES = {
+    queued: "Waiting for an analysis worker...",
+    scraping: "Scraping website...",
+    analyzing: "Analyzing website content...",
+    scoring: "Calculating AI readiness score...",
+    lead_scoring: "Generating lead insights...",
+    financials: "Fetching financial data...",
+    saving: "Saving lead...",
+  };
+
+  function setLoadingStage(stage, progress) {
+    const title = loadingElement.querySelector("p");
+    const detail = loadingElement.querySelector(".loading-detail");
+    if (title) title.textContent = ANALYSIS_STAGES[stage] || "Analyzing website...";
+    if (detail) detail.textContent = `${progress}% complete`;
+  }
+
+  // Follow an analysis job over Server-Sent Events (or by polling) until it finishes
+  function waitForAnalysisJob(job) {
+    return new Promise((resolve, reject) => {
+      const finish = (snapshot) => {
+        if (snapshot.status === "complete") {
+          resolve(snapshot.result);
+        } else {
+          reject(new Error(snapshot.error || "Analysis failed"));
         }
+      };
 
-        // Auto-sync to CRM if enabled
-        if (document.getElementById("crm-auto-sync").checked) {
-          if (lastAnalysisData.sales_insights) {
-            // Prepare for CRM sync
-            const crmStatus = {
-              status: "Queued",
-              date: new Date().toISOString(),
-            };
-            lastAnalysisData.crm = crmStatus;
-
-            // Simulate CRM sync
-            setTimeout(() => {
-              showNotification("Lead automatically synced to CRM", "success");
-            }, 2000);
-          }
+      if (!window.EventSource) {
+        pollAnalysisJob(job.status_url, finish, reject);
+        return;
+      }
+
+      const source = new EventSource(job.events_url);
+      source.addEventListener("progress", (event) => {
+        const data = JSON.parse(event.data);
+        setLoadingStage(data.stage, data.progress);
+      });
+      source.addEventListener("complete", (event) => {
+        source.close();
+        finish(JSON.parse(event.data));
+      });
+      source.addEventListener("failed", (event) => {
+        source.close();
+        finish(JSON.parse(event.data));
+      });
+      source.onerror = () => {
+        // The stream closes after the final event; otherwise fall back to polling
+        if (source.readyState === EventSource.CLOSED) {
+          pollAnalysisJob(job.status_url, finish, reject);
         }
+      };
+    });
+  }
 
-        // Scroll to results
-        resultsSection.scrollIntoView({ behavior: "smooth" });
+  function pollAnalysisJob(statusUrl, finish, reject, attempt = 0) {
+    setTimeout(async () => {
+      try {
+        const response = await fetch(statusUrl);
+        const snapshot = await response.json();
+        if (snapshot.status === "complete" || snapshot.status === "failed" || snapshot.error) {
+          finish(snapshot);
+        } else if (attempt < 400) {
+          setLoadingStage(snapshot.stage, snapshot.progress);
+          pollAnalysisJob(statusUrl, finish, reject, attempt + 1);
+        } else {
+          reject(new Error("Analysis timed out"));
+        }
+      } catch (error) {
+        reject(error);
+      }
+    }, 1500);
+  }
+
+  // Show a finished analysis
+  function handleAnalysisResult(data, url) {
+    lastAnalysisData = data;
+
+    if (data.error) {
+      showError(data.error);
+      return;
+    }
+
+    displayResults(data, url);
+    resultsSection.style.display = "block";
+
+    // Financials are still being fetched on the server
+    if (data.financials_status === "pending") {
+      pollLeadEnrichment(data.id);
+    }
+
+    // Auto-verify lead if enabled
+    if (document.getElementById("enable-verification").checked) {
+      // Add verification status to data
+      data.verification = {
+        status: "Pending",
+        date: new Date().toISOString(),
+        notes: "",
+      };
+    }
+
+    // Auto-sync to CRM if enabled
+    if (document.getElementById("crm-auto-sync").checked) {
+      if (lastAnalysisData.sales_insights) {
+        // Prepare for CRM sync
+        const crmStatus = {
+          status: "Queued",
+          date: new Date().toISOString(),
+        };
+        lastAnalysisData.crm = crmStatus;
+
+        // Simulate CRM sync
+        setTimeout(() => {
+          showNotification("Lead automatically synced to CRM", "success");
+        }, 2000);
       }
-    } catch (error) {
-      loadingElement.style.display = "none";
-      showError(`Analysis failed: ${error.message}`);
     }
+
+    // Scroll to results
+    resultsSection.scrollIntoView({ behavior: "smooth" });
+  }
+
+  // Poll the server until background financial enrichment of a lead finishes
+  function pollLeadEnrichment(leadId, attempt = 0) {
+    const placeholderId = "financials-loading";
+    if (attempt === 0 && !document.getElementById(placeholderId)) {
+      const placeholder = document.createElement("div");
+      placeholder.id = placeholderId;
+      placeholder.className = "dashboard-section";
+      placeholder.innerHTML =
+        '<div class="section-header"><i class="fas fa-spinner fa-spin"></i><h3>Loading financial analysis...</h3></div>';
+      resultsElement.appendChild(placeholder);
+    }
+
+    setTimeout(async () => {
+      try {
+        const response = await fetch(`/lead-status/${encodeURIComponent(leadId)}`);
+        const status = await response.json();
+
+        if (status.financials_status === "pending" && attempt < 60) {
+          pollLeadEnrichment(leadId, attempt + 1);
+          return;
+        }
+
+        const placeholder = document.getElementById(placeholderId);
+        if (placeholder) placeholder.remove();
+
+        // Ignore the update if another analysis has replaced this one
+        if (!lastAnalysisData || lastAnalysisData.id !== leadId) return;
+
+        if (status.financials_status === "complete") {
+          lastAnalysisData.financials = status.financials;
+          lastAnalysisData.investment_match = status.investment_match;
+          lastAnalysisData.financials_status = "complete";
+          if (status.investment_match) {
+            displayInvestmentMatch(status.investment_match);
+          }
+        } else {
+          showNotification("Financial analysis could not be completed", "error");
+        }
+      } catch (error) {
+        console.error("Error polling lead enrichment:", error);
+      }
+    }, 1500);
   }
 
   // Function to show error message
@@ -1354,12 +1493,15 @@ document.addEventListener("DOMContentLoaded", () => {
       let response;
 
       if (format === "csv") {
+        // Stored leads are exported by id instead of sending the data back
         response = await fetch("/export-csv", {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
           },
-          body: JSON.stringify(lastAnalysisData),
+          body: JSON.stringify(
+            lastAnalysisData.id ? { lead_ids: [lastAnalysisData.id] } : lastAnalysisData
+          ),
         });
       } else {
         response = await fetch("/export-json", {
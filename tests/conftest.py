@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Make the application packages (modules/, utils/) importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the default data stores out of the working tree; set before any module reads them
+_data_dir = tempfile.mkdtemp(prefix='leadgen-tests-')
+for _name, _path in [('FINANCE_CACHE_PATH', 'finance_cache.sqlite3'), ('PRICE_STORE_DIR', 'prices'),
+                     ('JOB_DB_PATH', 'jobs.sqlite3'), ('LEAD_DB_PATH', 'leads.sqlite3'),
+                     ('LEADS_JOURNAL_PATH', 'leads.jsonl'), ('MODEL_DIR', 'models')]:
+    os.environ.setdefault(_name, os.path.join(_data_dir, _path))
@@ -0,0 +1,149 @@
+import io
+import json
+
+import pytest
+
+from modules.job_queue import JobQueue, JobStore
+from modules.lead_store import SQLiteLeadStore
+
+app_module = pytest.importorskip('app')
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, 'lead_store', SQLiteLeadStore(str(tmp_path / 'leads.sqlite3')))
+    return app_module.app.test_client()
+
+
+def test_save_lead_resaving_domain_keeps_single_row(client):
+    first = client.post('/save-lead', json={'url': 'https://acme.com', 'company_name': 'Acme'}).get_json()
+    app_module.lead_store.update(first['id'], {'crm': {'synced': True}})
+
+    second = client.post('/save-lead', json={'url': 'https://www.acme.com/', 'company_name': 'Acme Inc'}).get_json()
+
+    leads = list(app_module.lead_store.iter_leads())
+    assert second['id'] == first['id']
+    assert len(leads) == 1
+    assert leads[0]['company_name'] == 'Acme Inc'
+    assert leads[0]['crm'] == {'synced': True}
+
+
+@pytest.mark.parametrize('payload', [{'min_match': 'high'}, {'min_match': 150}, {'limit': 'all'}, {'limit': [5]}])
+def test_validate_leads_rejects_bad_parameters(client, payload):
+    response = client.post('/validate-leads', json=payload)
+
+    assert response.status_code == 400
+
+
+def test_validate_leads_clamps_limit(client):
+    for i in range(3):
+        client.post('/save-lead', json={'url': f'https://company{i}.example.com', 'company_name': f'Company {i}'})
+
+    response = client.post('/validate-leads', json={'limit': 0, 'min_match': '0'})
+
+    assert response.status_code == 200
+    assert response.get_json()['evaluated'] == 3
+    assert len(response.get_json()['matches']) == 1
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':'))
+        if fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+@pytest.fixture
+def job_queue(monkeypatch):
+    queue = JobQueue(store=JobStore(':memory:'))
+    monkeypatch.setattr(app_module, 'analysis_jobs', queue)
+    yield queue
+    queue.shutdown()
+
+
+def test_job_events_stream_until_the_job_finishes(client, job_queue):
+    def work(progress):
+        progress('scraping', 30)
+        progress('scoring', 70)
+        return {'id': 'lead_1'}
+
+    job_id = job_queue.submit('analyze', work)
+
+    response = client.get(f'/analyze-jobs/{job_id}/events')
+    events = parse_sse(response.get_data(as_text=True))
+
+    assert response.mimetype == 'text/event-stream'
+    assert [name for _, name, _ in events] == ['queued', 'progress', 'progress', 'complete']
+    assert [event_id for event_id, _, _ in events] == [1, 2, 3, 4]
+    assert events[-1][2]['status'] == 'complete'
+
+
+def test_job_events_resume_from_last_event_id(client, job_queue):
+    job_id = job_queue.submit('analyze', lambda progress: progress('scraping', 30))
+    client.get(f'/analyze-jobs/{job_id}/events').get_data()
+
+    response = client.get(f'/analyze-jobs/{job_id}/events', headers={'Last-Event-ID': '2'})
+
+    assert [name for _, name, _ in parse_sse(response.get_data(as_text=True))] == ['complete']
+
+
+def test_unknown_job_is_not_found(client, job_queue):
+    assert client.get('/analyze-jobs/missing').status_code == 404
+    assert client.get('/analyze-jobs/missing/events').status_code == 404
+
+
+@pytest.fixture
+def fake_analysis(monkeypatch):
+    def run_analysis(url, progress=None):
+        if 'broken' in url:
+            raise app_module.AnalysisError('Could not read the website')
+        return {'id': app_module.generate_lead_id(), 'url': url, 'company_name': url.split('//')[1]}, {}
+
+    monkeypatch.setattr(app_module, 'run_analysis', run_analysis)
+    monkeypatch.setattr(app_module, 'enrich_lead_financials', lambda lead, analysis: {'financials_status': 'complete'})
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_analyze_batch_streams_results_once_per_domain(client, fake_analysis):
+    urls = ['acme.com', 'https://www.acme.com/about', 'https://broken.example.com', 'https://beta.io', 'https://']
+
+    lines = ndjson(client.post('/analyze-batch', json={'urls': urls}))
+
+    assert lines[0] == {'type': 'batch', 'urls': 3, 'skipped': [
+        {'url': 'https://www.acme.com/about', 'reason': 'duplicate domain'},
+        {'url': 'https://', 'reason': 'invalid URL'}
+    ]}
+    results = {line['url']: line for line in lines[1:-1]}
+    assert set(results) == {'https://acme.com', 'https://broken.example.com', 'https://beta.io'}
+    assert results['https://broken.example.com'] == {'type': 'result', 'url': 'https://broken.example.com',
+                                                      'status': 'failed', 'error': 'Could not read the website'}
+    assert results['https://beta.io']['lead']['financials_status'] == 'complete'
+    assert lines[-1] == {'type': 'summary', 'completed': 2, 'failed': 1}
+    assert len(list(app_module.lead_store.iter_leads())) == 2
+
+
+def test_analyze_batch_reads_csv_uploads(client, fake_analysis):
+    upload = (io.BytesIO(b'name,website\nAcme,acme.com\nBeta,beta.io\n'), 'leads.csv')
+
+    lines = ndjson(client.post('/analyze-batch', data={'file': upload}, content_type='multipart/form-data'))
+
+    assert lines[0]['urls'] == 2
+    assert lines[-1] == {'type': 'summary', 'completed': 2, 'failed': 0}
+
+
+@pytest.mark.parametrize('payload', [{}, {'urls': []}, {'urls': 'acme.com'}, {'urls': ['a.com', 3]}])
+def test_analyze_batch_rejects_bad_requests(client, payload):
+    assert client.post('/analyze-batch', json=payload).status_code == 400
+
+
+def test_analyze_batch_limits_urls_per_request(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'MAX_BATCH_URLS', 2)
+
+    response = client.post('/analyze-batch', json={'urls': ['a.com', 'b.com', 'c.com']})
+
+    assert response.status_code == 400
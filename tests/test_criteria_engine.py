@@ -0,0 +1,95 @@
+import json
+import random
+
+import pytest
+
+from modules.criteria_engine import (DEFAULT_CRITERIA, CriteriaEngine, get_criteria_engine, load_criteria_profiles,
+                                     match_tier, record_from_financials)
+
+FULL_MATCH = {'revenue': 2e7, 'cash_flow': 2e6, 'profit_years': 5, 'ebitda_margin': 25,
+              'capex': 'low', 'recurring_revenue_pct': 70}
+
+
+def test_full_match_scores_every_rule():
+    result = CriteriaEngine().evaluate(FULL_MATCH)
+
+    assert result['score'] == 100
+    assert result['criteria_missed'] == []
+    assert result['missing_data'] == []
+    assert 'Revenue in target range ($5-50M)' in result['criteria_met']
+    assert match_tier(result['score']) == 'Strong Match'
+
+
+@pytest.mark.parametrize('revenue, points', [(2.5e6, 5), (1e8, 5), (5e6, 20), (5e7, 20)])
+def test_band_rule_scales_outside_the_range(revenue, points):
+    evaluation = CriteriaEngine().evaluate_many([{'revenue': revenue}])
+
+    assert evaluation['rule_points']['revenue'][0] == pytest.approx(points)
+
+
+def test_missing_and_zero_values_count_as_missing_data():
+    result = CriteriaEngine().evaluate({'revenue': 0, 'capex': 'moderate', 'ebitda_margin': 7.5})
+
+    assert result['points'] == 8 + 10
+    assert 'Annual revenue data' in result['missing_data']
+    assert 'Capital expenditure data' not in result['missing_data']
+    assert 'Moderate capital expenditure requirements' in result['criteria_met']
+    assert 'EBITDA margin >15%' in result['criteria_missed']
+
+
+def test_evaluate_many_matches_single_evaluations():
+    rng = random.Random(30)
+    records = [{'revenue': rng.choice([None, rng.uniform(0, 1e8)]),
+                'cash_flow': rng.choice([None, rng.uniform(0, 1e7)]),
+                'profit_years': rng.choice([None, rng.randint(0, 10)]),
+                'ebitda_margin': rng.choice([None, rng.uniform(-10, 40)]),
+                'capex': rng.choice([None, 'low', 'moderate', 'high']),
+                'recurring_revenue_pct': rng.choice([None, rng.uniform(0, 100)])}
+               for _ in range(200)]
+    engine = CriteriaEngine()
+
+    scores = engine.evaluate_many(records)['score']
+
+    assert scores.tolist() == pytest.approx([engine.evaluate(record)['score'] for record in records])
+
+
+def test_profiles_merge_over_defaults(tmp_path):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps({'small': {'revenue': {'max': 2e7}}}))
+
+    profiles = load_criteria_profiles(str(path))
+
+    assert profiles['default'] == DEFAULT_CRITERIA
+    assert profiles['small']['revenue'] == {'min': 5000000, 'max': 2e7}
+    assert profiles['small']['ebitda_margin'] == DEFAULT_CRITERIA['ebitda_margin']
+    assert CriteriaEngine(profiles['small']).evaluate({'revenue': 3e7})['criteria_met'] == []
+
+
+@pytest.mark.parametrize('content', [None, '{not json', '[1, 2]'])
+def test_missing_or_invalid_profiles_fall_back_to_defaults(tmp_path, content):
+    path = tmp_path / 'profiles.json'
+    if content is not None:
+        path.write_text(content)
+
+    assert load_criteria_profiles(str(path)) == {'default': DEFAULT_CRITERIA}
+
+
+def test_bundled_profiles_load_from_any_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    assert 'lower_middle_market' in load_criteria_profiles()
+
+
+def test_engines_are_compiled_once_per_profile():
+    criteria = dict(DEFAULT_CRITERIA, ebitda_margin={'min': 10})
+
+    assert get_criteria_engine(criteria) is get_criteria_engine(json.loads(json.dumps(criteria)))
+    assert get_criteria_engine(criteria) is not get_criteria_engine()
+
+
+@pytest.mark.parametrize('ratio, level', [(2, 'low'), (10, 'moderate'), (20, 'high')])
+def test_record_from_financials_classifies_capex(ratio, level):
+    record = record_from_financials({'annual_revenue': 2e7, 'capex_to_revenue': ratio})
+
+    assert record['revenue'] == 2e7
+    assert record['capex'] == level
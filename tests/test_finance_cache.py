@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+from modules.finance_cache import FinanceCache, MISSING, normalize_company_key
+
+
+def test_values_round_trip_with_numpy_types():
+    cache = FinanceCache(':memory:')
+    cache.set('statements', 'ACME', {'revenue': np.float64(2e7), 'history': np.array([1, 2])})
+
+    assert cache.get('statements', 'ACME') == {'revenue': 2e7, 'history': [1, 2]}
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_entries_expire_after_their_ttl():
+    cache = FinanceCache(':memory:', ttls={'quotes': 0.05})
+    cache.set('quotes', 'ACME', {'market_cap': 1e9})
+    cache.set('statements', 'ACME', {'revenue': 2e7})
+
+    time.sleep(0.1)
+
+    assert cache.get('quotes', 'ACME') is None
+    assert cache.get('statements', 'ACME') == {'revenue': 2e7}
+
+
+def test_negative_entries_are_cached_only_when_asked():
+    cache = FinanceCache(':memory:', negative_ttl=0.05)
+    calls = []
+
+    def fetch(name):
+        calls.append(name)
+        return None
+
+    assert cache.get_or_fetch('ticker', 'acme', fetch, 'Acme') is None
+    assert cache.get_or_fetch('ticker', 'acme', fetch, 'Acme') is None
+    assert len(calls) == 2
+
+    assert cache.get_or_fetch('ticker', 'beta', fetch, 'Beta', cache_empty=True) is None
+    assert cache.get('ticker', 'beta') is MISSING
+    assert cache.get_or_fetch('ticker', 'beta', fetch, 'Beta', cache_empty=True) is None
+    assert calls.count('Beta') == 1
+
+    time.sleep(0.1)
+    assert cache.get('ticker', 'beta') is None
+
+
+def test_eviction_keeps_recently_read_entries(tmp_path):
+    cache = FinanceCache(str(tmp_path / 'cache.sqlite3'), max_entries=60)
+    for i in range(50):
+        cache.set('profiles', f'old{i}', {'i': i})
+    # Reads are buffered in memory, then applied by the eviction pass
+    for i in range(10):
+        assert cache.get('profiles', f'old{i}') == {'i': i}
+    for i in range(50):
+        cache.set('profiles', f'new{i}', {'i': i})
+
+    kept = {key for (key,) in cache._connect().execute('SELECT key FROM cache_entries')}
+    assert len(kept) == 60
+    assert {f'old{i}' for i in range(10)} <= kept
+    assert not {f'old{i}' for i in range(10, 50)} & kept
+
+
+def test_reads_do_not_write_to_the_database(tmp_path):
+    cache = FinanceCache(str(tmp_path / 'cache.sqlite3'))
+    cache.set('quotes', 'ACME', {'market_cap': 1e9})
+    conn = cache._connect()
+    changes = conn.total_changes
+
+    for _ in range(20):
+        cache.get('quotes', 'ACME')
+
+    assert conn.total_changes == changes
+
+
+def test_normalize_company_key():
+    assert normalize_company_key('  Acme   WIDGETS ') == 'acme widgets'
@@ -0,0 +1,106 @@
+import json
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+
+from modules import financial_analyzer
+from modules.finance_replay import RecordingSession, ReplaySession, fixture_key
+from modules.price_store import PriceStore
+
+DAY = 86400
+
+
+def statement_series(kind, values):
+    return {
+        'meta': {'symbol': ['ACME'], 'type': [kind]},
+        'timestamp': [1703980800, 1735603200],
+        kind: [{'asOfDate': date, 'periodType': '12M', 'currencyCode': 'USD', 'reportedValue': {'raw': value}}
+               for date, value in zip(['2023-12-31', '2024-12-31'], values)]
+    }
+
+
+class YahooStub(BaseAdapter):
+    """Transport answering the Yahoo endpoints yfinance calls for one company"""
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        today = int(time.time()) // DAY * DAY
+        self.timestamps = [today - (60 - i) * DAY for i in range(60)]
+        self.closes = [100.0 + i + i % 3 for i in range(60)]
+
+    def body(self, url):
+        if '/chart/' in url:
+            meta = {'currency': 'USD', 'symbol': 'ACME', 'instrumentType': 'EQUITY', 'dataGranularity': '1d',
+                    'exchangeTimezoneName': 'America/New_York', 'timezone': 'EDT', 'gmtoffset': -14400,
+                    'regularMarketPrice': self.closes[-1], 'priceHint': 2}
+            quote = {'open': self.closes, 'high': self.closes, 'low': self.closes, 'close': self.closes,
+                     'volume': [1000] * len(self.closes)}
+            return {'chart': {'result': [{'meta': meta, 'timestamp': self.timestamps,
+                                          'indicators': {'quote': [quote], 'adjclose': [{'adjclose': self.closes}]}}],
+                              'error': None}}
+        if 'timeseries' in url:
+            result = []
+            if 'annualTotalRevenue' in url:
+                result += [statement_series('annualTotalRevenue', [1.8e7, 2e7]),
+                           statement_series('annualEBITDA', [3e6, 4e6])]
+            if 'annualFreeCashFlow' in url:
+                result += [statement_series('annualFreeCashFlow', [1e6, 2e6]),
+                           statement_series('annualCapitalExpenditure', [-5e5, -6e5])]
+            return {'timeseries': {'result': result, 'error': None}}
+        if 'quoteSummary' in url:
+            return {'quoteSummary': {'result': [{
+                'assetProfile': {'industry': 'Software - Application', 'sector': 'Technology', 'fullTimeEmployees': 120},
+                'summaryDetail': {'marketCap': 5e8},
+                'quoteType': {'symbol': 'ACME', 'quoteType': 'EQUITY'}
+            }], 'error': None}}
+        return {}
+
+    def send(self, request, **kwargs):
+        self.urls.append(request.url)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        if 'getcrumb' in request.url:
+            response.headers['Content-Type'] = 'text/plain'
+            response._content = b'test-crumb'
+        else:
+            response.headers['Content-Type'] = 'application/json'
+            response._content = json.dumps(self.body(request.url)).encode('utf-8')
+        return response
+
+    def close(self):
+        pass
+
+
+def test_fixture_key_ignores_volatile_params_and_host():
+    first = fixture_key('get', 'https://query1.finance.yahoo.com/v8/finance/chart/ACME?period1=1&interval=1d')
+    second = fixture_key('GET', 'http://127.0.0.1:8765/v8/finance/chart/ACME', {'interval': '1d', 'period1': 2})
+
+    assert first == second
+
+
+def test_recorded_fixtures_replay_through_financial_analyzer(tmp_path):
+    # yfinance only accepts requests.Session (or curl_cffi) instances as sessions
+    stub = YahooStub()
+    recorder = RecordingSession(str(tmp_path / 'fixtures'))
+    recorder.mount('https://', stub)
+    recorder.mount('http://', stub)
+    analyzer = financial_analyzer.FinancialAnalyzer(session=recorder)
+    analyzer.price_store = PriceStore(str(tmp_path / 'recorded-prices'))
+
+    recorded = analyzer.get_company_financials(ticker='ACME', raise_errors=True)
+    requests_made = len(stub.urls)
+
+    replayer = financial_analyzer.FinancialAnalyzer(session=ReplaySession(str(tmp_path / 'fixtures')))
+    replayer.price_store = PriceStore(str(tmp_path / 'replayed-prices'))
+    replayed = replayer.get_company_financials(ticker='ACME', raise_errors=True)
+
+    assert recorded['annual_revenue'] == 2e7
+    assert recorded['ebitda_margin'] == 20
+    assert recorded['market_cap'] == 5e8
+    assert recorded['volatility'] > 0
+    assert replayed == recorded
+    assert len(stub.urls) == requests_made
@@ -0,0 +1,28 @@
+import math
+
+import pytest
+
+financial_analyzer = pytest.importorskip('modules.financial_analyzer')
+
+
+def test_investment_fit_cache_hits_sparse_records():
+    analyzer = financial_analyzer.FinancialAnalyzer()
+    sparse = {'annual_revenue': 2e7, 'ebitda_margin': math.nan, 'free_cash_flow': None}
+
+    first = analyzer.predict_investment_fit({}, sparse)
+    again = analyzer.predict_investment_fit({}, dict(sparse))
+    without_gaps = analyzer.predict_investment_fit({}, {'annual_revenue': 2e7})
+
+    assert analyzer.fit_cache_hits == 2
+    assert first == again == without_gaps
+
+
+def test_subscription_hits_ignore_field_names_and_urls():
+    analyzer = financial_analyzer.FinancialAnalyzer()
+    company = {'url': 'https://recurring-saas.example.com', 'recurring_revenue_pct': 80,
+               'business_details': {'description': 'Industrial pumps'}}
+
+    assert analyzer._subscription_hits(company) == 0
+
+    company['business_details']['business_model'] = 'Monthly fee maintenance subscription'
+    assert analyzer._subscription_hits(company) == 2
@@ -0,0 +1,156 @@
+import pytest
+
+from modules import financial_analyzer
+from modules.finance_cache import FinanceCache
+from modules.financial_api_integration import FinancialAPIIntegration
+from modules.financial_provider import (FinancialBackend, FinancialDataProvider, YahooHTTPBackend,
+                                        YFinanceBackend, company_names_match)
+from modules.private_registry import PrivateCompanyRegistry
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, text=''):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = text
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """Yahoo search endpoint answering every query with the same quotes"""
+
+    def __init__(self, quotes, status_code=200):
+        self.headers = {}
+        self.quotes = quotes
+        self.status_code = status_code
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requests.append(url)
+        if 'search' in url:
+            return FakeResponse(self.status_code, {'quotes': self.quotes})
+        return FakeResponse(self.status_code, text='<html></html>')
+
+
+class FakeSearch:
+    quotes = []
+
+    def __init__(self, query, **kwargs):
+        self.query = query
+
+
+@pytest.fixture
+def integration(tmp_path, monkeypatch):
+    def build(quotes, status_code=200):
+        monkeypatch.setattr(financial_analyzer.yf, 'Search', FakeSearch, raising=False)
+        FakeSearch.quotes = quotes
+        api = FinancialAPIIntegration(private_registry=PrivateCompanyRegistry(str(tmp_path / 'registry.sqlite3')),
+                                      session=FakeSession(quotes, status_code))
+        cache = FinanceCache(':memory:')
+        api.provider = FinancialDataProvider(
+            [YahooHTTPBackend(api.yahoo_handler), YFinanceBackend(api.financial_analyzer, cache=cache)],
+            cache=cache
+        )
+        return api
+    return build
+
+
+UNRELATED_QUOTES = [{'symbol': 'AAPL', 'quoteType': 'EQUITY', 'shortname': 'Apple Inc.', 'longname': 'Apple Inc.'}]
+
+
+def test_company_names_match():
+    assert company_names_match('Acme Widgets', 'Acme Widgets Holdings, Inc.')
+    assert company_names_match('The Coca-Cola Company', 'Coca-Cola Co')
+    assert not company_names_match('Applewood Bakery', 'Apple Inc.')
+    assert not company_names_match('Acme Widgets', 'ACME')
+
+
+def test_unconfirmed_search_results_are_a_miss_and_recorded_private(integration):
+    api = integration(UNRELATED_QUOTES)
+
+    assert api.get_company_financials('Applewood Bakery') is None
+    assert api.private_registry.is_private('Applewood Bakery, LLC')
+
+    # The next lookup is answered by the registry without any search
+    requests_made = len(api.yahoo_handler.session.requests)
+    assert api.get_company_financials('Applewood Bakery') is None
+    assert len(api.yahoo_handler.session.requests) == requests_made
+
+
+def test_failed_search_is_not_recorded_private(integration):
+    api = integration([], status_code=503)
+
+    assert api.provider.lookup_ticker('Applewood Bakery') == (None, False)
+    api.get_company_financials('Applewood Bakery')
+    assert not api.private_registry.is_private('Applewood Bakery')
+
+
+def test_confirmed_search_result_resolves(integration):
+    api = integration(UNRELATED_QUOTES)
+
+    assert api.provider.lookup_ticker('Apple') == ('AAPL', False)
+    assert api.financial_analyzer.find_ticker('Apple Inc') == 'AAPL'
+    assert api.financial_analyzer.find_ticker('Applewood Bakery') is None
+
+
+class StubBackend(FinancialBackend):
+    def __init__(self, name, ticker=None, data=None):
+        self.name = name
+        self.ticker = ticker
+        self.data = data
+        self.fetched = []
+
+    def resolve_ticker(self, company_name):
+        return self.ticker
+
+    def fetch(self, ticker):
+        self.fetched.append(ticker)
+        return dict(self.data) if self.data else None
+
+
+def test_unconfirmed_symbols_are_not_resolutions():
+    guess = StubBackend('guess', ticker='ACME WIDGETS', data={'annual_revenue': 1e9})
+    search = StubBackend('search')
+    provider = FinancialDataProvider([guess, search], cache=FinanceCache(':memory:'))
+
+    assert provider.lookup_ticker('Acme Widgets') == (None, True)
+    assert guess.fetched == []
+    assert provider.stats['guess']['resolutions'] == 0
+    assert provider.stats['guess']['hit_rate'] == 0.5
+
+
+def test_confirmed_symbol_is_counted_and_credited():
+    yahoo = StubBackend('yahoo', ticker='acme', data={'annual_revenue': 2e7, 'free_cash_flow': 2e6,
+                                                      'ebitda_margin': 18, 'capex_to_revenue': 3})
+    provider = FinancialDataProvider([yahoo], cache=FinanceCache(':memory:'))
+
+    ticker, no_match = provider.lookup_ticker('Acme')
+    financials = provider.get_financials(ticker)
+
+    assert (ticker, no_match) == ('ACME', False)
+    assert provider.stats['yahoo']['resolutions'] == 1
+    assert financials['provenance']['annual_revenue'] == 'yahoo'
+
+
+class PrefetchingBackend(StubBackend):
+    def __init__(self, name, data):
+        super().__init__(name, data=data)
+        self.prefetched = []
+
+    def prefetch(self, tickers):
+        self.prefetched.append(list(tickers))
+
+
+def test_bulk_financials_prefetch_per_batch_and_merge_through_provider():
+    backend = PrefetchingBackend('bulk', data={'annual_revenue': 2e7})
+    provider = FinancialDataProvider([backend], cache=FinanceCache(':memory:'))
+
+    results = provider.get_bulk_financials(['acme', 'BETA ', 'ACME', 'gamma', ''], batch_size=2)
+
+    assert list(results) == ['ACME', 'BETA', 'GAMMA']
+    assert backend.prefetched == [['ACME', 'BETA'], ['GAMMA']]
+    assert sorted(backend.fetched) == ['ACME', 'BETA', 'GAMMA']
+    assert results['BETA']['ticker'] == 'BETA'
+    assert results['BETA']['provenance'] == {'annual_revenue': 'bulk'}
@@ -0,0 +1,45 @@
+from modules.lead_store import MemoryLeadStore
+from utils import helpers
+
+
+def test_save_lead_updates_stored_domain_in_place(monkeypatch):
+    store = MemoryLeadStore()
+    monkeypatch.setattr(helpers, 'get_lead_store', lambda: store)
+
+    assert helpers.save_lead({'url': 'https://acme.com', 'company_name': 'Acme'})[0]
+    first = next(store.iter_leads())
+    store.update(first['id'], {'verification': {'status': 'verified'}})
+
+    assert helpers.save_lead({'url': 'https://www.acme.com/about', 'company_name': 'Acme Inc'})[0]
+
+    leads = list(store.iter_leads())
+    assert len(leads) == 1
+    assert leads[0]['id'] == first['id']
+    assert leads[0]['company_name'] == 'Acme Inc'
+    assert leads[0]['verification'] == {'status': 'verified'}
+
+
+def ulid_timestamp(lead_id):
+    value = 0
+    for char in lead_id[len('lead_'):]:
+        value = value * 32 + helpers._ULID_ALPHABET.index(char)
+    return value >> 80
+
+
+def test_lead_ids_are_unique_and_sorted():
+    ids = [helpers.generate_lead_id() for _ in range(2000)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(len(lead_id) == len('lead_') + 26 for lead_id in ids)
+
+
+def test_lead_id_random_overflow_moves_to_next_millisecond(monkeypatch):
+    now_ms = 1_700_000_000_000
+    monkeypatch.setattr(helpers.time, 'time', lambda: now_ms / 1000)
+    monkeypatch.setattr(helpers, '_ulid_last', (now_ms, helpers._ULID_RANDOM_MAX))
+
+    lead_id = helpers.generate_lead_id()
+
+    assert ulid_timestamp(lead_id) == now_ms + 1
+    assert helpers.generate_lead_id() > lead_id
@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from modules.job_queue import JobQueue, JobStore, QueueFullError
+
+
+def wait_finished(queue, job_id, timeout=5):
+    events = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        new_events, finished = queue.events(job_id, events[-1][0] if events else 0, timeout=1)
+        events.extend(new_events)
+        if finished:
+            return events
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(max_workers=2, max_pending=2, store=JobStore(str(tmp_path / 'jobs.sqlite3')))
+    yield queue
+    queue.shutdown()
+
+
+def test_job_reports_progress_and_result(queue):
+    def work(value, progress):
+        progress('scraping', 40)
+        return {'value': value}
+
+    job_id = queue.submit('analyze', work, 7)
+    events = wait_finished(queue, job_id)
+
+    assert [(event_id, name) for event_id, name, _ in events] == [(1, 'queued'), (2, 'progress'), (3, 'complete')]
+    assert events[1][2] == {'stage': 'scraping', 'progress': 40}
+    job = queue.get(job_id)
+    assert (job['status'], job['progress'], job['result']) == ('complete', 100, {'value': 7})
+
+
+def test_failed_job_records_the_error(queue):
+    def work(progress):
+        raise RuntimeError('site unreachable')
+
+    job_id = queue.submit('analyze', work)
+    events = wait_finished(queue, job_id)
+
+    assert events[-1][1] == 'failed'
+    assert queue.get(job_id)['error'] == 'site unreachable'
+
+
+def test_submit_rejects_jobs_beyond_max_pending(queue):
+    release = threading.Event()
+    job_ids = [queue.submit('analyze', lambda progress: release.wait(5)) for _ in range(2)]
+
+    with pytest.raises(QueueFullError):
+        queue.submit('analyze', lambda progress: None)
+
+    release.set()
+    for job_id in job_ids:
+        wait_finished(queue, job_id)
+    wait_finished(queue, queue.submit('analyze', lambda progress: None))
+
+
+def test_events_resume_after_last_seen_id(queue):
+    job_id = queue.submit('analyze', lambda progress: progress('scoring', 80))
+    wait_finished(queue, job_id)
+
+    events, finished = queue.events(job_id, after=2)
+
+    assert finished
+    assert [name for _, name, _ in events] == ['complete']
+
+
+def test_jobs_are_visible_to_other_processes(tmp_path, queue):
+    other = JobQueue(store=JobStore(queue.store.path))
+    release = threading.Event()
+    job_id = queue.submit('analyze', lambda progress: release.wait(5))
+
+    assert other.get(job_id)['status'] in ('queued', 'running')
+    assert other.events(job_id, timeout=0)[0][0][1] == 'queued'
+
+    release.set()
+    assert wait_finished(other, job_id)[-1][1] == 'complete'
+    other.shutdown()
+
+
+def test_finished_jobs_expire_after_retention(tmp_path):
+    queue = JobQueue(retention=0, store=JobStore(':memory:'))
+    job_id = queue.submit('analyze', lambda progress: None)
+    wait_finished(queue, job_id)
+
+    queue.submit('analyze', lambda progress: None)
+
+    assert queue.get(job_id) is None
+    assert queue.events(job_id) is None
+    queue.shutdown()
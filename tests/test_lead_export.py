@@ -0,0 +1,121 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import re
+
+import numpy as np
+import pytest
+
+from modules import lead_export
+from modules.lead_export import (CSV_HEADERS, compile_field_selection, compress_chunks, is_single_lead, iter_csv,
+                                 iter_json, iter_ndjson, select_export_leads)
+from modules.lead_store import MemoryLeadStore
+
+
+def make_lead(i):
+    return {
+        'id': f'lead_{i:03d}',
+        'company_name': f'Company {i}',
+        'url': f'https://company{i}.example.com',
+        'ai_readiness_score': np.int64(i * 10),
+        'sales_insights': {'lead_score': np.float64(i / 2), 'lead_tier': 'A',
+                           'primary_contact': {'name': f'Contact {i}', 'email': f'c{i}@example.com'}},
+        'verification': {'status': 'verified'} if i % 2 else {}
+    }
+
+
+LEADS = [make_lead(i) for i in range(5)]
+
+
+def test_csv_is_streamed_in_row_chunks():
+    chunks = list(iter_csv(LEADS, chunk_rows=2))
+
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert len(chunks) == 3
+    assert rows[0] == CSV_HEADERS
+    assert [row[0] for row in rows[1:]] == [f'Company {i}' for i in range(5)]
+    assert rows[2][14] == 'verified' and rows[1][14] == 'Pending'
+
+
+def test_json_and_ndjson_serialize_numpy_values():
+    array = json.loads(b''.join(iter_json(LEADS, chunk_rows=2)))
+    lines = b''.join(iter_ndjson(LEADS, chunk_rows=2)).decode('utf-8').splitlines()
+
+    assert array == [json.loads(line) for line in lines]
+    assert array[3]['ai_readiness_score'] == 30
+    assert array[3]['sales_insights']['lead_score'] == 1.5
+    assert json.loads(b''.join(iter_json([]))) == []
+
+
+def test_field_selection_projects_selected_sections():
+    project = compile_field_selection({'company': {'name': True}, 'contact': {'email': True},
+                                       'verification': {'status': True}})
+
+    assert project(LEADS[1]) == {'company': {'name': 'Company 1'}, 'contact': {'email': 'c1@example.com'},
+                                 'verification': {'status': 'verified'}}
+    assert 'verification' not in project(LEADS[2])
+    assert compile_field_selection(None)(LEADS[0]) is LEADS[0]
+
+
+def test_lead_selection_from_payload_or_store():
+    store = MemoryLeadStore()
+    store.put_many(LEADS)
+
+    assert [lead['id'] for lead in select_export_leads(store, {'lead_ids': ['lead_001', 'lead_003']})] == \
+        ['lead_001', 'lead_003']
+    assert select_export_leads(store, {'leads': LEADS[:2]}) == LEADS[:2]
+    assert select_export_leads(store, LEADS[0]) == [LEADS[0]]
+    assert is_single_lead(LEADS[0]) and not is_single_lead({'leads': LEADS}) and not is_single_lead({'filters': {}})
+
+
+def test_gzip_compression_round_trips():
+    compressed = b''.join(compress_chunks(iter_csv(LEADS, chunk_rows=2), 'gzip'))
+
+    assert gzip.decompress(compressed).decode('utf-8') == ''.join(iter_csv(LEADS))
+
+
+def test_zstd_compression_round_trips():
+    zstandard = pytest.importorskip('zstandard')
+    compressed = b''.join(compress_chunks(iter_ndjson(LEADS), 'zstd'))
+
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(compressed) == b''.join(iter_ndjson(LEADS))
+
+
+def test_unavailable_or_unknown_compression_is_rejected(monkeypatch):
+    monkeypatch.setattr(lead_export, 'ZSTD_AVAILABLE', False)
+
+    with pytest.raises(ValueError):
+        compress_chunks([], 'zstd')
+    with pytest.raises(ValueError):
+        compress_chunks([], 'brotli')
+
+
+def test_xlsx_contains_every_lead():
+    openpyxl = pytest.importorskip('openpyxl')
+
+    workbook = openpyxl.load_workbook(io.BytesIO(b''.join(lead_export.iter_xlsx(LEADS))), read_only=True)
+
+    rows = list(workbook['Leads'].iter_rows(values_only=True))
+    assert list(rows[0]) == CSV_HEADERS
+    assert [row[0] for row in rows[1:]] == [f'Company {i}' for i in range(5)]
+
+
+def pdf_pages(data):
+    return len(re.findall(rb'/Type /Page\b', data))
+
+
+def test_pdf_paginates_and_caps_rows(caplog):
+    pytest.importorskip('reportlab')
+    rows_per_page = lead_export.get_pdf_template().rows_per_page
+    leads = [make_lead(i % 5) for i in range(rows_per_page + 1)]
+
+    full = b''.join(lead_export.iter_pdf(leads))
+    with caplog.at_level(logging.WARNING, logger='modules.lead_export'):
+        capped = b''.join(lead_export.iter_pdf(leads, max_rows=3))
+
+    assert full.startswith(b'%PDF')
+    assert pdf_pages(full) == 2
+    assert pdf_pages(capped) == 1
+    assert 'truncated at 3 leads' in caplog.text
@@ -0,0 +1,71 @@
+import io
+from datetime import date
+
+import numpy as np
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from modules import lead_parquet  # noqa: E402
+
+
+def make_lead(i):
+    return {
+        'id': f'lead_{i:04d}',
+        'url': f'https://www.company{i}.example.com/about',
+        'company_name': f'Company {i}',
+        'ai_readiness_score': np.float64(40 + i % 60),
+        'sales_insights': {'lead_score': i % 10, 'lead_tier': 'ABC'[i % 3]},
+        'score_components': {'technology_score': 12.5},
+        'tech_indicators': {'cloud': {'total': 2, 'indicators': {'aws': 1, 'azure': 1}}},
+        'financials': {'ticker': 'ACME', 'annual_revenue': 2e7} if i % 2 else {},
+        'investment_match': {'overall_match': 72.0, 'match_tier': 'Potential Match',
+                             'financial_criteria': {'score': 60, 'criteria_met': ['Revenue in target range']},
+                             'key_strengths': ['Recurring revenue']},
+        'verification': {'status': 'verified', 'date': date(2024, 5, 1)}
+    }
+
+
+LEADS = [make_lead(i) for i in range(25)]
+
+
+@pytest.mark.parametrize('fmt, render', [('parquet', lead_parquet.iter_parquet), ('arrow', lead_parquet.iter_arrow)])
+def test_export_round_trips_every_lead(fmt, render):
+    data = b''.join(render(LEADS, 10))
+
+    imported = list(lead_parquet.iter_imported_leads(io.BytesIO(data), fmt))
+
+    assert [lead['id'] for lead in imported] == [lead['id'] for lead in LEADS]
+    assert imported[3]['ai_readiness_score'] == 43.0
+    assert imported[3]['tech_indicators'] == LEADS[3]['tech_indicators']
+    # Values JSON cannot encode are kept as their string form
+    assert imported[3]['verification']['date'] == '2024-05-01'
+
+
+def test_parquet_has_typed_columns_and_row_groups():
+    table_file = pq.ParquetFile(io.BytesIO(b''.join(lead_parquet.iter_parquet(LEADS, 10))))
+    table = table_file.read()
+
+    assert table_file.num_row_groups == 3
+    assert table.schema == lead_parquet.LEAD_SCHEMA
+    row = table.slice(1, 1).to_pylist()[0]
+    assert row['domain'] == 'company1.example.com'
+    assert row['financials']['annual_revenue'] == 2e7
+    assert row['investment_match']['financial_criteria']['criteria_met'] == ['Revenue in target range']
+    assert dict(row['tech_indicators'])['cloud']['total'] == 2
+    assert table.slice(0, 1).to_pylist()[0]['financials'] is None
+
+
+def test_rows_without_lead_json_are_rebuilt_from_summary_columns():
+    table = pa.table({'id': ['lead_1'], 'url': ['https://acme.com'], 'company_name': ['Acme'],
+                      'lead_score': [7.0], 'verification_status': ['verified']})
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    buffer.seek(0)
+
+    lead = next(lead_parquet.iter_imported_leads(buffer))
+
+    assert lead['company_name'] == 'Acme'
+    assert lead['sales_insights']['lead_score'] == 7.0
+    assert lead['verification']['status'] == 'verified'
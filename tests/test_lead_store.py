@@ -0,0 +1,90 @@
+import pytest
+
+from modules.lead_store import JournalLeadStore, MemoryLeadStore, SQLiteLeadStore, SORT_FIELDS
+
+
+def make_lead(i):
+    return {
+        'id': f'lead_{i:04d}',
+        'url': f'https://company{i}.example.com',
+        'company_name': f'Company {i % 7}' if i % 5 else None,
+        'ai_readiness_score': (i * 13) % 100 if i % 3 else None,
+        'sales_insights': {'lead_score': i % 10, 'lead_tier': 'ABC'[i % 3]} if i % 4 else {}
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteLeadStore(str(tmp_path / 'leads.sqlite3'))
+    store.put_many(make_lead(i) for i in range(200))
+    store._connect().execute('ANALYZE')
+    return store
+
+
+def query_plan(store, sql, params):
+    return ' / '.join(row[3] for row in store._connect().execute('EXPLAIN QUERY PLAN ' + sql, params))
+
+
+@pytest.mark.parametrize('sort', list(SORT_FIELDS))
+@pytest.mark.parametrize('descending', [True, False])
+def test_page_query_seeks_sort_index(store, sort, descending):
+    first, cursor = store.page(sort=sort, descending=descending, limit=20)
+    assert cursor is not None
+
+    for page_cursor in (None, cursor):
+        sql, params = store._page_query(None, sort, descending, 20, page_cursor, False)
+        plan = query_plan(store, sql, params)
+        assert f'idx_leads_sort_{sort}' in plan
+        assert 'TEMP B-TREE' not in plan
+        if page_cursor:
+            assert plan.startswith('SEARCH')
+
+
+@pytest.mark.parametrize('sort', list(SORT_FIELDS))
+def test_pages_cover_every_lead_once(store, sort):
+    seen = []
+    leads, cursor = store.page(sort=sort, limit=30, summary=True)
+    seen.extend(lead['id'] for lead in leads)
+    while cursor:
+        leads, cursor = store.page(sort=sort, limit=30, cursor=cursor, summary=True)
+        seen.extend(lead['id'] for lead in leads)
+    assert sorted(seen) == [f'lead_{i:04d}' for i in range(200)]
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'journal'])
+def any_store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryLeadStore()
+    if request.param == 'journal':
+        return JournalLeadStore(str(tmp_path / 'leads.jsonl'))
+    return SQLiteLeadStore(str(tmp_path / 'leads.sqlite3'))
+
+
+def test_upsert_by_domain_keeps_single_row(any_store):
+    first = any_store.upsert_by_domain({'id': 'lead_a', 'url': 'https://www.acme.com', 'company_name': 'Acme'})
+    any_store.update(first['id'], {'verification': {'status': 'verified'}})
+
+    saved = any_store.upsert_by_domain({'id': 'lead_b', 'url': 'https://acme.com/about', 'company_name': 'Acme Inc'},
+                                       keep_fields=('verification', 'crm'))
+
+    leads = list(any_store.iter_leads())
+    assert len(leads) == 1
+    assert saved['id'] == 'lead_a'
+    assert leads[0]['company_name'] == 'Acme Inc'
+    assert leads[0]['verification'] == {'status': 'verified'}
+
+
+def test_validation_records_project_stored_features(any_store):
+    features = {'revenue': 1e7, 'ebitda_margin': 20}
+    any_store.put_many([
+        {'id': 'lead_a', 'url': 'https://a.com', 'company_name': 'A', 'verification': {'status': 'Verified'},
+         'investment_match': {'overall_match': 70, 'features': features}, 'pages_analyzed': ['home']},
+        {'id': 'lead_b', 'url': 'https://b.com', 'company_name': 'B', 'pages_analyzed': ['home']}
+    ])
+
+    records = {record['id']: record for record in any_store.iter_validation_records()}
+
+    assert records['lead_a'] == {'id': 'lead_a', 'url': 'https://a.com', 'company_name': 'A',
+                                 'verification': {'status': 'Verified'}, 'investment_match': {'features': features}}
+    # Leads without a feature record are returned whole for extraction
+    assert records['lead_b']['pages_analyzed'] == ['home']
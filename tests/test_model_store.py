@@ -0,0 +1,54 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from modules.model_store import get_latest_version, load_model_artifacts, save_model_artifacts
+
+
+def fitted(slope):
+    x = np.arange(20, dtype=float).reshape(-1, 1)
+    return LinearRegression().fit(x, slope * x.ravel())
+
+
+def test_no_models_trained_yet(tmp_path):
+    assert get_latest_version(str(tmp_path)) is None
+    assert load_model_artifacts(['revenue'], str(tmp_path)) == (None, {})
+
+
+def test_each_save_is_a_new_version_and_latest_moves(tmp_path):
+    model_dir = str(tmp_path)
+    first = save_model_artifacts({'revenue': fitted(2)}, {'samples': 20}, model_dir=model_dir)
+    second = save_model_artifacts({'revenue': fitted(3)}, model_dir=model_dir)
+
+    assert first != second
+    assert get_latest_version(model_dir) == second
+    with open(os.path.join(model_dir, first, 'manifest.json')) as f:
+        manifest = json.load(f)
+    assert manifest['version'] == first and manifest['models'] == ['revenue'] and manifest['samples'] == 20
+    assert not [name for name in os.listdir(model_dir) if name.endswith('.tmp')]
+
+
+def test_load_latest_or_pinned_version(tmp_path):
+    model_dir = str(tmp_path)
+    first = save_model_artifacts({'revenue': fitted(2)}, model_dir=model_dir)
+    save_model_artifacts({'revenue': fitted(3), 'margin': fitted(1)}, model_dir=model_dir)
+
+    version, models = load_model_artifacts(['revenue', 'margin', 'missing'], model_dir)
+    assert set(models) == {'revenue', 'margin'}
+    assert models['revenue'].predict([[10.0]])[0] == pytest.approx(30)
+
+    pinned, models = load_model_artifacts(['revenue', 'margin'], model_dir, version=first)
+    assert pinned == first and set(models) == {'revenue'}
+    assert models['revenue'].predict([[10.0]])[0] == pytest.approx(20)
+
+
+def test_unreadable_artifact_is_skipped(tmp_path):
+    model_dir = str(tmp_path)
+    version = save_model_artifacts({'revenue': fitted(2)}, model_dir=model_dir)
+    with open(os.path.join(model_dir, version, 'revenue.joblib'), 'wb') as f:
+        f.write(b'not a pickle')
+
+    assert load_model_artifacts(['revenue'], model_dir) == (version, {})
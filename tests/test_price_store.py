@@ -0,0 +1,71 @@
+import os
+import time
+
+import numpy as np
+
+from modules.price_store import PriceStore, price_stats
+
+DAY = 86400
+
+
+def test_append_extends_and_replaces_from_first_new_bar(tmp_path):
+    store = PriceStore(str(tmp_path))
+    assert store.append('ACME', '1d', [DAY, 2 * DAY, 3 * DAY], [10.0, 11.0, 12.0]) == 3
+
+    # The last bar is re-fetched with a new close, one new bar follows, a missing close is dropped
+    assert store.append('ACME', '1d', [3 * DAY, 4 * DAY, 5 * DAY], [12.5, 13.0, None]) == 2
+
+    timestamps, closes = store.series('ACME', '1d')
+    assert timestamps.tolist() == [DAY, 2 * DAY, 3 * DAY, 4 * DAY]
+    assert closes.tolist() == [10.0, 11.0, 12.5, 13.0]
+    assert store.last_timestamp('ACME', '1d') == 4 * DAY
+    assert store.series('ACME', '1d', since=3 * DAY)[1].tolist() == [12.5, 13.0]
+
+
+def test_open_series_views_survive_a_rewrite(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append('ACME', '1d', [DAY, 2 * DAY], [10.0, 11.0])
+    _, closes = store.series('ACME', '1d')
+
+    store.append('ACME', '1d', [DAY], [9.0])
+
+    assert closes.tolist() == [10.0, 11.0]
+    assert store.series('ACME', '1d')[1].tolist() == [9.0]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_refresh_without_new_bars_keeps_series_fresh(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append('ACME', '1d', [DAY], [10.0])
+    path = store._path('ACME', '1d')
+    stale = time.time() - 3600
+    for name in (path, path + '.checked'):
+        os.utime(name, (stale, stale))
+    assert not store.is_fresh('ACME', '1d', max_age=60)
+
+    assert store.append('ACME', '1d', [2 * DAY], [None]) == 0
+
+    assert store.is_fresh('ACME', '1d', max_age=60)
+    assert os.path.getmtime(path) == stale
+
+
+def test_unknown_series_is_empty_and_stale(tmp_path):
+    store = PriceStore(str(tmp_path))
+
+    assert store.series('NONE', '1d')[0].size == 0
+    assert store.last_timestamp('NONE', '1d') is None
+    assert not store.is_fresh('NONE', '1d', max_age=60)
+    assert store.stats('NONE', '1d') == {}
+
+
+def test_price_stats():
+    timestamps = np.arange(300) * DAY
+    closes = np.linspace(100, 130, 300)
+
+    stats = price_stats(timestamps, closes, 252)
+
+    assert stats['current_price'] == 130
+    assert stats['price_52w_high'] == 130
+    assert stats['price_52w_low'] == closes[timestamps >= timestamps[-1] - 365 * DAY].min()
+    assert stats['momentum'] == closes[-1] / closes[-1 - 126] - 1
+    assert stats['volatility'] > 0
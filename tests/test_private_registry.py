@@ -0,0 +1,53 @@
+import time
+
+from modules.private_registry import PrivateCompanyRegistry, normalize_name
+
+
+def test_normalize_name_drops_case_punctuation_and_legal_suffixes():
+    assert normalize_name('Acme Widgets, Inc.') == 'acme widgets'
+    assert normalize_name('The Company') == 'the company'
+
+
+def test_exact_normalized_match_only(tmp_path):
+    registry = PrivateCompanyRegistry(str(tmp_path / 'registry.sqlite3'))
+    registry.mark_private('Apple Orchards LLC')
+
+    assert registry.is_private('apple orchards')
+    assert registry.is_private('Apple Orchards, Inc.')
+    assert not registry.is_private('Apples Orchards')
+    assert not registry.is_private('Apple Orchard')
+
+
+def test_unmark_removes_exact_key_only(tmp_path):
+    registry = PrivateCompanyRegistry(str(tmp_path / 'registry.sqlite3'))
+    registry.mark_private('Apple')
+    registry.mark_private('Apples')
+
+    registry.unmark('Apple Inc.')
+
+    assert not registry.is_private('Apple')
+    assert registry.is_private('Apples')
+
+
+def test_lookup_misses_expire_and_never_downgrade_manual(tmp_path):
+    registry = PrivateCompanyRegistry(str(tmp_path / 'registry.sqlite3'), miss_ttl=0.05)
+    registry.mark_private('Miss Co', source='lookup_miss')
+    registry.mark_private('Manual Co', source='manual')
+    registry.mark_private('Manual Co', source='lookup_miss')
+
+    time.sleep(0.1)
+
+    assert not registry.is_private('Miss Co')
+    assert registry.is_private('Manual Co')
+
+
+def test_changes_are_seen_by_other_processes(tmp_path):
+    path = str(tmp_path / 'registry.sqlite3')
+    first = PrivateCompanyRegistry(path)
+    second = PrivateCompanyRegistry(path)
+
+    first.mark_private('Shared Co')
+    assert second.is_private('Shared Co')
+
+    first.unmark('Shared Co')
+    assert not second.is_private('Shared Co')
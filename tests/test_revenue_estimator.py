@@ -0,0 +1,154 @@
+import random
+
+import pytest
+
+from modules.revenue_estimator import (build_feature_table, classify_capex_batch, company_keyword_text,
+                                       count_subscription_hits, estimate_industry_recurring_revenue_batch,
+                                       estimate_recurring_revenue_batch)
+
+INDUSTRY_WORDS = ['Software', 'Application', 'Infrastructure', 'Service', 'Services', 'SaaS', 'Business',
+                  'Subscription', 'Streaming', 'Medical', 'Devices', 'Telecom', 'Banking', 'Digital',
+                  'Hardware', 'Manufacturing', 'Retail', 'Apparel', 'Specialty']
+SECTORS = ['Technology', 'Healthcare', 'Utilities', 'Financial Services', 'Industrials', 'Energy',
+           'Basic Materials', 'Consumer Cyclical', 'Communication Services', '', None]
+
+
+# Per-company rule chains from before vectorization, kept verbatim as the reference
+
+def reference_recurring_revenue(financials, is_subscription):
+    features = {
+        'is_saas': 'software' in str(financials.get('industry', '')).lower(),
+        'is_subscription': is_subscription,
+        'volatility': financials.get('volatility', 0.5),
+        'ebitda_margin': financials.get('ebitda_margin', 10),
+    }
+    recurring_percentage = 0
+    if features['is_saas']:
+        recurring_percentage += 60
+    if features['is_subscription']:
+        recurring_percentage += 25
+    if features['volatility'] < 0.3:
+        recurring_percentage += 15
+    if features['ebitda_margin'] > 20:
+        recurring_percentage += 10
+    return min(95, recurring_percentage)
+
+
+def reference_industry_recurring_revenue(metrics):
+    industry = (metrics.get('industry') or '').lower()
+    sector = (metrics.get('sector') or '').lower()
+    volatility = metrics.get('volatility')
+
+    if 'software' in industry and ('service' in industry or 'saas' in industry):
+        return 80
+    if any(term in industry for term in ['subscription', 'streaming']):
+        return 75
+    if 'services' in industry and 'business' in industry:
+        return 65
+    if 'technology' in sector:
+        return 55
+    if 'health' in sector or 'medical' in industry:
+        return 60
+    if 'utilities' in sector or 'telecom' in industry:
+        return 70
+    if 'financial' in sector or 'banking' in industry:
+        return 50
+    if volatility is not None:
+        if volatility < 0.2:
+            return 60
+        elif volatility < 0.3:
+            return 50
+        elif volatility < 0.4:
+            return 40
+    return 30
+
+
+def reference_capex(metrics):
+    industry = (metrics.get('industry') or '').lower()
+    sector = (metrics.get('sector') or '').lower()
+    capex_ratio = metrics.get('capex_to_revenue')
+
+    if capex_ratio is not None:
+        if capex_ratio < 5:
+            return 'low'
+        elif capex_ratio < 15:
+            return 'moderate'
+        else:
+            return 'high'
+    if 'software' in industry or 'digital' in industry:
+        return 'low'
+    if 'technology' in sector and 'hardware' not in industry:
+        return 'low'
+    if 'manufacturing' in industry or 'industrial' in sector:
+        return 'high'
+    if 'utilities' in sector or 'telecom' in industry:
+        return 'high'
+    if 'energy' in sector or 'materials' in sector:
+        return 'high'
+    if 'retail' in industry:
+        return 'moderate'
+    if 'services' in industry:
+        return 'low'
+    return 'moderate'
+
+
+def random_record(rng):
+    record = {'subscription_hits': rng.choice([0, 0, 1, 2, 3])}
+    if rng.random() < 0.9:
+        words = rng.sample(INDUSTRY_WORDS, rng.randint(1, 3))
+        record['industry'] = rng.choice([' ', '—', ' & ']).join(words)
+    if rng.random() < 0.9:
+        record['sector'] = rng.choice(SECTORS)
+    # Missing numbers are either absent or None, as the handlers produce them
+    for field, low, high in [('volatility', 0.0, 0.6), ('ebitda_margin', -20, 45), ('capex_to_revenue', 0, 30)]:
+        roll = rng.random()
+        if roll < 0.7:
+            record[field] = round(rng.uniform(low, high), 2)
+        elif roll < 0.85:
+            record[field] = None
+    return record
+
+
+@pytest.fixture(scope='module')
+def records():
+    rng = random.Random(40)
+    return [random_record(rng) for _ in range(5000)]
+
+
+def test_recurring_revenue_batch_matches_reference(records):
+    table = build_feature_table(records)
+    expected = []
+    for record in records:
+        # The old chain used key defaults, so None values stand for absent keys
+        financials = {key: value for key, value in record.items() if value is not None}
+        expected.append(reference_recurring_revenue(financials, record['subscription_hits'] > 0))
+
+    assert estimate_recurring_revenue_batch(table).tolist() == expected
+
+
+def test_industry_recurring_revenue_batch_matches_reference(records):
+    table = build_feature_table(records)
+    expected = [reference_industry_recurring_revenue(record) for record in records]
+
+    assert estimate_industry_recurring_revenue_batch(table).tolist() == expected
+
+
+def test_capex_batch_matches_reference(records):
+    table = build_feature_table(records)
+    expected = [reference_capex(record) for record in records]
+
+    assert classify_capex_batch(table).tolist() == expected
+
+
+def test_keyword_text_ignores_field_names_and_numbers():
+    company = {
+        'subscription_fee': 12,
+        'business_details': {'description': 'Monthly fee billing for clinics', 'employees': 40},
+        'subscription_indicators': {'retainer': 2},
+        'financials': {'industry': 'Software—Application', 'annual_revenue': 2e7}
+    }
+    text = company_keyword_text(company)
+
+    assert 'subscription_fee' not in text
+    assert 'software—application' in text
+    assert count_subscription_hits(text) == 2
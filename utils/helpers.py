@@ -1,25 +1,54 @@
 import re
-import os
-import json
+import time
+import secrets
+import threading
 from datetime import datetime
 
-# Path to leads data file
-LEADS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'leads.json')
+from modules.lead_store import get_lead_store, REANALYSIS_KEEP_FIELDS
 
-def get_leads():
-    """Read leads from JSON file"""
-    if not os.path.exists(LEADS_FILE):
-        return []
+# Crockford base32 alphabet used by ULIDs
+_ULID_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_ulid_lock = threading.Lock()
+_ulid_last = (0, 0)
+_ULID_RANDOM_MAX = (1 << 80) - 1
+
+def generate_lead_id():
+    """
+    Unique, time-sortable lead id: 'lead_' followed by a 26 character ULID
     
+    The ULID is a 48-bit millisecond timestamp and 80 random bits. Ids made in
+    the same millisecond increment the random part, so they stay unique and in
+    creation order within the process; if the random part would overflow, the
+    id moves on to the next millisecond instead of wrapping around.
+    """
+    global _ulid_last
+    with _ulid_lock:
+        timestamp = int(time.time() * 1000)
+        last_timestamp, last_random = _ulid_last
+        if timestamp <= last_timestamp and last_random < _ULID_RANDOM_MAX:
+            timestamp, randomness = last_timestamp, last_random + 1
+        else:
+            timestamp = max(timestamp, last_timestamp + 1)
+            randomness = secrets.randbits(80)
+        _ulid_last = (timestamp, randomness)
+    
+    value = (timestamp << 80) | randomness
+    chars = []
+    for _ in range(26):
+        chars.append(_ULID_ALPHABET[value & 31])
+        value >>= 5
+    return 'lead_' + ''.join(reversed(chars))
+
+def get_leads():
+    """Read all saved leads from the lead store"""
     try:
-        with open(LEADS_FILE, 'r') as f:
-            return json.load(f)
+        return list(get_lead_store().iter_leads())
     except Exception as e:
         print(f"Error reading leads: {e}")
         return []
 
 def save_lead(lead_data):
-    """Save or update a lead in the leads file"""
+    """Save or update a lead in the lead store"""
     try:
         # Ensure lead has required fields
         required_fields = ['company_name', 'url']
@@ -29,39 +58,28 @@ def save_lead(lead_data):
         
         # Ensure lead has an ID
         if not lead_data.get('id'):
-            lead_data['id'] = f"lead_{int(datetime.now().timestamp() * 1000)}"
+            lead_data['id'] = generate_lead_id()
         
         # Add timestamp if not provided
         if not lead_data.get('date_added'):
             lead_data['date_added'] = datetime.now().isoformat()
         
-        # Get existing leads
-        leads = get_leads()
-        
-        # Check if lead already exists
-        existing_idx = -1
-        for idx, lead in enumerate(leads):
-            if lead.get('id') == lead_data.get('id') or lead.get('url') == lead_data.get('url'):
-                existing_idx = idx
-                break
-        
-        if existing_idx >= 0:
-            # Update existing lead
-            leads[existing_idx].update(lead_data)
-            leads[existing_idx]['last_updated'] = datetime.now().isoformat()
-        else:
-            # Add new lead
-            leads.append(lead_data)
-        
-        # Save updated leads
-        os.makedirs(os.path.dirname(LEADS_FILE), exist_ok=True)
-        with open(LEADS_FILE, 'w') as f:
-            json.dump(leads, f, indent=2)
+        # A lead for an already stored domain is updated in place, atomically
+        get_lead_store().upsert_by_domain(dict(lead_data, last_updated=datetime.now().isoformat()),
+                                          keep_fields=REANALYSIS_KEEP_FIELDS)
         
         return True, "Lead saved successfully"
     except Exception as e:
         print(f"Error saving lead: {e}")
         return False, f"Error saving lead: {str(e)}"
+
+def delete_lead(lead_id):
+    """Remove a lead from the lead store"""
+    try:
+        return get_lead_store().delete(lead_id)
+    except Exception as e:
+        print(f"Error deleting lead: {e}")
+        return False
     
 def clean_text(text):
     """Clean and normalize text for analysis"""
@@ -0,0 +1,340 @@
+"""
+Append-only lead journal.
+
+Leads are stored as one JSON record per line ({"op": "put", "lead": {...},
+"created_at": ..., "updated_at": ...} or {"op": "delete", "id": ...}).
+Saving a lead appends a single fsync'd line instead of rewriting the whole
+file, and an in-memory index maps lead ids to the offset of their latest
+record and a secondary key (the lead's domain, by default its URL) to its
+lead id. The journal is compacted (rewritten with only live leads and
+atomically swapped in) once superseded records outnumber live ones. A torn
+last line left by a crash is truncated when the journal is loaded.
+
+Writers in other processes are serialized with an advisory file lock; before
+each operation the index catches up on records appended by them, and is
+rebuilt if the journal was compacted underneath it.
+
+JournalLeadStore (modules/lead_store.py) serves the application routes from
+a journal when LEAD_STORE_BACKEND=journal.
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+from .storage import file_lock
+
+logger = logging.getLogger(__name__)
+
+
+def _default_key(lead):
+    return lead.get('url')
+
+
+class LeadJournal:
+    """Append-only JSONL store of leads with an id index and a secondary key index"""
+
+    def __init__(self, path, legacy_path=None, compact_min_records=1000, key_fn=None, json_default=str):
+        """
+        Initialize the journal
+
+        Args:
+            path (str): Journal file (JSON lines)
+            legacy_path (str): Optional leads.json array imported when the journal does not exist yet
+            compact_min_records (int): Journal size below which compaction is never triggered
+            key_fn (callable): Secondary key of a lead (e.g. its domain); defaults to the URL
+            json_default (callable): json.dumps default for values JSON cannot encode
+        """
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.compact_min_records = compact_min_records
+        self.key_fn = key_fn or _default_key
+        self.json_default = json_default
+        self._lock = threading.RLock()
+        self._entries = {}      # lead id -> (offset, length, created_at, updated_at, key) of its latest record
+        self._keys = {}         # secondary key -> lead id
+        self._records = 0
+        self._end = 0
+        self._inode = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._locked():
+            if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+                self._import_legacy(legacy_path)
+
+    def _encode(self, record):
+        return json.dumps(record, separators=(',', ':'), default=self.json_default).encode('utf-8') + b'\n'
+
+    @contextmanager
+    def _locked(self):
+        """Holds the thread lock and the inter-process file lock, with the index caught up"""
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            yield
+
+    def _refresh(self):
+        """Replays records appended since the last look; rebuilds after a compaction"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset(None)
+            return
+
+        if stat.st_ino != self._inode or stat.st_size < self._end:
+            self._reset(stat.st_ino)
+        if stat.st_size == self._end:
+            return
+
+        offset = self._end
+        torn = False
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    record = json.loads(line) if line.endswith(b'\n') else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    torn = True
+                    break
+                self._apply(record, offset, len(line))
+                offset += len(line)
+
+        if torn:
+            # Torn write from a crashed writer: drop it and everything after it
+            logger.warning(f"Truncating corrupt lead journal tail at offset {offset}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+                f.flush()
+                os.fsync(f.fileno())
+        self._end = offset
+
+    def _reset(self, inode):
+        self._entries = {}
+        self._keys = {}
+        self._records = 0
+        self._end = 0
+        self._inode = inode
+
+    def _apply(self, record, offset, length):
+        """Updates the index for one journal record"""
+        self._records += 1
+        if record.get('op') == 'delete':
+            entry = self._entries.pop(record.get('id'), None)
+            if entry is not None:
+                self._unkey(entry[4], record['id'])
+            return
+
+        lead = record.get('lead') or {}
+        lead_id = lead.get('id')
+        key = self.key_fn(lead)
+        previous = self._entries.get(lead_id)
+        if previous is not None and previous[4] != key:
+            self._unkey(previous[4], lead_id)
+        # Dict assignment keeps an updated lead in its original position
+        self._entries[lead_id] = (offset, length, record.get('created_at'), record.get('updated_at'), key)
+        # The oldest lead keeps a key shared by several leads
+        if key is not None and self._keys.get(key) not in self._entries:
+            self._keys[key] = lead_id
+
+    def _unkey(self, key, lead_id):
+        """Drops a key pointing at lead_id, handing it to another live lead with the same key"""
+        if key is None or self._keys.get(key) != lead_id:
+            return
+        del self._keys[key]
+        for other_id, entry in self._entries.items():
+            if entry[4] == key and other_id != lead_id:
+                self._keys[key] = other_id
+                break
+
+    def _append(self, records):
+        """Appends records with a single fsync'd write and indexes them"""
+        lines = [self._encode(record) for record in records]
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._inode is None:
+            self._inode = os.stat(self.path).st_ino
+
+        for record, line in zip(records, lines):
+            self._apply(record, self._end, len(line))
+            self._end += len(line)
+
+    def _read_at(self, f, lead_id):
+        offset, length = self._entries[lead_id][:2]
+        f.seek(offset)
+        return json.loads(f.read(length))['lead']
+
+    def _put_record(self, lead, now):
+        entry = self._entries.get(lead['id'])
+        return {'op': 'put', 'lead': lead, 'created_at': entry[2] if entry and entry[2] else now, 'updated_at': now}
+
+    def get(self, lead_id):
+        """Return a lead by id, or None"""
+        with self._locked():
+            if lead_id not in self._entries:
+                return None
+            with open(self.path, 'rb') as f:
+                return self._read_at(f, lead_id)
+
+    def get_many(self, lead_ids):
+        """Leads that exist for the given ids, in the given order"""
+        with self._locked():
+            lead_ids = [lead_id for lead_id in lead_ids if lead_id in self._entries]
+            if not lead_ids:
+                return []
+            with open(self.path, 'rb') as f:
+                return [self._read_at(f, lead_id) for lead_id in lead_ids]
+
+    def find(self, key):
+        """Return the (oldest) lead with this secondary key, or None"""
+        with self._locked():
+            lead_id = self._keys.get(key)
+            if lead_id is None:
+                return None
+            with open(self.path, 'rb') as f:
+                return self._read_at(f, lead_id)
+
+    def times(self, lead_id):
+        """(created_at, updated_at) of a lead, or (None, None)"""
+        with self._locked():
+            entry = self._entries.get(lead_id)
+            return (entry[2], entry[3]) if entry else (None, None)
+
+    def __len__(self):
+        with self._locked():
+            return len(self._entries)
+
+    def scan(self):
+        """
+        Yield (lead, created_at, updated_at) for all live leads in insertion order
+
+        The index is snapshotted under the lock and records are then read from
+        the file opened at that point, so a concurrent compaction (which swaps
+        in a new file) does not disturb the scan.
+        """
+        with self._locked():
+            entries = list(self._entries.values())
+            f = open(self.path, 'rb') if entries else None
+        if f is None:
+            return
+        with f:
+            for offset, length, created_at, updated_at, _ in entries:
+                f.seek(offset)
+                yield json.loads(f.read(length))['lead'], created_at, updated_at
+
+    def put_many(self, leads):
+        """Insert or replace leads (by id) with one append; returns the number written"""
+        leads = list(leads)
+        if not leads:
+            return 0
+        now = datetime.now().isoformat()
+        with self._locked():
+            self._append([self._put_record(lead, now) for lead in leads])
+            self._maybe_compact()
+        return len(leads)
+
+    def update(self, lead_id, updates):
+        """Merge top-level fields into a stored lead; returns the updated lead or None"""
+        with self._locked():
+            if lead_id not in self._entries:
+                return None
+            with open(self.path, 'rb') as f:
+                lead = self._read_at(f, lead_id)
+            lead.update(updates)
+            self._append([self._put_record(lead, datetime.now().isoformat())])
+            self._maybe_compact()
+            return lead
+
+    def upsert_by_key(self, lead, merge):
+        """
+        Store a lead, replacing the lead with the same secondary key
+
+        Lookup and write happen under the journal lock. When a lead with the
+        same key exists, merge(lead, existing) returns the lead to store.
+
+        Returns:
+            dict: The stored lead
+        """
+        with self._locked():
+            existing_id = self._keys.get(self.key_fn(lead))
+            if existing_id is not None:
+                with open(self.path, 'rb') as f:
+                    lead = merge(lead, self._read_at(f, existing_id))
+            self._append([self._put_record(lead, datetime.now().isoformat())])
+            self._maybe_compact()
+            return lead
+
+    def delete(self, lead_id):
+        """Delete a lead; returns True if it existed"""
+        with self._locked():
+            if lead_id not in self._entries:
+                return False
+            self._append([{'op': 'delete', 'id': lead_id}])
+            self._maybe_compact()
+            return True
+
+    def _maybe_compact(self):
+        if self._records >= self.compact_min_records and self._records > 2 * len(self._entries):
+            self._compact()
+
+    def compact(self):
+        """Rewrites the journal with only live leads and atomically swaps it in"""
+        with self._locked():
+            self._compact()
+
+    def _compact(self):
+        records = []
+        if self._entries:
+            with open(self.path, 'rb') as f:
+                for lead_id, entry in self._entries.items():
+                    records.append({'op': 'put', 'lead': self._read_at(f, lead_id),
+                                    'created_at': entry[2], 'updated_at': entry[3]})
+        total = self._records
+        self._write_snapshot(records)
+        self._reset(None)
+        self._refresh()
+        logger.info(f"Compacted lead journal from {total} to {len(records)} records")
+
+    def _write_snapshot(self, records):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                f.write(self._encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._fsync_dir()
+
+    def _fsync_dir(self):
+        """Makes the rename durable (not supported on every platform)"""
+        try:
+            dir_fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+    def _import_legacy(self, legacy_path):
+        """One-time import of a leads.json array written by earlier versions"""
+        try:
+            with open(legacy_path, 'r') as f:
+                leads = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not import legacy leads file {legacy_path}: {str(e)}")
+            return
+        now = datetime.now().isoformat()
+        self._write_snapshot([
+            {'op': 'put', 'lead': lead, 'created_at': lead.get('date_added') or now, 'updated_at': now}
+            for lead in leads if isinstance(lead, dict) and lead.get('id')
+        ])
+        logger.info(f"Imported {len(leads)} leads from {legacy_path} into the lead journal")
+        self._refresh()
@@ -0,0 +1,59 @@
+"""
+Helpers shared by the on-disk stores.
+
+Default file locations (resolved from the repository root, overridable by an
+environment variable), JSON encoding of the numpy values found in lead and
+financial data, and the advisory file lock that serializes writers across
+worker processes.
+"""
+
+import os
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_path(env_var, *parts):
+    """Path from env_var if set, otherwise parts joined under the repository root"""
+    return os.environ.get(env_var, os.path.join(REPO_ROOT, *parts))
+
+
+def json_default(value):
+    """json.dumps default for numpy scalars and arrays; anything else raises TypeError"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_default_str(value):
+    """Like json_default, but values JSON cannot encode are stored as their string form"""
+    try:
+        return json_default(value)
+    except TypeError:
+        return str(value)
+
+
+@contextmanager
+def file_lock(lock_path):
+    """
+    Hold an exclusive advisory lock on lock_path (created if missing)
+
+    Serializes processes only; threads of one process still need their own
+    lock. Without fcntl (Windows) this is a no-op.
+    """
+    with open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield lock_file
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)